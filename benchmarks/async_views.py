@@ -0,0 +1,185 @@
+"""Throughput of the sync vs the async form views when the form has slow pre/post load APIs.
+
+Usage:
+    python benchmarks/async_views.py
+    python benchmarks/async_views.py --latency 200 --apis 2 --requests 200 --concurrency 50
+    python benchmarks/async_views.py --endpoint submit --output async.json
+
+Both variants run in a single worker: the sync views handle the requests on
+`--threads` threads (1 by default, like a single sync worker) and the async
+views handle `--concurrency` requests at a time on one event loop. The APIs
+point to a local stub server answering after `--latency` milliseconds.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlencode
+
+BASE_DIR = Path(__file__).resolve().parent
+sys.path[:0] = [str(BASE_DIR), str(BASE_DIR.parent)]
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
+# the async views touch the database from other threads, an in-memory database is per connection
+os.environ.setdefault("BENCHMARK_DATABASE", os.path.join(tempfile.mkdtemp(prefix="form_generator_bench_"), "db.sqlite3"))
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import AnonymousUser  # noqa: E402
+from django.contrib.messages.storage.cookie import CookieStorage  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.test import AsyncRequestFactory, RequestFactory  # noqa: E402
+
+from django_form_generator import const  # noqa: E402
+from django_form_generator.common.utils import httpx  # noqa: E402
+from django_form_generator.management.commands.form_generator_loadtest import (  # noqa: E402
+    StubAPIServer,
+    percentile,
+)
+from django_form_generator.models import FormAPIManager, FormAPIThrough  # noqa: E402
+from django_form_generator.views import AsyncFormGeneratorView, FormGeneratorView  # noqa: E402
+
+import fixtures  # noqa: E402
+
+
+def attach_apis(form, url, count):
+    weight = 0
+    for execute_time, method in ((const.FormAPIManagerExecuteTime.PRE_LOAD, const.FormAPIManagerMethod.GET),
+                                 (const.FormAPIManagerExecuteTime.POST_LOAD, const.FormAPIManagerMethod.POST)):
+        for i in range(count):
+            api = FormAPIManager.objects.create(
+                title=f"Benchmark {execute_time} {i}",
+                url=f"{url}/{execute_time}/{i}/",
+                method=method,
+                body="{{form_data}}" if method == const.FormAPIManagerMethod.POST else None,
+                execute_time=execute_time,
+                response="{{path}}",
+                is_active=True,
+                failure_threshold=0,
+            )
+            weight += 1
+            FormAPIThrough.objects.create(form=form, api=api, weight=weight)
+
+
+def prepare(request):
+    request.user = AnonymousUser()
+    request.session = None
+    request._messages = CookieStorage(request)
+    return request
+
+
+def build_requests(factory, form, endpoint, count):
+    path = f"/form-generator/form/{form.pk}/"
+    data = urlencode(fixtures.build_post_data(form), doseq=True)
+    requests = []
+    for i in range(count):
+        if endpoint == "detail" or (endpoint == "both" and i % 2):
+            requests.append(prepare(factory.get(path)))
+        else:
+            requests.append(prepare(factory.post(path, data, content_type="application/x-www-form-urlencoded")))
+    return requests
+
+
+def summarize(name, durations, wall_time, errors):
+    durations.sort()
+    return {
+        "name": name,
+        "requests": len(durations),
+        "errors": errors,
+        "wall_time": wall_time,
+        "throughput": len(durations) / wall_time if wall_time else 0.0,
+        "mean": statistics.fmean(durations) if durations else 0.0,
+        "p50": percentile(durations, 50),
+        "p95": percentile(durations, 95),
+        "p99": percentile(durations, 99),
+    }
+
+
+def run_sync(form, args):
+    view = FormGeneratorView.as_view()
+    requests = build_requests(RequestFactory(), form, args.endpoint, args.requests)
+
+    def handle(request):
+        start = time.perf_counter()
+        response = view(request, pk=form.pk)
+        if hasattr(response, "render"):
+            response.render()
+        return time.perf_counter() - start, response.status_code >= 400
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        results = list(executor.map(handle, requests))
+    wall_time = time.perf_counter() - start
+    return summarize(f"sync ({args.threads} thread)", [d for d, _ in results], wall_time,
+                     sum(error for _, error in results))
+
+
+def run_async(form, args):
+    view = AsyncFormGeneratorView.as_view()
+    requests = build_requests(AsyncRequestFactory(), form, args.endpoint, args.requests)
+
+    async def main():
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def handle(request):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await view(request, pk=form.pk)
+                return time.perf_counter() - start, response.status_code >= 400
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(handle(request) for request in requests))
+        return results, time.perf_counter() - start
+
+    results, wall_time = asyncio.run(main())
+    client = "httpx" if httpx is not None else "thread fallback"
+    return summarize(f"async ({args.concurrency} concurrent, {client})", [d for d, _ in results], wall_time,
+                     sum(error for _, error in results))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fields", type=int, default=10)
+    parser.add_argument("--apis", type=int, default=1, help="number of pre load and of post load apis")
+    parser.add_argument("--latency", type=float, default=100, help="stub api latency in milliseconds")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=1, help="threads of the sync worker")
+    parser.add_argument("--concurrency", type=int, default=50, help="in-flight requests of the async worker")
+    parser.add_argument("--endpoint", choices=("detail", "submit", "both"), default="both")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    call_command("migrate", verbosity=0, run_syncdb=True)
+    server = StubAPIServer(latency=args.latency / 1000).start()
+    try:
+        form = fixtures.build_form(args.fields)
+        attach_apis(form, server.url, args.apis)
+
+        results = []
+        for run in (run_sync, run_async):
+            cache.clear()
+            results.append(run(form, args))
+    finally:
+        server.stop()
+
+    print(f"{'variant':<40} {'req/s':>8} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>6}")
+    for result in results:
+        print(
+            f"{result['name']:<40} {result['throughput']:>8.1f} "
+            + " ".join(f"{result[key] * 1000:>7.1f}ms" for key in ("mean", "p50", "p95", "p99"))
+            + f" {result['errors']:>6}"
+        )
+    if args.output:
+        Path(args.output).write_text(json.dumps({"args": vars(args), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Synthetic dataset builders shared by the benchmark cases."""
+import itertools
+
+from django.test import RequestFactory
+
+from django_form_generator import const
+from django_form_generator.models import (
+    Field,
+    FieldCategory,
+    FieldOptionThrough,
+    FieldValidator,
+    Form,
+    FormFieldThrough,
+    FormResponse,
+    Option,
+)
+
+# captcha and upload_file need external services / files and multi_text_input
+# has no serializer counterpart, so they are left out of the synthetic forms.
+GENRES = (
+    const.FieldGenre.TEXT_INPUT,
+    const.FieldGenre.TEXT_AREA,
+    const.FieldGenre.NUMBER,
+    const.FieldGenre.EMAIL,
+    const.FieldGenre.DROPDOWN,
+    const.FieldGenre.RADIO,
+    const.FieldGenre.MULTI_CHECKBOX,
+    const.FieldGenre.CHECKBOX,
+    const.FieldGenre.DATE,
+    const.FieldGenre.HIDDEN,
+)
+OPTIONS_PER_FIELD = 5
+FIELDS_PER_CATEGORY = 10
+
+_counter = itertools.count()
+
+
+def build_request(path="/", user_ip="127.0.0.1"):
+    request = RequestFactory().get(path, REMOTE_ADDR=user_ip)
+    request.session = None
+    return request
+
+
+def build_form(field_count: int) -> Form:
+    """Create a published form with `field_count` active fields of mixed genres."""
+    n = next(_counter)
+    form = Form.objects.create(
+        title=f"Benchmark {n}",
+        slug=f"benchmark-{n}",
+        status=const.FormStatus.PUBLISH,
+        style=const.FormStyle.DYNAMIC,
+        is_editable=True,
+    )
+    categories = [
+        FieldCategory.objects.create(title=f"Category {n}-{i}", weight=i)
+        for i in range((field_count // FIELDS_PER_CATEGORY) + 1)
+    ]
+    fields = Field.objects.bulk_create(
+        [
+            Field(
+                label=f"Field {i}",
+                name=f"f{n}_{i}",
+                genre=GENRES[i % len(GENRES)],
+                is_required=GENRES[i % len(GENRES)] != const.FieldGenre.CHECKBOX,
+                is_active=True,
+            )
+            for i in range(field_count)
+        ]
+    )
+    FormFieldThrough.objects.bulk_create(
+        [
+            FormFieldThrough(
+                form=form,
+                field=field,
+                weight=i,
+                category=categories[i // FIELDS_PER_CATEGORY],
+            )
+            for i, field in enumerate(fields)
+        ]
+    )
+    FieldValidator.objects.bulk_create(
+        [
+            FieldValidator(field=field, validator=const.Validator.MAX_LENGTH, value="200")
+            for field in fields
+            if field.genre in (const.FieldGenre.TEXT_INPUT, const.FieldGenre.TEXT_AREA)
+        ]
+    )
+    selectable = [f for f in fields if f.genre in const.FieldGenre.selectable_fields()]
+    options = Option.objects.bulk_create(
+        [Option(name=f"Option {n}-{i}") for i in range(OPTIONS_PER_FIELD)]
+    )
+    FieldOptionThrough.objects.bulk_create(
+        [
+            FieldOptionThrough(field=field, option=option, weight=w)
+            for field in selectable
+            for w, option in enumerate(options)
+        ]
+    )
+    return form
+
+
+def build_form_data(form: Form) -> dict:
+    """Valid cleaned-data-like payload for every field of `form`."""
+    data = {}
+    for field in form.get_fields():
+        option_ids = list(field.get_choices().values_list("id", flat=True))
+        data[field.name] = {
+            const.FieldGenre.TEXT_INPUT: "some text value",
+            const.FieldGenre.TEXT_AREA: "a longer text value " * 5,
+            const.FieldGenre.NUMBER: 42,
+            const.FieldGenre.EMAIL: "john@example.com",
+            const.FieldGenre.DROPDOWN: option_ids[0] if option_ids else None,
+            const.FieldGenre.RADIO: option_ids[-1] if option_ids else None,
+            const.FieldGenre.MULTI_CHECKBOX: option_ids[:2],
+            const.FieldGenre.CHECKBOX: True,
+            const.FieldGenre.DATE: "2023-01-02",
+            const.FieldGenre.HIDDEN: "hidden",
+        }.get(field.genre)
+    return data
+
+
+def build_post_data(form: Form) -> dict:
+    """Same payload as `build_form_data` but encoded like a browser POST."""
+    data = {}
+    for name, value in build_form_data(form).items():
+        if isinstance(value, list):
+            data[name] = [str(v) for v in value]
+        elif isinstance(value, bool):
+            data[name] = "on" if value else ""
+        else:
+            data[name] = str(value)
+    return data
+
+
+def build_responses(form: Form, count: int) -> list[FormResponse]:
+    form_data = build_form_data(form)
+    form_data["request"] = build_request()
+    data = FormResponse._generate_data(form, form_data)
+    return FormResponse.objects.bulk_create(
+        [FormResponse(form=form, data=data, user_ip="127.0.0.1") for _ in range(count)],
+        batch_size=500,
+    )
+
+
+def build_api_response(megabytes: int) -> list:
+    """`api_response` of a response whose apis returned about `megabytes` MB of JSON (lists of records)."""
+    record = {
+        "id": 0,
+        "name": "John Doe",
+        "email": "john@example.com",
+        "active": True,
+        "score": 42.5,
+        "tags": ["alpha", "beta", "gamma"],
+        "address": {"city": "Berlin", "street": "Main street 1", "zip": "10115"},
+    }
+    count = megabytes * 2 ** 20 // 200  # a record is about 200 bytes of JSON
+    results = [dict(record, id=i) for i in range(count)]
+    return [[
+        {
+            "api": 1,
+            "url": "https://example.com/api/records/",
+            "method": "get",
+            "body": None,
+            "response_status_code": 200,
+            "result": results,
+        }
+    ]]
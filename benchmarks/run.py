@@ -0,0 +1,387 @@
+"""Microbenchmarks for the form build, submit, render and filter hot paths.
+
+Usage:
+    python benchmarks/run.py                         # run everything
+    python benchmarks/run.py -k form_build -k get_data
+    python benchmarks/run.py --fields 10,100 --responses 100,1000
+    python benchmarks/run.py --output before.json
+    python benchmarks/run.py --output after.json --compare before.json
+
+Every case runs against an in-memory SQLite database and a local-memory cache
+so results only depend on the code under test. Results are written as JSON
+(one entry per case and parameter set) to make runs comparable across commits.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+sys.path[:0] = [str(BASE_DIR), str(BASE_DIR.parent)]
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+import fixtures  # noqa: E402
+
+
+BENCHMARKS = {}
+DEFAULT_PARAMS = {
+    "fields": [10, 50, 200],
+    "responses": [100, 1000],
+    "clauses": [1, 5, 20],
+    "items": [1, 100],
+    "megabytes": [1, 5],
+}
+
+
+def benchmark(*param_names):
+    """Register a case. The decorated function receives the params and returns the callable to time."""
+
+    def decorator(func):
+        BENCHMARKS[func.__name__] = (func, param_names)
+        return func
+
+    return decorator
+
+
+_forms = {}
+_responses = {}
+
+
+def get_form(field_count):
+    if field_count not in _forms:
+        _forms[field_count] = fixtures.build_form(field_count)
+    return _forms[field_count]
+
+
+def get_responses(field_count, response_count):
+    key = (field_count, response_count)
+    if key not in _responses:
+        _responses[key] = fixtures.build_responses(get_form(field_count), response_count)
+    return _responses[key]
+
+
+# --------------------------------------------------------------------------- cases
+
+
+@benchmark("fields")
+def form_build(fields):
+    from django_form_generator.forms import FormGeneratorBaseForm
+
+    form = get_form(fields)
+    data = fixtures.build_post_data(form)
+    return lambda: FormGeneratorBaseForm(form, data=data)
+
+
+@benchmark("fields")
+def serializer_build(fields):
+    from django_form_generator.api.serializers import FormGeneratorSerializer
+
+    form = get_form(fields)
+    request = fixtures.build_request()
+    context = {"form": form, "request": request, "user_ip": "127.0.0.1"}
+    return lambda: FormGeneratorSerializer(context=context)
+
+
+@benchmark("fields")
+def generate_data(fields):
+    from django_form_generator.models import FormResponse
+
+    form = get_form(fields)
+    form_data = fixtures.build_form_data(form)
+    form_data["request"] = fixtures.build_request()
+    return lambda: FormResponse._generate_data(form, form_data)
+
+
+@benchmark("fields")
+def build_field_plan(fields):
+    from django_form_generator.common.field_plan import build_plan
+
+    form = get_form(fields)
+    return lambda: build_plan(form)
+
+
+@benchmark("fields")
+def get_data(fields):
+    response = get_responses(fields, 1)[0]
+    return response.get_data
+
+
+@benchmark("fields")
+def response_data_json(fields):
+    """Round trip of the `data` of a response through its model field (save & load)."""
+    from django_form_generator.models import FormResponse
+
+    response = get_responses(fields, 1)[0]
+    field = FormResponse._meta.get_field("data")
+    return lambda: field.from_db_value(field.get_prep_value(response.data), None, connection)
+
+
+@benchmark("megabytes")
+def api_response_json(megabytes):
+    """Round trip of a multi-megabyte `api_response` through its model field (save & load)."""
+    from django_form_generator.models import FormResponse
+
+    api_response = fixtures.build_api_response(megabytes)
+    field = FormResponse._meta.get_field("api_response")
+    return lambda: field.from_db_value(field.get_prep_value(api_response), None, connection)
+
+
+@benchmark("fields")
+def response_list_render(fields):
+    """JSON rendering of a page of 100 responses of the responses api."""
+    from django_form_generator.api.renderers import FastJSONRenderer
+    from django_form_generator.api.serializers import FormResponseListSerializer
+
+    data = FormResponseListSerializer(get_responses(fields, 100), many=True).data
+    renderer = FastJSONRenderer()
+    return lambda: renderer.render(data)
+
+
+@benchmark("fields")
+def pure_data(fields):
+    response = get_responses(fields, 1)[0]
+    return lambda: response.pure_data
+
+
+@benchmark("items")
+def evaluate_data_dict(items):
+    from django_form_generator.common.utils import evaluate_data
+
+    template = " ".join("{{key_%d}}" % i for i in range(items))
+    replace_with = {"key_%d" % i: "value %d" % i for i in range(items)}
+    return lambda: evaluate_data(template, dict(replace_with))
+
+
+@benchmark("items")
+def evaluate_data_list(items):
+    from django_form_generator.common.utils import evaluate_data
+
+    template = "{{first_name}} {{last_name}} <img src='{{avatar}}'>"
+    replace_with = [
+        {"first_name": "john", "last_name": "doe %d" % i, "avatar": "https://example.com/%d.png" % i}
+        for i in range(items)
+    ]
+    return lambda: evaluate_data(template, [dict(item) for item in replace_with])
+
+
+class _BenchmarkFilter:
+    def __init__(self, parameters):
+        self.parameters = parameters
+
+    def get_parameters(self, request):
+        return self.parameters
+
+
+def _build_filter(fields, responses, clauses):
+    from django_form_generator import const
+    from django_form_generator.common.utils import FilterMixin
+
+    form = get_form(fields)
+    get_responses(fields, responses)
+    text_fields = [
+        f.pk for f in form.get_fields() if f.genre == const.FieldGenre.TEXT_INPUT
+    ]
+    field_ids = [str(text_fields[i % len(text_fields)]) for i in range(clauses)]
+    parameters = [
+        str(form.pk),
+        field_ids,
+        [const.FieldLookupType.ICONTAINS.value] * clauses,
+        ["AND"] * clauses,
+        ["text %d" % i for i in range(clauses)],
+    ]
+    filter_class = type("Filter", (_BenchmarkFilter, FilterMixin), {})
+    return filter_class(parameters), fixtures.build_request()
+
+
+@benchmark("clauses")
+def filter_get_lookups(clauses):
+    response_filter, request = _build_filter(50, 100, clauses)
+    return lambda: response_filter.get_lookups(request)
+
+
+@benchmark("responses", "clauses")
+def filter_queryset(responses, clauses):
+    from django_form_generator.models import FormResponse
+
+    response_filter, request = _build_filter(50, responses, clauses)
+    queryset = FormResponse.objects.all()
+    return lambda: response_filter.queryset(request, queryset).count()
+
+
+@benchmark("fields")
+def render_fields(fields):
+    form = get_form(fields)
+    return lambda: form.render_fields
+
+
+@benchmark("fields")
+def invalid_submit(fields):
+    from django.test import Client
+
+    from django_form_generator import const
+
+    form = get_form(fields)
+    data = fixtures.build_post_data(form)
+    # a single invalid field, like a typo in a long form
+    text_field = next(f for f in form.get_fields() if f.genre == const.FieldGenre.TEXT_INPUT)
+    data[text_field.name] = ""
+    client = Client()
+    url = "/form-generator/form/%d/" % form.pk
+    return lambda: client.post(url, data, HTTP_HX_REQUEST="true")
+
+
+# --------------------------------------------------------------------------- runner
+
+
+def _time(func, min_time, repeat):
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    timings = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return number, timings
+
+
+def _query_count(func):
+    with CaptureQueriesContext(connection) as ctx:
+        func()
+    return len(ctx.captured_queries)
+
+
+def _param_grid(param_names, params):
+    grid = [{}]
+    for name in param_names:
+        grid = [dict(g, **{name: value}) for g in grid for value in params[name]]
+    return grid
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _key(result):
+    return result["name"], tuple(sorted(result["params"].items()))
+
+
+def run(selected, params, min_time, repeat):
+    results = []
+    for name, (factory, param_names) in BENCHMARKS.items():
+        if selected and not any(s in name for s in selected):
+            continue
+        for case_params in _param_grid(param_names, params):
+            func = factory(**case_params)
+            func()  # warm up caches and lazy imports
+            queries = _query_count(func)
+            number, timings = _time(func, min_time, repeat)
+            result = {
+                "name": name,
+                "params": case_params,
+                "loops": number,
+                "queries": queries,
+                "stats": {
+                    "min": min(timings),
+                    "max": max(timings),
+                    "mean": statistics.mean(timings),
+                    "median": statistics.median(timings),
+                    "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+                },
+            }
+            results.append(result)
+            label = ", ".join(f"{k}={v}" for k, v in case_params.items())
+            print(
+                f"{name:<22} {label:<28} {result['stats']['min'] * 1000:>10.3f} ms"
+                f"  {queries:>5} queries"
+            )
+    return results
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {_key(r): r for r in json.load(f)["results"]}
+    print(f"\nCompared with {baseline_path} (min time, lower is better):")
+    for result in results:
+        old = baseline.get(_key(result))
+        if old is None:
+            continue
+        ratio = result["stats"]["min"] / old["stats"]["min"]
+        label = ", ".join(f"{k}={v}" for k, v in result["params"].items())
+        print(
+            f"{result['name']:<22} {label:<28} {old['stats']['min'] * 1000:>10.3f} ms"
+            f" -> {result['stats']['min'] * 1000:>10.3f} ms  x{ratio:.2f}"
+            f"  queries {old['queries']} -> {result['queries']}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="selected", action="append", default=[], help="only run cases whose name contains this")
+    for name, default in DEFAULT_PARAMS.items():
+        parser.add_argument(f"--{name}", default=",".join(map(str, default)), help=f"comma separated values (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per timing round")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare with")
+    parser.add_argument("--list", action="store_true", help="list available cases and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (_, param_names) in BENCHMARKS.items():
+            print(name, ", ".join(param_names))
+        return
+
+    params = {name: [int(v) for v in getattr(args, name).split(",") if v] for name in DEFAULT_PARAMS}
+    call_command("migrate", verbosity=0)
+    results = run(args.selected, params, args.min_time, args.repeat)
+
+    if args.output:
+        document = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "revision": _git_revision(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "repeat": args.repeat,
+                "min_time": args.min_time,
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Minimal django settings used by the benchmark runner (SQLite + in-memory cache)."""
+import os
+import tempfile
+
+SECRET_KEY = "django-form-generator-benchmarks"
+DEBUG = False
+ALLOWED_HOSTS = ["*"]
+USE_TZ = True
+
+INSTALLED_APPS = [
+    "django.contrib.admin",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+    "django_htmx",
+    "crispy_forms",
+    "crispy_bootstrap5",
+    "captcha",
+    "tempus_dominus",
+    "rest_framework",
+    "drf_recaptcha",
+    "django_form_generator",
+]
+
+MIDDLEWARE = [
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django_htmx.middleware.HtmxMiddleware",
+]
+
+ROOT_URLCONF = "urls"
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ]
+        },
+    }
+]
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        # benchmarks that use threads need a file database (set by the benchmark itself)
+        "NAME": os.environ.get("BENCHMARK_DATABASE", ":memory:"),
+    }
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+STATIC_URL = "/static/"
+MEDIA_URL = "/media/"
+MEDIA_ROOT = tempfile.mkdtemp(prefix="form_generator_bench_")
+
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
+CRISPY_TEMPLATE_PACK = "bootstrap5"
+DRF_RECAPTCHA_SECRET_KEY = "benchmark"
+SILENCED_SYSTEM_CHECKS = ["captcha.recaptcha_test_key_error"]
+
+DJANGO_FORM_GENERATOR = {
+    # BENCHMARK_FAST_JSON=0 measures the json module, to compare with orjson
+    "FAST_JSON": os.environ.get("BENCHMARK_FAST_JSON", "1") == "1",
+}
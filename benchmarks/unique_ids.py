@@ -0,0 +1,139 @@
+"""Insert throughput of the responses with random (UUIDv4) vs time ordered (UUIDv7) `unique_id`s.
+
+Usage:
+    python benchmarks/unique_ids.py
+    python benchmarks/unique_ids.py --rows 5000000 --cache-mb 16 --output unique_ids.json
+    DJANGO_SETTINGS_MODULE=myproject.settings python benchmarks/unique_ids.py --rows 2000000
+
+Every variant fills an empty table with `--rows` responses (`--batch` rows per
+transaction), then saves `--inserts` responses one by one (like submissions)
+into the full table. Random ids land on random pages of the unique index, once
+the index is bigger than the page cache (`--cache-mb`, SQLite) most inserts
+have to read a page; time ordered ids always land on the last pages.
+The database is a temporary SQLite file unless DJANGO_SETTINGS_MODULE points
+to other settings (e.g. PostgreSQL): use a scratch database, all of its
+responses are deleted.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+sys.path[:0] = [str(BASE_DIR), str(BASE_DIR.parent)]
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
+# the index has to outgrow the page cache, an in-memory database doesn't
+os.environ.setdefault("BENCHMARK_DATABASE", os.path.join(tempfile.mkdtemp(prefix="form_generator_bench_"), "db.sqlite3"))
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.test import override_settings  # noqa: E402
+
+from django_form_generator.const import UniqueIDVersion  # noqa: E402
+from django_form_generator.management.commands.form_generator_loadtest import percentile  # noqa: E402
+from django_form_generator.models import FormResponse  # noqa: E402
+
+import fixtures  # noqa: E402
+
+
+def empty_table():
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(f"DELETE FROM {FormResponse._meta.db_table}")
+            cursor.execute("VACUUM")
+        else:
+            cursor.execute(f"TRUNCATE {FormResponse._meta.db_table} CASCADE")
+
+
+def configure(args):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.execute("PRAGMA synchronous = NORMAL")
+        cursor.execute(f"PRAGMA cache_size = -{args.cache_mb * 1024}")
+
+
+def fill(form, args) -> list[float]:
+    """Rows per second of every batch."""
+    throughputs = []
+    for start in range(0, args.rows, args.batch):
+        count = min(args.batch, args.rows - start)
+        began = time.perf_counter()
+        with transaction.atomic():
+            FormResponse.objects.bulk_create(
+                [FormResponse(form=form, data=[], user_ip="127.0.0.1") for _ in range(count)], batch_size=500)
+        throughputs.append(count / (time.perf_counter() - began))
+        if args.progress:
+            print(f"  {start + count:>10} rows {throughputs[-1]:>10.0f} rows/s", file=sys.stderr)
+    return throughputs
+
+
+def run(form, version, args) -> dict:
+    empty_table()
+    with override_settings(DJANGO_FORM_GENERATOR={"UNIQUE_ID_VERSION": version}):
+        began = time.perf_counter()
+        throughputs = fill(form, args)
+        fill_time = time.perf_counter() - began
+        durations = []
+        for _ in range(args.inserts):
+            began = time.perf_counter()
+            FormResponse(form=form, data=[], user_ip="127.0.0.1").save()
+            durations.append(time.perf_counter() - began)
+    durations.sort()
+    tail = throughputs[-max(1, len(throughputs) // 10):]
+    return {
+        "name": version,
+        "rows": args.rows,
+        "fill_throughput": args.rows / fill_time,
+        # the last tenth of the batches, when the index is the biggest
+        "tail_throughput": statistics.mean(tail),
+        "insert_mean": statistics.mean(durations),
+        "insert_p50": percentile(durations, 50),
+        "insert_p95": percentile(durations, 95),
+        "insert_p99": percentile(durations, 99),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000, help="responses in the table before the inserts")
+    parser.add_argument("--batch", type=int, default=10_000, help="rows per transaction while filling the table")
+    parser.add_argument("--inserts", type=int, default=2000, help="responses saved one by one into the full table")
+    parser.add_argument("--cache-mb", type=int, default=8, help="SQLite page cache in MB")
+    parser.add_argument("--version", action="append", choices=UniqueIDVersion.values,
+                        help="only some of the variants (repeatable)")
+    parser.add_argument("--progress", action="store_true", help="print the throughput of every batch")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    call_command("migrate", verbosity=0, run_syncdb=True)
+    configure(args)
+    form = fixtures.build_form(1)
+
+    results = []
+    for version in args.version or UniqueIDVersion.values:
+        print(f"filling {args.rows} rows with {version} ids ...", file=sys.stderr)
+        results.append(run(form, version, args))
+    empty_table()
+
+    print(f"{'variant':<8} {'fill rows/s':>12} {'tail rows/s':>12} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for result in results:
+        print(
+            f"{result['name']:<8} {result['fill_throughput']:>12.0f} {result['tail_throughput']:>12.0f} "
+            + " ".join(f"{result[key] * 1000:>7.2f}ms" for key in ("insert_mean", "insert_p50", "insert_p95", "insert_p99"))
+        )
+    if args.output:
+        Path(args.output).write_text(json.dumps({"args": vars(args), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
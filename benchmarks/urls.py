@@ -0,0 +1,6 @@
+from django.urls import path, include
+
+
+urlpatterns = [
+    path('form-generator/', include(('django_form_generator.urls', 'django_form_generator'), namespace='django_form_generator')),
+]
@@ -1,8 +1,14 @@
 import uuid
-from django.http import JsonResponse
+from django.contrib import messages
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
 from django.contrib import admin
 from django.utils.text import slugify
+from django.db.models import Prefetch
 from django.urls import reverse
+from django.utils.html import format_html, format_html_join
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext as _
 from django.db.transaction import atomic
@@ -10,7 +16,14 @@ from django.db.transaction import atomic
 from django_form_generator import const
 from django_form_generator.common.admins import FormFilter, AdminMixin
 from django_form_generator.common.utils import FilterMixin
-from django_form_generator.forms import FieldForm, FormAdminForm, FormResponseFilterForm, ValidatorAdminForm
+from django_form_generator.common.aggregates import get_form_aggregates
+from django_form_generator.common.api_stats import summarize, window_start
+from django_form_generator.common.circuit_breaker import CircuitBreaker
+from django_form_generator.common import definitions, search
+from django_form_generator.exceptions import DefinitionError
+from django_form_generator.forms import (
+    DefinitionImportForm, FieldForm, FormAdminForm, FormResponseFilterForm, ValidatorAdminForm
+)
 from django_form_generator.models import (
     FieldCategory,
     Form,
@@ -22,6 +35,7 @@ from django_form_generator.models import (
     FormAPIThrough,
     FieldOptionThrough,
     FormAPIManager,
+    FormAPIManagerStat,
 )
 
 
@@ -67,8 +81,8 @@ class FormAPIThroughInlineAdmin(admin.TabularInline):
 
 
 @admin.register(Form)
-class FormAdmin(admin.ModelAdmin):
-    list_display = ['id', 'title', 'status', 'get_style', 'created_at', 'updated_at']
+class FormAdmin(AdminMixin, admin.ModelAdmin):
+    list_display = ['id', 'title', 'status', 'get_style', 'get_aggregates', 'created_at', 'updated_at']
     list_display_links = ['id', 'title']
     list_editable = ['status']
     list_filter = ['status', 'created_at']
@@ -77,7 +91,12 @@ class FormAdmin(admin.ModelAdmin):
     readonly_fields = ['id', 'created_at', 'updated_at']
     inlines = [FormFieldThroughInlineAdmin, FormAPIThroughInlineAdmin]
     form = FormAdminForm
-    actions = ("clone_action",)
+    actions = ("clone_action", "export_action")
+    change_list_template = "django_form_generator/admin/form_change_list.html"
+    extra_views = [
+        ('aggregates_view', '<int:form_id>/aggregates/', 'aggregates'),
+        ('import_view', 'import/', 'import'),
+    ]
 
     fieldsets = (
         (None, {
@@ -85,12 +104,16 @@ class FormAdmin(admin.ModelAdmin):
         }),
         ('Style', {
             'classes': ('wide',),
-            'fields': ('style', 'direction'),
+            'fields': ('style', 'direction', 'is_wizard'),
         }),
         ('Limitations', {
             'classes': ('wide',),
             'fields': ('limit_to', 'valid_from', 'valid_to', 'is_editable'),
         }),
+        ('Rate Limit', {
+            'classes': ('wide',),
+            'fields': ('rate_limit', 'rate_limit_period', 'rate_limit_by'),
+        }),
     )
 
     @admin.display(description="Style")
@@ -98,25 +121,75 @@ class FormAdmin(admin.ModelAdmin):
         if obj.style:
             return const.FormStyle(obj.style).label
 
+    @admin.display(description="Aggregates")
+    def get_aggregates(self, obj):
+        return format_html(
+            "<a href='{}'>{}</a>", reverse(self.build_admin_url('aggregates', True), args=(obj.pk,)), _('Aggregates')
+        )
+
+    def aggregates_view(self, request, form_id: int):
+        form = get_object_or_404(Form, pk=form_id)
+        if not self.has_view_permission(request, form):
+            raise PermissionDenied
+        context = self.extra_view_context(request)
+        context.update({
+            "title": _("Aggregates of %s") % form.title,
+            "object": form,
+            "aggregates": get_form_aggregates(form),
+        })
+        return TemplateResponse(request, "django_form_generator/admin/form_aggregates.html", context)
+
     @atomic
     def clone_action(self, request, queryset):
-        for obj in queryset:
-            f_through = obj.form_field_through.all().values('field_id', 'position', 'category_id', 'weight')
-            a_through = obj.form_apis.all().values('api_id', 'weight')
-            for field in obj._meta.local_fields:
-                if field.unique:
-                    if field.name in ("pk", "id"):
-                        setattr(obj, field.name, None)
-
-            setattr(obj, "slug", uuid.uuid4())
-            setattr(obj, 'title', obj.title + ' (Copy)')
-            setattr(obj, "status", const.FormStatus.DRAFT)
-            obj.save()
-
-            ff_through = [FormFieldThrough(form_id=obj.id, **obj_) for obj_ in f_through]
-            FormFieldThrough.objects.bulk_create(ff_through, ignore_conflicts=True)
-            fa_through = [FormAPIThrough(form_id=obj.id, **obj_) for obj_ in a_through]
-            FormAPIThrough.objects.bulk_create(fa_through)
+        forms = list(queryset.prefetch_related('form_field_through', 'form_apis'))
+        clones = {}
+        for obj in forms:
+            clone = Form(**{
+                field.attname: getattr(obj, field.attname)
+                for field in Form._meta.concrete_fields if not field.primary_key
+            })
+            clone.slug = str(uuid.uuid4())
+            clone.title = obj.title + ' (Copy)'
+            clone.status = const.FormStatus.DRAFT
+            clones[clone.slug] = (obj, clone)
+        Form.objects.bulk_create([clone for _, clone in clones.values()])
+        form_ids = dict(Form.objects.filter(slug__in=clones).values_list('slug', 'id'))
+
+        FormFieldThrough.objects.bulk_create([
+            FormFieldThrough(form_id=form_ids[slug], field_id=through.field_id, position=through.position,
+                             category_id=through.category_id, weight=through.weight)
+            for slug, (obj, _) in clones.items() for through in obj.form_field_through.all()
+        ], ignore_conflicts=True)
+        FormAPIThrough.objects.bulk_create([
+            FormAPIThrough(form_id=form_ids[slug], api_id=through.api_id, weight=through.weight)
+            for slug, (obj, _) in clones.items() for through in obj.form_apis.all()
+        ])
+
+    @admin.action(description=_("Export the definition of selected forms"))
+    def export_action(self, request, queryset):
+        response = HttpResponse(
+            definitions.dumps(definitions.export_definitions(queryset)), content_type='application/json'
+        )
+        response['Content-Disposition'] = 'attachment; filename="forms.json"'
+        return response
+
+    def import_view(self, request):
+        if not self.has_add_permission(request) or not self.has_change_permission(request):
+            raise PermissionDenied
+        form = DefinitionImportForm(request.POST or None, request.FILES or None)
+        if form.is_valid():
+            try:
+                counts = definitions.import_definitions(form.cleaned_data['definition'])
+            except DefinitionError as e:
+                form.add_error('file', str(e))
+            else:
+                self.message_user(request, _("Imported %s.") % ", ".join(
+                    f"{count} {section}" for section, count in counts.items()
+                ), messages.SUCCESS)
+                return redirect(self.build_admin_url('changelist', True))
+        context = self.extra_view_context(request)
+        context.update({"title": _("Import forms"), "form": form})
+        return TemplateResponse(request, "django_form_generator/admin/form_import.html", context)
 
 class FieldOptionThroughInlineAdmin(admin.TabularInline):
     model = FieldOptionThrough
@@ -147,7 +220,7 @@ class FieldAdmin(admin.ModelAdmin):
     prepopulated_fields = {'name': ('label',), }
     fieldsets = (
         (None, {
-            'fields': ('label', 'name', 'genre', 'is_required', 'placeholder', 'default', 'help_text', 'is_active', 'read_only', 'write_only', 'id', 'created_at', 'updated_at')
+            'fields': ('label', 'name', 'genre', 'is_required', 'placeholder', 'default', 'help_text', 'async_options', 'is_active', 'read_only', 'write_only', 'id', 'created_at', 'updated_at')
         }),
         ('Dpendency', {
             'classes': ('wide',),
@@ -167,7 +240,7 @@ class FormResponseAdmin(AdminMixin, admin.ModelAdmin):
     list_display_links = ["id", "get_form_title"]
     list_filter = [('data', FormResponseFilter)]
     search_fields = ['form__title', 'form__slug', 'unique_id']
-    search_help_text = 'Search on Form title & Form slug & unique_id'
+    search_help_text = 'Search on Form title & Form slug & unique_id & Response values'
     readonly_fields = ['id', 'unique_id', 'created_at', 'updated_at']
     extra_views = [
         ('fetch_options', 'options/<int:field_id>'),
@@ -179,6 +252,12 @@ class FormResponseAdmin(AdminMixin, admin.ModelAdmin):
     def get_form_title(self, obj):
         return obj.form.title
 
+    def get_search_results(self, request, queryset, search_term):
+        result, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            result = result | search.search(queryset, search_term)
+        return result, may_have_duplicates
+
     @admin.display(description="Response")
     def show_response(self, obj):
         return mark_safe(
@@ -199,13 +278,76 @@ class FormResponseAdmin(AdminMixin, admin.ModelAdmin):
         
 @admin.register(FormAPIManager)
 class FormAPIManagerAdmin(admin.ModelAdmin):
-    list_display = ["id", "title", "method", "execute_time", "is_active", "cache_by", "created_at", "updated_at"]
+    list_display = ["id", "title", "method", "execute_time", "is_active", "cache_by",
+                    "get_circuit_state", "get_calls", "get_error_rate", "get_p50", "get_p95", "get_p99",
+                    "created_at", "updated_at"]
     list_display_links = ["id", "title"]
     list_filter = ['is_active', 'created_at', 'execute_time', 'method']
     list_editable = ['is_active']
     search_fields = ['title', 'forms__title', 'forms__slug']
     search_help_text = 'Search on Title & Form title & Form slug'
-    readonly_fields = ['id', 'created_at', 'updated_at']
+    readonly_fields = ['id', 'created_at', 'updated_at', 'get_statistics']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(
+            Prefetch('stats', queryset=FormAPIManagerStat.objects.filter(bucket__gte=window_start()), to_attr='recent_stats')
+        )
+
+    def _get_summary(self, obj):
+        if not hasattr(obj, '_stats_summary'):
+            stats = getattr(obj, 'recent_stats', None)
+            if stats is None:
+                stats = obj.stats.filter(bucket__gte=window_start())
+            obj._stats_summary = summarize(stats)
+        return obj._stats_summary
+
+    @staticmethod
+    def _format_ms(value):
+        return '-' if value is None else f'{value:.0f} ms'
+
+    @admin.display(description="Circuit")
+    def get_circuit_state(self, obj):
+        return CircuitBreaker(obj).state
+
+    @admin.display(description="Calls")
+    def get_calls(self, obj):
+        return self._get_summary(obj)['count']
+
+    @admin.display(description="Error rate")
+    def get_error_rate(self, obj):
+        error_rate = self._get_summary(obj)['error_rate']
+        return '-' if error_rate is None else f'{error_rate:.1%}'
+
+    @admin.display(description="p50")
+    def get_p50(self, obj):
+        return self._format_ms(self._get_summary(obj)['p50'])
+
+    @admin.display(description="p95")
+    def get_p95(self, obj):
+        return self._format_ms(self._get_summary(obj)['p95'])
+
+    @admin.display(description="p99")
+    def get_p99(self, obj):
+        return self._format_ms(self._get_summary(obj)['p99'])
+
+    @admin.display(description="Statistics (last window)")
+    def get_statistics(self, obj):
+        if obj.pk is None:
+            return '-'
+        summary = self._get_summary(obj)
+        rows = [
+            (_('Calls'), summary['count']),
+            (_('Error rate'), self.get_error_rate(obj)),
+            (_('Average'), self._format_ms(summary['avg'])),
+            ('p50', self._format_ms(summary['p50'])),
+            ('p95', self._format_ms(summary['p95'])),
+            ('p99', self._format_ms(summary['p99'])),
+            (_('Max'), self._format_ms(summary['max'])),
+            (_('Average payload size'), '-' if summary['avg_payload_size'] is None else f"{summary['avg_payload_size']:.0f} bytes"),
+            (_('Outcomes'), ', '.join(f'{k}: {v}' for k, v in summary['outcomes'].items())),
+            (_('Status codes'), ', '.join(f'{k}: {v}' for k, v in sorted(summary['status_codes'].items())) or '-'),
+        ]
+        return format_html('<table>{}</table>', format_html_join('', '<tr><th>{}</th><td>{}</td></tr>', rows))
 
 
 @admin.register(FieldCategory)
@@ -0,0 +1,19 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from django_form_generator.common import fast_json
+
+
+class FastJSONParser(JSONParser):
+    """`JSONParser` with `common.fast_json`."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if not fast_json.is_enabled() or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return fast_json.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,22 @@
+from rest_framework.renderers import JSONRenderer
+
+from django_form_generator.common import fast_json
+
+
+class FastJSONRenderer(JSONRenderer):
+    """`JSONRenderer` with `common.fast_json`, the types `orjson` doesn't know (decimals, lazy strings, ...)
+    & the datetimes are encoded by the `encoder_class` like by `JSONRenderer`.
+
+    The indented, non-compact & ascii-only renderings are left to `JSONRenderer`.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if indent is not None or not self.compact or self.ensure_ascii or not fast_json.is_enabled():
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = fast_json.dumpb(data, default=self.encoder_class().default, passthrough_datetime=True)
+        # like `JSONRenderer`: \u2028 and \u2029 are escaped to output a strict javascript subset
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
@@ -1,8 +1,11 @@
 from django.core.validators import FileExtensionValidator
 from django.utils.translation import gettext as _
 from rest_framework import serializers
+from django_form_generator import const
+from django_form_generator.common import field_plan, genres
 from django_form_generator.common.utils import FileSizeValidator
-from django_form_generator.models import Form, Option, Field
+from django_form_generator.common.metrics import measure
+from django_form_generator.models import CHANGED_FIELDS_KEY, Form, Option, Field
 from django_form_generator.settings import form_generator_settings as fg_settings
 from drf_recaptcha.fields import ReCaptchaV3Field
 
@@ -12,6 +15,48 @@ class CustomMultipleChoiceField(serializers.MultipleChoiceField):
         return list(super().to_internal_value(data))
 
 
+class OptionChoiceField(serializers.ChoiceField):
+    """Option of a field with `async_options`, the submitted id is checked with `lookup(values) -> valid ids`
+    (an indexed query) instead of a list of every option."""
+
+    def __init__(self, lookup, **kwargs):
+        self.lookup = lookup
+        super().__init__(choices=(), **kwargs)
+
+    def to_internal_value(self, data):
+        if data == '' and self.allow_blank:
+            return ''
+        if str(data).isdigit() and int(data) in self.lookup([data]):
+            return int(data)
+        self.fail('invalid_choice', input=data)
+
+
+class OptionMultipleChoiceField(CustomMultipleChoiceField):
+    """`OptionChoiceField` for multi checkbox fields, all the ids are checked with one query."""
+
+    def __init__(self, lookup, **kwargs):
+        self.lookup = lookup
+        super().__init__(choices=(), **kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        valid_ids = self.lookup(data)
+        for item in data:
+            if not str(item).isdigit() or int(item) not in valid_ids:
+                self.fail('invalid_choice', input=item)
+        return list({int(item) for item in data})
+
+
+class OptionSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Option
+        fields = ['id', 'name']
+
+
 class FormSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -19,6 +64,13 @@ class FormSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'slug', 'status']
 
 
+class FormResponseListSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = fg_settings.FORM_GENERATOR_RESPONSE_MODEL
+        fields = ['id', 'unique_id', 'user_ip', 'created_at', 'updated_at', 'data']
+
+
 class FormFullSerializer(serializers.ModelSerializer):
     form_fields = serializers.SerializerMethodField()
     
@@ -34,15 +86,19 @@ class BaseFormSerializer(serializers.Serializer):
 
     def __init__(self, instance=None, data=None, **kwargs):
         super().__init__(instance, data, **kwargs)
-        self._initial_fields()
+        self._measured_initial_fields()
 
+    def _measured_initial_fields(self):
+        with measure("initial_fields", sender=self.__class__, form=getattr(self.form, "pk", None)):
+            self._initial_fields()
 
     def _initial_fields(self):
         if self.form:
+            builders = genres.get_builders(type(self), "serializer_field")
             for field in self.form.get_fields():
-                method = f"prepare_{field.genre}"
-                if hasattr(self, method):
-                    self.fields[field.name] = getattr(self, method)(field)
+                prepare = builders.get(field.genre)
+                if prepare is not None:
+                    self.fields[field.name] = prepare(self, field)
                 self._handel_required_fields(field, self.fields[field.name])
 
     def _handel_required_fields(self, field: Field, form_field):
@@ -98,16 +154,22 @@ class BaseFormSerializer(serializers.Serializer):
         return serializers.BooleanField(**field_attrs)
 
     def prepare_dropdown(self, field: Field):
+        if field.async_options:
+            return OptionChoiceField(field.filter_choice_ids, **field.build_serializer_attrs())
         choices = field.get_choices().values_list("id", "name")
         field_attrs: dict = field.build_serializer_attrs()
         return serializers.ChoiceField(choices=choices, **field_attrs)
 
     def prepare_multi_checkbox(self, field: Field):
+        if field.async_options:
+            return OptionMultipleChoiceField(field.filter_choice_ids, **field.build_serializer_attrs())
         choices = field.get_choices().values_list("id", "name")
         field_attrs: dict = field.build_serializer_attrs()
         return CustomMultipleChoiceField(choices=choices, **field_attrs)
 
     def prepare_radio(self, field: Field):
+        if field.async_options:
+            return OptionChoiceField(field.filter_choice_ids, **field.build_serializer_attrs())
         choices = field.get_choices().values_list("id", "name")
         field_attrs: dict = field.build_serializer_attrs()
         return serializers.ChoiceField(choices=choices, **field_attrs)
@@ -144,12 +206,16 @@ class FormGeneratorSerializer(BaseFormSerializer):
         self.form = self.context.get('form')
         self.request = self.context.get('request')
         self.user_ip = self.context.get('user_ip')
-        self._initial_fields()
+        self._measured_initial_fields()
 
 
-    def save(self):
+    def get_response_data(self):
         form_data = self.validated_data
         form_data.setdefault("request", self.request)
+        return form_data
+
+    def save(self):
+        form_data = self.get_response_data()
         save_module = fg_settings.FORM_RESPONSE_SAVE  
         save_module(self.form, form_data, self.user_ip)# type: ignore
 
@@ -159,7 +225,7 @@ class FormGeneratorResponseSerializer(BaseFormSerializer):
         self.form = self.context['form']
         self.request = self.context['request']
         self.form_response = self.context['form_response']
-        self._initial_fields()
+        self._measured_initial_fields()
 
     @property
     def output_data(self):
@@ -173,11 +239,12 @@ class FormGeneratorResponseSerializer(BaseFormSerializer):
 
     def _initial_fields(self):
         form_response_data = self.form_response.get_data()
+        builders = genres.get_builders(type(self), "serializer_field")
         for i, field in enumerate(self.form.get_fields()):
             field_name = field.name
-            method = f"prepare_{field.genre}"
-            if hasattr(self, method):
-                self.fields[field_name] = getattr(self, method)(field)
+            prepare = builders.get(field.genre)
+            if prepare is not None:
+                self.fields[field_name] = prepare(self, field)
                 if not self.form.is_editable:
                     self.fields[field_name].read_only = True
                 try:
@@ -195,12 +262,36 @@ class FormGeneratorResponseSerializer(BaseFormSerializer):
                 
                 self._handel_required_fields(field, self.fields[field.name])
 
-    def save(self, **kwargs):
-        save_module = fg_settings.FORM_RESPONSE_SAVE
+    def get_changed_fields(self, stored: dict) -> list:
+        """Names of the submitted fields whose stored value changes, the submitted values (dates, numbers, ...)
+        are encoded by the codecs of their genres to be compared with the stored values."""
+        plan = {field.name: field for field in field_plan.get_field_plan(self.form)}
+        changed_fields = []
+        for name, value in self.validated_data.items():
+            field = plan.get(name)
+            if field is None:
+                changed = value != stored.get(name)
+            elif field.genre == const.FieldGenre.UPLOAD_FILE:
+                # a file is encoded by uploading it, a submitted file is a new one
+                changed = value is not None
+            else:
+                changed = field.evaluate(value) != stored.get(name)
+            if changed:
+                changed_fields.append(name)
+        return changed_fields
+
+    def get_response_data(self):
         form_data = self.form_response.pure_data
+        changed_fields = self.get_changed_fields(form_data)
         for changed_data in self.validated_data.keys():
             form_data[changed_data] = self.validated_data[changed_data]
 
         form_data.setdefault("request", self.request)
+        form_data[CHANGED_FIELDS_KEY] = changed_fields
+        return form_data
+
+    def save(self, **kwargs):
+        save_module = fg_settings.FORM_RESPONSE_SAVE
+        form_data = self.get_response_data()
         return save_module(self.form, form_data, update_form_response_id=self.form_response.id)# type: ignore
 
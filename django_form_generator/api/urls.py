@@ -1,11 +1,23 @@
 from django.urls import path
 from rest_framework.urlpatterns import format_suffix_patterns
 from django_form_generator.api import views
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+if fg_settings.ASYNC_VIEWS:
+    form_generator_view = views.AsyncFormGeneratorAPIView
+    form_response_view = views.AsyncFormGeneratorResponseAPIView
+else:
+    form_generator_view = views.FormGeneratorAPIView
+    form_response_view = views.FormGeneratorResponseAPIView
 
 urlpatterns = [
     path('forms/', views.FormAPIView.as_view(), name="api_forms"),
-    path('forms/<int:pk>/', views.FormGeneratorAPIView.as_view(), name="api_form_detail"),
-    path('form-response/<uuid:unique_id>/', views.FormGeneratorResponseAPIView.as_view(), name="api_form_response"),
+    path('forms/<int:pk>/', form_generator_view.as_view(), name="api_form_detail"),
+    path('forms/<int:pk>/schema/', views.FormSchemaAPIView.as_view(), name="api_form_schema"),
+    path('forms/<int:pk>/aggregates/', views.FormAggregateAPIView.as_view(), name="api_form_aggregates"),
+    path('forms/<int:pk>/responses/', views.FormResponseListAPIView.as_view(), name="api_form_responses"),
+    path('fields/<int:pk>/options/', views.FieldOptionAPIView.as_view(), name="api_field_options"),
+    path('form-response/<uuid:unique_id>/', form_response_view.as_view(), name="api_form_response"),
 ]
 
 urlpatterns=format_suffix_patterns(urlpatterns)
\ No newline at end of file
@@ -1,10 +1,21 @@
+from asgiref.sync import sync_to_async
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.permissions import IsAdminUser
+from rest_framework.utils.urls import replace_query_param
+from django.utils.http import parse_etags, quote_etag
 
-from django_form_generator.common.utils import get_client_ip
-from django_form_generator.common.views import BaseAPIView
-from django_form_generator.api.serializers import FormGeneratorResponseSerializer, FormGeneratorSerializer, FormSerializer, FormFullSerializer
-from django_form_generator.models import Form
+from django_form_generator.common import schema, search
+from django_form_generator.common.aggregates import get_form_aggregates
+from django_form_generator.common.utils import can_preview, get_client_ip
+from django_form_generator.common.views import AsyncAPIViewMixin, BaseAPIView, IdempotentAPIViewMixin, RateLimitAPIViewMixin
+from django_form_generator.api.serializers import (
+    FormGeneratorResponseSerializer, FormGeneratorSerializer, FormSerializer, FormFullSerializer, FormResponseListSerializer,
+    OptionSerializer,
+)
+from django_form_generator.exceptions import FormAPIError
+from django_form_generator.models import Field, Form
 from django_form_generator.settings import form_generator_settings as fg_settings
 
 
@@ -21,7 +32,7 @@ class FormAPIView(BaseAPIView):
         return Response(serializer.data)
 
 
-class FormGeneratorAPIView(BaseAPIView):
+class FormGeneratorAPIView(IdempotentAPIViewMixin, RateLimitAPIViewMixin, BaseAPIView):
     serializer_class = FormGeneratorSerializer
     queryset = Form.objects.filter_valid()
     model = Form
@@ -37,16 +48,126 @@ class FormGeneratorAPIView(BaseAPIView):
         return Response(serializer.data)
 
     def post(self, request, *args, **kwargs):
+        return self.idempotent(request, lambda: self.submit(request, kwargs['pk']))
+
+    def submit(self, request, pk):
         serializer_class = self.get_serializer_class(request)
-        instance = self.get_object(kwargs['pk'])
+        instance = self.get_object(pk)
+        self.check_rate_limit(instance)
         serializer = serializer_class(data=request.data, context={'request': request, 'form': instance, 'user_ip': get_client_ip(request)})
         if serializer.is_valid():
-            serializer.save()
+            try:
+                serializer.save()
+            except FormAPIError as e:
+                return Response({'detail': e.message}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class FormGeneratorResponseAPIView(BaseAPIView):
+class FormSchemaAPIView(BaseAPIView):
+    """JSON Schema of a form (see `common.schema`), clients revalidate it with its ETag."""
+    queryset = Form.objects.filter_valid()
+    model = Form
+    lookup_field = 'pk'
+
+    def get(self, request, pk, format=None):
+        instance = self.get_object(pk)
+        etag = quote_etag(schema.get_version(instance))
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if_none_match = [tag.removeprefix('W/') for tag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))]
+        if etag in if_none_match or '*' in if_none_match:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        _, form_schema = schema.get_schema(instance)
+        return Response(form_schema, headers=headers)
+
+
+class FormAggregateAPIView(BaseAPIView):
+    """Per field aggregates of the responses of a form."""
+    permission_classes = [IsAdminUser]
+    queryset = Form.objects.all()
+    model = Form
+    lookup_field = 'pk'
+
+    def get(self, request, pk, format=None):
+        instance = self.get_object(pk)
+        return Response(get_form_aggregates(instance))
+
+
+class FormResponsePagination(LimitOffsetPagination):
+    default_limit = 50
+    max_limit = 500
+
+
+class FormResponseListAPIView(BaseAPIView):
+    """Responses of a form, `?search=` filters on the text values (see `common.search`)."""
+    permission_classes = [IsAdminUser]
+    serializer_class = FormResponseListSerializer
+    queryset = fg_settings.FORM_GENERATOR_RESPONSE_MODEL.objects.all() #type: ignore
+    model = fg_settings.FORM_GENERATOR_RESPONSE_MODEL
+
+    def get(self, request, pk, format=None):
+        queryset = self.get_queryset(request).filter(form_id=pk).order_by('-created_at', '-id')
+        search_term = request.query_params.get('search', '').strip()
+        if search_term:
+            queryset = search.search(queryset, search_term)
+        paginator = FormResponsePagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer_class(request)(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class OptionPagination(LimitOffsetPagination):
+    """Limit/offset pages without a count, the next page is found by fetching one more option."""
+
+    def __init__(self):
+        self.default_limit = fg_settings.OPTIONS_PAGE_SIZE
+        self.max_limit = fg_settings.OPTIONS_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        results = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(results) > self.limit
+        return results[:self.limit]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = replace_query_param(self.request.build_absolute_uri(), self.limit_query_param, self.limit)
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'previous': self.get_previous_link(), 'results': data})
+
+
+class FieldOptionAPIView(BaseAPIView):
+    """Options of a field with `async_options`, `?search=` filters on the start of their names.
+
+    Only the fields of valid forms, except for staff members & superusers (who can preview the other forms).
+    """
+    serializer_class = OptionSerializer
+    queryset = Field.objects.filter(is_active=True, async_options=True)
+    model = Field
+    lookup_field = 'pk'
+
+    def get_queryset(self, request=None):
+        queryset = super().get_queryset(request)
+        if can_preview(self.request.user):
+            return queryset
+        return queryset.filter_in_valid_forms()
+
+    def get(self, request, pk, format=None):
+        field = self.get_object(pk)
+        paginator = OptionPagination()
+        page = paginator.paginate_queryset(
+            field.search_choices(request.query_params.get('search', '').strip()), request, view=self
+        )
+        serializer = self.get_serializer_class(request)(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class FormGeneratorResponseAPIView(IdempotentAPIViewMixin, RateLimitAPIViewMixin, BaseAPIView):
     serializer_class = FormGeneratorResponseSerializer
     queryset = fg_settings.FORM_GENERATOR_RESPONSE_MODEL.objects.all() #type: ignore
     model = fg_settings.FORM_GENERATOR_RESPONSE_MODEL
@@ -62,11 +183,78 @@ class FormGeneratorResponseAPIView(BaseAPIView):
         return Response(serializer.output_data)
 
     def patch(self, request, unique_id, format=None):
+        return self.idempotent(request, lambda: self.submit(request, unique_id))
+
+    def submit(self, request, unique_id):
         serializer_class = self.get_serializer_class(request)
         instance = self.get_object(unique_id)
+        self.check_rate_limit(instance.form)
         serializer = serializer_class(instance.pure_data, data=request.data, partial=True, 
                 context={'request': request, 'form': instance.form, 'form_response': instance})
         if serializer.is_valid():
-            serializer.save()
+            try:
+                serializer.save()
+            except FormAPIError as e:
+                return Response({'detail': e.message}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncFormGeneratorAPIView(AsyncAPIViewMixin, FormGeneratorAPIView):
+    """`FormGeneratorAPIView` for ASGI, the apis are called concurrently with a non-blocking http client."""
+
+    async def get(self, request, pk, format=None):
+        instance = await self.aget_object(pk)
+        await instance.acall_pre_apis({"request": request})
+        serializer = FormFullSerializer(instance=instance)
+        return Response(await sync_to_async(lambda: serializer.data)())
+
+    async def post(self, request, *args, **kwargs):
+        return await self.aidempotent(request, lambda: self.asubmit(request, kwargs['pk']))
+
+    async def asubmit(self, request, pk):
+        serializer_class = self.get_serializer_class(request)
+        instance = await self.aget_object(pk)
+        await self.acheck_rate_limit(instance)
+        serializer = await sync_to_async(serializer_class)(data=request.data, context={'request': request, 'form': instance, 'user_ip': get_client_ip(request)})
+        if not await sync_to_async(serializer.is_valid)():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            await instance.aprefetch_apis(await sync_to_async(serializer.get_response_data)())
+            await sync_to_async(serializer.save)()
+        except FormAPIError as e:
+            return Response({'detail': e.message}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response(await sync_to_async(lambda: serializer.data)(), status=status.HTTP_201_CREATED)
+
+
+class AsyncFormGeneratorResponseAPIView(AsyncAPIViewMixin, FormGeneratorResponseAPIView):
+    """`FormGeneratorResponseAPIView` for ASGI, see `AsyncFormGeneratorAPIView`."""
+
+    def get_queryset(self, request=None):
+        return super().get_queryset(request).select_related('form')
+
+    async def get(self, request, unique_id, format=None):
+        serializer_class = self.get_serializer_class(request)
+        instance = await self.aget_object(unique_id)
+        serializer = await sync_to_async(serializer_class)(instance, context={'request': request, 'form': instance.form, 'form_response': instance})
+        return Response(await sync_to_async(lambda: serializer.output_data)())
+
+    async def patch(self, request, unique_id, format=None):
+        return await self.aidempotent(request, lambda: self.asubmit(request, unique_id))
+
+    async def asubmit(self, request, unique_id):
+        serializer_class = self.get_serializer_class(request)
+        instance = await self.aget_object(unique_id)
+        await self.acheck_rate_limit(instance.form)
+        serializer = await sync_to_async(
+            lambda: serializer_class(instance.pure_data, data=request.data, partial=True,
+                                     context={'request': request, 'form': instance.form, 'form_response': instance})
+        )()
+        if not await sync_to_async(serializer.is_valid)():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            await instance.form.aprefetch_apis(await sync_to_async(serializer.get_response_data)())
+            await sync_to_async(serializer.save)()
+        except FormAPIError as e:
+            return Response({'detail': e.message}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response(await sync_to_async(lambda: serializer.data)())
@@ -5,3 +5,31 @@ class DjangoFormGeneratorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'django_form_generator'
     verbose_name = 'Django Form Generator'
+
+    def ready(self):
+        from django_form_generator.settings import form_generator_settings as fg_settings
+        from django_form_generator.common.genres import register_genre
+
+        for codec in fg_settings.FIELD_GENRES:
+            register_genre(codec)
+
+        if fg_settings.METRICS_ENABLED:
+            from django_form_generator.common.metrics import get_collector
+            from django_form_generator.signals import operation_measured
+
+            operation_measured.connect(get_collector(), weak=False, dispatch_uid="django_form_generator_metrics")
+
+        from django.db.models.signals import m2m_changed, post_delete, post_save
+        from django_form_generator.common import schema
+
+        # the versions of the schemas & of the field plans (`common.field_plan`) of the forms
+        for name in (
+            "Form", "Field", "FieldValidator", "Option", "FieldCategory", "FormFieldThrough", "FieldOptionThrough"
+        ):
+            model = self.get_model(name)
+            dispatch_uid = f"django_form_generator_schema_{name}"
+            post_save.connect(schema.invalidate, sender=model, dispatch_uid=dispatch_uid)
+            post_delete.connect(schema.invalidate, sender=model, dispatch_uid=dispatch_uid)
+            if name.endswith("Through"):
+                # `form.fields.add(...)` & `field.options.set(...)`
+                m2m_changed.connect(schema.invalidate, sender=model, dispatch_uid=dispatch_uid)
@@ -34,13 +34,14 @@ class AdminMixin:
         return base_context
 
     def get_urls(self):
-        urls = super().get_urls()
+        urls = []
         extra_views = list(map(lambda x: (x[0], x[1], x[2]) if len(x) == 3 else (x[0], x[1], x[0]), self.get_extra_views()))
         for view, url, name in extra_views:
             urls += [
                 path(url, self.admin_site.admin_view(getattr(self, view)), name=self.build_admin_url(name))
             ]
-        return urls
+        # before the default urls, `<path:object_id>/` would catch them otherwise
+        return urls + super().get_urls()
 
 
 class FormFilter(admin.FieldListFilter):
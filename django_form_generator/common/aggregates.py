@@ -0,0 +1,341 @@
+from collections import Counter, defaultdict
+from datetime import date, datetime
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Q, Value, When
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils.module_loading import import_string
+
+from django_form_generator.const import FieldGenre
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+INF = "inf"
+OPTION_GENRES = (FieldGenre.DROPDOWN, FieldGenre.RADIO)
+DATE_GENRES = (FieldGenre.DATE, FieldGenre.DATETIME)
+
+
+def _models():
+    return (
+        import_string("django_form_generator.models.Field"),
+        import_string("django_form_generator.models.FieldAggregate"),
+        import_string("django_form_generator.models.FieldOptionTally"),
+        import_string("django_form_generator.models.FieldDateTally"),
+        import_string("django_form_generator.models.FieldNumberTally"),
+    )
+
+
+def is_filled(value) -> bool:
+    if value is None or value is False:
+        return False
+    if isinstance(value, (str, list, dict)):
+        return bool(value) and value != 'None'
+    return True
+
+
+def _to_date(value) -> date | None:
+    try:
+        return datetime.fromisoformat(str(value)).date()
+    except ValueError:
+        return None
+
+
+def histogram_bucket(value) -> str:
+    return next((str(bound) for bound in fg_settings.AGGREGATE_NUMBER_BUCKETS if value <= bound), INF)
+
+
+class AggregateDelta:
+    """Changes to the aggregates of a form caused by adding (`sign=1`) or removing (`sign=-1`) response data."""
+
+    def __init__(self):
+        self.responses = defaultdict(int)  # field_id -> delta
+        self.filled = defaultdict(int)  # field_id -> delta
+        self.numbers = defaultdict(Counter)  # field_id -> {value: delta}
+        self.options = defaultdict(int)  # (field_id, option_id) -> delta
+        self.dates = defaultdict(int)  # (field_id, date) -> delta
+
+    def add(self, data: list | None, sign: int = 1):
+        for item in data or []:
+            field_id, genre, value = item["id"], item["genre"], item["value"]
+            self.responses[field_id] += sign
+            if not is_filled(value):
+                continue
+            self.filled[field_id] += sign
+            if genre == FieldGenre.NUMBER:
+                self.numbers[field_id][value] += sign
+            elif genre in OPTION_GENRES:
+                self.options[(field_id, int(value))] += sign
+            elif genre == FieldGenre.MULTI_CHECKBOX:
+                for option_id in value:
+                    self.options[(field_id, int(option_id))] += sign
+            elif genre in DATE_GENRES:
+                day = _to_date(value)
+                if day is not None:
+                    self.dates[(field_id, day)] += sign
+        return self
+
+    @staticmethod
+    def _changed(deltas: dict) -> dict:
+        return {key: delta for key, delta in deltas.items() if delta}
+
+    def field_ids(self) -> set:
+        return set(self.responses) | set(self.filled) | set(self.numbers)
+
+    def changed_numbers(self) -> dict:
+        numbers = {}
+        for field_id, values in self.numbers.items():
+            values = self._changed(values)
+            if values:
+                numbers[field_id] = values
+        return numbers
+
+
+def _refresh_extremes(form_id: int, aggregates: list):
+    """min & max can't be decremented: read them again from the responses, in a single pass for the stale
+    aggregates of a form (after an extreme was removed, when they're read)."""
+    FieldAggregate = _models()[1]
+    stale = [aggregate.pk for aggregate in aggregates if aggregate.extremes_stale]
+    if not stale:
+        return
+    with transaction.atomic():
+        # the new values are applied after the scan, with the values of the responses it didn't read
+        stale = {
+            aggregate.field_id: aggregate
+            for aggregate in FieldAggregate.objects.select_for_update().filter(pk__in=stale, extremes_stale=True)
+        }
+        for aggregate in stale.values():
+            aggregate.value_min = aggregate.value_max = None
+        response_model = fg_settings.FORM_GENERATOR_RESPONSE_MODEL
+        for data in response_model.objects.filter(form_id=form_id).values_list("data", flat=True).iterator():
+            for item in data or []:
+                aggregate = stale.get(item["id"])
+                if aggregate is None or item["genre"] != FieldGenre.NUMBER or not is_filled(item["value"]):
+                    continue
+                value = float(item["value"])
+                aggregate.value_min = value if aggregate.value_min is None else min(aggregate.value_min, value)
+                aggregate.value_max = value if aggregate.value_max is None else max(aggregate.value_max, value)
+        for aggregate in stale.values():
+            aggregate.extremes_stale = False
+        FieldAggregate.objects.bulk_update(stale.values(), ["value_min", "value_max", "extremes_stale"])
+    for aggregate in aggregates:
+        fresh = stale.get(aggregate.field_id)
+        if fresh is not None:
+            aggregate.value_min, aggregate.value_max, aggregate.extremes_stale = fresh.value_min, fresh.value_max, False
+
+
+def _add(attr: str, delta: int):
+    """`attr + delta` that never goes below zero (responses saved before the aggregates existed can be updated)."""
+    return Greatest(models.F(attr) + delta, 0)
+
+
+def _increment(model, lookup: dict, delta: int):
+    updated = model.objects.filter(**lookup).update(count=_add("count", delta))
+    if updated or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(count=delta, **lookup)
+    except IntegrityError:
+        # created by a concurrent save in the meantime
+        model.objects.filter(**lookup).update(count=_add("count", delta))
+
+
+def _number_updates(values: dict) -> dict:
+    """Updates of a FieldAggregate for `{value: count}`, atomic expressions instead of a locked read & write."""
+    updates = {
+        "value_count": _add("value_count", sum(values.values())),
+        "value_sum": models.F("value_sum") + sum(value * count for value, count in values.items()),
+    }
+    added = [value for value, count in values.items() if count > 0]
+    if added:
+        low, high = Value(float(min(added))), Value(float(max(added)))
+        updates["value_min"] = Least(Coalesce("value_min", low), low)
+        updates["value_max"] = Greatest(Coalesce("value_max", high), high)
+    removed = [value for value, count in values.items() if count < 0]
+    if removed:
+        # an extreme may be gone (the columns are compared with their values before the update)
+        updates["extremes_stale"] = Case(
+            When(Q(value_min__gte=min(removed)) | Q(value_max__lte=max(removed)), then=Value(True)),
+            default=models.F("extremes_stale"),
+        )
+    return updates
+
+
+def _buckets(values: dict) -> Counter:
+    buckets = Counter()
+    for value, count in values.items():
+        buckets[histogram_bucket(value)] += count
+    return buckets
+
+
+@transaction.atomic
+def apply_delta(form_id: int, delta: AggregateDelta):
+    """Add a delta to the aggregates of a form, with single statement updates (no row is locked to be read)."""
+    Field, FieldAggregate, FieldOptionTally, FieldDateTally, FieldNumberTally = _models()
+
+    field_ids = delta.field_ids()
+    field_ids &= set(Field.objects.filter(id__in=field_ids).values_list("id", flat=True))
+    existing = set(
+        FieldAggregate.objects.filter(form_id=form_id, field_id__in=field_ids).values_list("field_id", flat=True)
+    )
+    FieldAggregate.objects.bulk_create(
+        [FieldAggregate(form_id=form_id, field_id=field_id) for field_id in field_ids - existing],
+        ignore_conflicts=True,
+    )
+
+    for attr, deltas in (("response_count", delta.responses), ("filled_count", delta.filled)):
+        fields_by_delta = defaultdict(list)
+        for field_id, change in delta._changed(deltas).items():
+            if field_id in field_ids:
+                fields_by_delta[change].append(field_id)
+        for change, ids in fields_by_delta.items():
+            FieldAggregate.objects.filter(form_id=form_id, field_id__in=ids).update(**{attr: _add(attr, change)})
+
+    for field_id, values in delta.changed_numbers().items():
+        if field_id not in field_ids:
+            continue
+        FieldAggregate.objects.filter(form_id=form_id, field_id=field_id).update(**_number_updates(values))
+        for bucket, change in delta._changed(_buckets(values)).items():
+            _increment(FieldNumberTally, {"form_id": form_id, "field_id": field_id, "bucket": bucket}, change)
+
+    for (field_id, option_id), change in delta._changed(delta.options).items():
+        if field_id in field_ids:
+            _increment(FieldOptionTally, {"form_id": form_id, "field_id": field_id, "option_id": option_id}, change)
+    for (field_id, day), change in delta._changed(delta.dates).items():
+        if field_id in field_ids:
+            _increment(FieldDateTally, {"form_id": form_id, "field_id": field_id, "date": day}, change)
+
+
+def apply_deltas(deltas: dict, using=None):
+    """Apply `{form_id: delta}` once the current transaction is committed, in their own transaction: the rows of
+    the aggregates are only locked for their updates (not while the responses are saved)."""
+    if deltas:
+        transaction.on_commit(lambda: [apply_delta(form_id, delta) for form_id, delta in deltas.items()], using=using)
+
+
+def record_response(form_id: int, data: list | None, old_data: list | None = None):
+    """Update the aggregates of a form after a response was created (or updated from `old_data`)."""
+    delta = AggregateDelta().add(data)
+    if old_data is not None:
+        delta.add(old_data, -1)
+    apply_deltas({form_id: delta})
+
+
+def removal_deltas(responses) -> dict:
+    """`{form_id: delta}` that removes `(form_id, data)` of some responses from the aggregates of their forms."""
+    deltas = defaultdict(AggregateDelta)
+    for form_id, data in responses:
+        deltas[form_id].add(data, -1)
+    return dict(deltas)
+
+
+@transaction.atomic
+def rebuild(form_id: int, chunk_size: int = 2000) -> int:
+    """Recalculate the aggregates of a form from all of its responses, return the number of responses."""
+    Field, FieldAggregate, FieldOptionTally, FieldDateTally, FieldNumberTally = _models()
+    response_model = fg_settings.FORM_GENERATOR_RESPONSE_MODEL
+    Option = import_string("django_form_generator.models.Option")
+
+    delta = AggregateDelta()
+    count = 0
+    for data in response_model.objects.filter(form_id=form_id).values_list("data", flat=True).iterator(chunk_size):
+        delta.add(data)
+        count += 1
+
+    for model in (FieldAggregate, FieldOptionTally, FieldDateTally, FieldNumberTally):
+        model.objects.filter(form_id=form_id).delete()
+
+    field_ids = set(Field.objects.filter(id__in=delta.field_ids()).values_list("id", flat=True))
+    numbers = delta.changed_numbers()
+    aggregates = []
+    for field_id in field_ids:
+        values = {value: count for value, count in numbers.get(field_id, {}).items() if count > 0}
+        aggregates.append(FieldAggregate(
+            form_id=form_id,
+            field_id=field_id,
+            response_count=delta.responses[field_id],
+            filled_count=delta.filled[field_id],
+            value_count=sum(values.values()),
+            value_sum=sum(value * count for value, count in values.items()),
+            value_min=min(values, default=None),
+            value_max=max(values, default=None),
+        ))
+    FieldAggregate.objects.bulk_create(aggregates, batch_size=500)
+    FieldNumberTally.objects.bulk_create(
+        [
+            FieldNumberTally(form_id=form_id, field_id=field_id, bucket=bucket, count=change)
+            for field_id, values in numbers.items()
+            if field_id in field_ids
+            for bucket, change in delta._changed(_buckets(values)).items()
+            if change > 0
+        ],
+        batch_size=500,
+    )
+
+    option_ids = set(Option.objects.filter(
+        id__in={option_id for _, option_id in delta.options}
+    ).values_list("id", flat=True))
+    FieldOptionTally.objects.bulk_create(
+        [
+            FieldOptionTally(form_id=form_id, field_id=field_id, option_id=option_id, count=change)
+            for (field_id, option_id), change in delta._changed(delta.options).items()
+            if field_id in field_ids and option_id in option_ids
+        ],
+        batch_size=500,
+    )
+    FieldDateTally.objects.bulk_create(
+        [
+            FieldDateTally(form_id=form_id, field_id=field_id, date=day, count=change)
+            for (field_id, day), change in delta._changed(delta.dates).items()
+            if field_id in field_ids
+        ],
+        batch_size=500,
+    )
+    return count
+
+
+def get_form_aggregates(form) -> list[dict]:
+    """Aggregates of every active field of a form, reads O(fields) rows instead of every response."""
+    Field, FieldAggregate, FieldOptionTally, FieldDateTally, FieldNumberTally = _models()
+
+    aggregates = {aggregate.field_id: aggregate for aggregate in FieldAggregate.objects.filter(form=form)}
+    _refresh_extremes(form.pk, list(aggregates.values()))
+    bucket_order = {str(bound): index for index, bound in enumerate(fg_settings.AGGREGATE_NUMBER_BUCKETS)}
+    histograms = defaultdict(dict)
+    tallies = FieldNumberTally.objects.filter(form=form, count__gt=0)
+    for tally in sorted(tallies, key=lambda tally: bucket_order.get(tally.bucket, len(bucket_order))):
+        histograms[tally.field_id][tally.bucket] = tally.count
+    options = defaultdict(list)
+    for tally in FieldOptionTally.objects.filter(form=form, count__gt=0).select_related("option").order_by("-count", "option_id"):
+        options[tally.field_id].append({"id": tally.option_id, "name": tally.option.name, "count": tally.count})
+    dates = defaultdict(list)
+    for tally in FieldDateTally.objects.filter(form=form, count__gt=0).order_by("date"):
+        dates[tally.field_id].append({"date": tally.date, "count": tally.count})
+
+    result = []
+    for field in form.get_fields():
+        aggregate = aggregates.get(field.id) or FieldAggregate(form=form, field=field)
+        item = {
+            "id": field.id,
+            "name": field.name,
+            "label": field.label,
+            "genre": field.genre,
+            "responses": aggregate.response_count,
+            "filled": aggregate.filled_count,
+            "fill_rate": aggregate.fill_rate,
+        }
+        if field.genre == FieldGenre.NUMBER:
+            item["number"] = {
+                "count": aggregate.value_count,
+                "sum": aggregate.value_sum,
+                "avg": aggregate.value_avg,
+                "min": aggregate.value_min,
+                "max": aggregate.value_max,
+                "histogram": histograms[field.id],
+            }
+        elif field.genre in FieldGenre.selectable_fields():
+            item["options"] = options[field.id]
+        elif field.genre in DATE_GENRES:
+            item["dates"] = dates[field.id]
+        result.append(item)
+    return result
@@ -0,0 +1,66 @@
+import zlib
+
+from django_form_generator.common import fast_json
+from django_form_generator.const import APIResponseStorage
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+COMPRESSION_LEVEL = 6
+
+
+def select_keys(result, paths: list[str]):
+    """The `paths` (dotted keys, like `data.total`) of a result, applied to every item of a list."""
+    if isinstance(result, list):
+        return [select_keys(item, paths) for item in result]
+    if not isinstance(result, dict):
+        return result
+    selected = {}
+    for path in paths:
+        keys = path.split(".")
+        value = result
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = selected
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = value
+    return selected
+
+
+def build_result(api, status_code, result, body) -> dict | None:
+    """What is stored of the result of an api call, by the `response_storage` of the api (None: nothing)."""
+    storage = api.response_storage
+    if storage == APIResponseStorage.NONE:
+        return None
+    if storage == APIResponseStorage.STATUS:
+        return {"api": api.id, "url": api.url, "method": api.method, "response_status_code": status_code}
+    if storage == APIResponseStorage.KEYS:
+        result = select_keys(result, api.get_response_keys())
+    return {
+        "api": api.id,
+        "url": api.url,
+        "method": api.method,
+        "body": body or api.body,
+        "response_status_code": status_code,
+        "result": result,
+    }
+
+
+def compress(value, min_size: int | None = None) -> bytes | None:
+    """zlib compressed JSON of a value, None when it's smaller than `min_size` (`API_RESPONSE_COMPRESS_SIZE`
+    by default) or it's None."""
+    if min_size is None:
+        min_size = fg_settings.API_RESPONSE_COMPRESS_SIZE
+    if value is None or min_size is None:
+        return None
+    content = fast_json.dumpb(value)
+    if len(content) < min_size:
+        return None
+    return zlib.compress(content, COMPRESSION_LEVEL)
+
+
+def decompress(content):
+    return fast_json.loads(zlib.decompress(content))
@@ -0,0 +1,188 @@
+import atexit
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from django_form_generator.common.background import run_in_background
+from django_form_generator.const import APICallOutcome
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+logger = logging.getLogger(__name__)
+
+INF = "inf"
+SUM_FIELDS = ("count", "success_count", "http_error_count", "invalid_json_count",
+              "exception_count", "total_duration", "total_payload_size")
+
+
+def _new_stat():
+    return {
+        "count": 0,
+        "success_count": 0,
+        "http_error_count": 0,
+        "invalid_json_count": 0,
+        "exception_count": 0,
+        "total_duration": 0.0,
+        "max_duration": 0.0,
+        "total_payload_size": 0,
+        "histogram": {},
+        "status_codes": {},
+    }
+
+
+def _merge_counts(target: dict, source: dict):
+    for key, value in source.items():
+        target[key] = target.get(key, 0) + value
+
+
+class APIStatsBuffer:
+    """Aggregate outbound api calls in memory per (api, minute) and write them in batches.
+
+    The buffer is flushed in the background thread pool when `API_STATS_FLUSH_SIZE` calls
+    are buffered or when `API_STATS_FLUSH_INTERVAL` seconds passed since the last flush,
+    so there is no database write per api call & none on the request path.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[tuple[int, object], dict] = {}
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._flushing = False
+
+    def record(self, api_id: int, duration: float, status_code: int | None,
+               payload_size: int, outcome: APICallOutcome):
+        if not fg_settings.API_STATS_ENABLED:
+            return
+        bucket = timezone.now().replace(second=0, microsecond=0)
+        latency_ms = duration * 1000
+        histogram_bucket = next(
+            (bound for bound in fg_settings.API_STATS_BUCKETS if latency_ms <= bound), INF
+        )
+        with self._lock:
+            stat = self._stats.setdefault((api_id, bucket), _new_stat())
+            stat["count"] += 1
+            stat[f"{APICallOutcome(outcome).value}_count"] += 1
+            stat["total_duration"] += duration
+            stat["max_duration"] = max(stat["max_duration"], duration)
+            stat["total_payload_size"] += payload_size
+            _merge_counts(stat["histogram"], {str(histogram_bucket): 1})
+            if status_code is not None:
+                _merge_counts(stat["status_codes"], {str(status_code): 1})
+            self._pending += 1
+            # a single flush at a time, the calls recorded meanwhile wait for the next one
+            should_flush = not self._flushing and (
+                self._pending >= fg_settings.API_STATS_FLUSH_SIZE
+                or time.monotonic() - self._last_flush >= fg_settings.API_STATS_FLUSH_INTERVAL
+            )
+            if should_flush:
+                self._flushing = True
+        if should_flush:
+            run_in_background(self.flush)
+
+    def flush(self):
+        with self._lock:
+            stats, self._stats = self._stats, {}
+            self._pending = 0
+            self._last_flush = time.monotonic()
+        try:
+            if stats:
+                self._write(stats)
+        except Exception:
+            logger.exception("Could not write FormAPIManager stats.")
+        finally:
+            self._flushing = False
+
+    @transaction.atomic
+    def _write(self, stats: dict):
+        """Add the buffered stats to their rows: one insert of the missing rows, one locked read & one update."""
+        FormAPIManagerStat = import_string("django_form_generator.models.FormAPIManagerStat")
+        FormAPIManagerStat.objects.bulk_create(
+            [FormAPIManagerStat(api_id=api_id, bucket=bucket) for api_id, bucket in stats],
+            ignore_conflicts=True,
+        )
+        rows = FormAPIManagerStat.objects.select_for_update().filter(
+            api_id__in={api_id for api_id, _ in stats}, bucket__in={bucket for _, bucket in stats}
+        )
+        updated = []
+        for stat in rows:
+            delta = stats.get((stat.api_id, stat.bucket))
+            if delta is None:
+                continue
+            for field in SUM_FIELDS:
+                setattr(stat, field, getattr(stat, field) + delta[field])
+            stat.max_duration = max(stat.max_duration, delta["max_duration"])
+            _merge_counts(stat.histogram, delta["histogram"])
+            _merge_counts(stat.status_codes, delta["status_codes"])
+            updated.append(stat)
+        FormAPIManagerStat.objects.bulk_update(
+            updated, [*SUM_FIELDS, "max_duration", "histogram", "status_codes"]
+        )
+
+
+api_stats = APIStatsBuffer()
+atexit.register(api_stats.flush)
+
+
+def prune(days: int) -> int:
+    """Delete the FormAPIManagerStat rows older than `days` days, returns the number of deleted rows."""
+    FormAPIManagerStat = import_string("django_form_generator.models.FormAPIManagerStat")
+    deleted, _ = FormAPIManagerStat.objects.filter(
+        bucket__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return deleted
+
+
+def _percentile(histogram: dict, count: int, percent: float, max_ms: float) -> float | None:
+    """Estimate a percentile (in ms) from the latency histogram by interpolating inside the bucket."""
+    if not count:
+        return None
+    buckets = sorted((float(k), v) for k, v in histogram.items() if k != INF)
+    buckets.append((max(max_ms, buckets[-1][0] if buckets else 0.0), histogram.get(INF, 0)))
+    rank = count * percent / 100
+    seen = 0
+    lower = 0.0
+    for bound, in_bucket in buckets:
+        if in_bucket and seen + in_bucket >= rank:
+            return min(lower + (bound - lower) * (rank - seen) / in_bucket, max_ms)
+        seen += in_bucket
+        lower = bound
+    return max_ms
+
+
+def summarize(stats) -> dict:
+    """Summary (count, error rate, avg & p50/p95/p99 latency in ms, avg payload size) of some FormAPIManagerStat rows."""
+    total = _new_stat()
+    for stat in stats:
+        for field in SUM_FIELDS:
+            total[field] += getattr(stat, field)
+        total["max_duration"] = max(total["max_duration"], stat.max_duration)
+        _merge_counts(total["histogram"], stat.histogram)
+        _merge_counts(total["status_codes"], stat.status_codes)
+
+    count = total["count"]
+    errors = total["http_error_count"] + total["invalid_json_count"] + total["exception_count"]
+    return {
+        "count": count,
+        "errors": errors,
+        "error_rate": errors / count if count else None,
+        "avg": total["total_duration"] * 1000 / count if count else None,
+        "max": total["max_duration"] * 1000 if count else None,
+        "p50": _percentile(total["histogram"], count, 50, total["max_duration"] * 1000),
+        "p95": _percentile(total["histogram"], count, 95, total["max_duration"] * 1000),
+        "p99": _percentile(total["histogram"], count, 99, total["max_duration"] * 1000),
+        "avg_payload_size": total["total_payload_size"] / count if count else None,
+        "outcomes": {
+            outcome.value: total[f"{outcome.value}_count"] for outcome in APICallOutcome
+        },
+        "status_codes": total["status_codes"],
+    }
+
+
+def window_start():
+    return timezone.now() - timedelta(minutes=fg_settings.API_STATS_WINDOW)
@@ -0,0 +1,64 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import SimpleNamespace
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.http.request import HttpHeaders
+
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+logger = logging.getLogger(__name__)
+
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Thread pool shared by the requests of this worker, created on first use."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=fg_settings.PRE_APIS_BACKGROUND_WORKERS, thread_name_prefix="form_generator"
+                )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %r failed.", func)
+    finally:
+        # the threads of the pool outlive the request, don't keep their connections open
+        connections.close_all()
+
+
+def run_in_background(func, *args, **kwargs) -> Future:
+    """Call `func` in the shared thread pool without waiting for it, its errors are logged."""
+    return get_executor().submit(_run, func, args, kwargs)
+
+
+class DetachedRequest:
+    """What the apis use of a request (user, session key, headers & query string) for a background task.
+
+    It's taken in the request thread: the live request is finished by the time the task runs and its
+    session, user & stream aren't safe to use from another thread.
+    """
+
+    def __init__(self, request):
+        self.method = request.method
+        self.path = request.path
+        self.GET = request.GET.copy()
+        self.COOKIES = dict(request.COOKIES)
+        self.META = {key: value for key, value in request.META.items() if isinstance(value, str)}
+        self.headers = HttpHeaders(self.META)
+        user = getattr(request, "user", None)
+        # `request.user` is lazy: the user is loaded now, not by the task
+        self.user = user if user is not None and user.is_authenticated else AnonymousUser()
+        session = getattr(request, "session", None)
+        self.session = SimpleNamespace(session_key=session.session_key if session is not None else None)
@@ -0,0 +1,107 @@
+import time
+
+from django.core.cache import cache
+
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+class CircuitState:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Circuit breaker of a FormAPIManager, the state is kept in the (shared) cache so all workers agree.
+
+    - closed: calls are allowed, consecutive failures are counted.
+    - open: after `failure_threshold` consecutive failures no call is made for `recovery_timeout` seconds.
+    - half open: after `recovery_timeout` one worker is allowed to probe the api,
+      a success closes the circuit and a failure opens it again.
+    """
+
+    key_prefix = "FormAPICircuit"
+    failures_timeout = 60 * 60
+
+    def __init__(self, api):
+        self.api_id = api.pk
+        self.failure_threshold = api.failure_threshold
+        self.recovery_timeout = api.recovery_timeout
+
+    def _key(self, name):
+        return f"{self.key_prefix}_{self.api_id}_{name}"
+
+    @property
+    def enabled(self):
+        return bool(self.failure_threshold)
+
+    @property
+    def state(self) -> str:
+        if not self.enabled:
+            return CircuitState.CLOSED
+        opened_at = cache.get(self._key("opened_at"))
+        if opened_at is None:
+            return CircuitState.CLOSED
+        if time.time() - opened_at < self.recovery_timeout:
+            return CircuitState.OPEN
+        return CircuitState.HALF_OPEN
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return True
+        if state == CircuitState.HALF_OPEN:
+            # only one probe at a time
+            return cache.add(self._key("probe"), True, self.recovery_timeout or None)
+        return False
+
+    def record_success(self):
+        if self.enabled:
+            cache.delete_many([self._key("failures"), self._key("opened_at"), self._key("probe")])
+
+    def record_failure(self):
+        if not self.enabled:
+            return
+        key = self._key("failures")
+        cache.add(key, 0, self.failures_timeout)
+        try:
+            failures = cache.incr(key)
+        except ValueError:
+            # the key expired between add & incr
+            cache.set(key, 1, self.failures_timeout)
+            failures = 1
+        if failures >= self.failure_threshold or self.state == CircuitState.HALF_OPEN:
+            cache.set(self._key("opened_at"), time.time(), None)
+            cache.delete(self._key("probe"))
+
+
+class APITimeBudget:
+    """Total time all the apis of a single request are allowed to take (`API_TIME_BUDGET` seconds)."""
+
+    request_attribute = "_form_generator_api_budget"
+
+    def __init__(self, budget: float | None):
+        self.deadline = None if budget is None else time.monotonic() + budget
+
+    @classmethod
+    def for_request(cls, request):
+        budget = getattr(request, cls.request_attribute, None)
+        if budget is None:
+            budget = cls(fg_settings.API_TIME_BUDGET)
+            if request is not None:
+                setattr(request, cls.request_attribute, budget)
+        return budget
+
+    def remaining(self) -> float | None:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def timeout(self, api_timeout: float | None) -> float | None:
+        """Timeout of the next api call: the api timeout limited by what is left of the budget."""
+        remaining = self.remaining()
+        if remaining is None:
+            return api_timeout
+        if api_timeout is None:
+            return remaining
+        return min(api_timeout, remaining)
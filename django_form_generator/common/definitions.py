@@ -0,0 +1,512 @@
+"""Export & import of form definitions: forms, fields, categories, options, validators, apis & their relations.
+
+The objects are referenced by their natural keys (form slug, field name, category title, option name & api title)
+so a definition can be moved between environments. Importing upserts every object in bulk, a few queries per model
+whatever the number of forms, and makes the relations of the imported forms & fields match the definition.
+"""
+import json
+from collections import defaultdict
+from datetime import date, datetime
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils.dateparse import parse_datetime
+from django.utils.module_loading import import_string
+
+from django_form_generator.common import fast_json, schema
+from django_form_generator.exceptions import DefinitionError
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+VERSION = 1
+BATCH_SIZE = 500
+
+FORM_ATTRIBUTES = (
+    "title", "status", "submit_text", "redirect_url", "success_message", "style", "direction", "limit_to",
+    "valid_from", "valid_to", "is_editable", "rate_limit", "rate_limit_period", "rate_limit_by",
+    "is_wizard",
+)
+FIELD_ATTRIBUTES = (
+    "label", "genre", "is_required", "placeholder", "default", "help_text", "write_only", "read_only", "is_active",
+    "async_options",
+)
+CATEGORY_ATTRIBUTES = ("is_active", "weight")
+OPTION_ATTRIBUTES = ("is_active",)
+VALIDATOR_ATTRIBUTES = ("value", "error_message", "is_active")
+API_ATTRIBUTES = (
+    "url", "headers", "method", "body", "execute_time", "response", "cache_by", "timeout",
+    "failure_threshold", "recovery_timeout", "fallback", "update_trigger", "response_storage", "response_keys",
+    "is_active",
+)
+DATETIME_ATTRIBUTES = ("valid_from", "valid_to")
+# natural key of the items of every section
+SECTION_KEYS = {"categories": "title", "options": "name", "apis": "title", "fields": "name", "forms": "slug"}
+
+
+def _models():
+    return {
+        name: import_string(f"django_form_generator.models.{name}")
+        for name in (
+            "Form", "Field", "FieldCategory", "Option", "FieldValidator", "FormAPIManager",
+            "FormFieldThrough", "FieldOptionThrough", "FormAPIThrough",
+        )
+    }
+
+
+def _serialize(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _attributes(obj, attributes) -> dict:
+    return {attribute: _serialize(getattr(obj, attribute)) for attribute in attributes}
+
+
+# ---------------------------------------------------------------- export
+
+
+def export_definitions(forms) -> dict:
+    """Definition of the `forms` queryset & everything they use."""
+    m = _models()
+    forms = list(
+        forms.order_by("pk").prefetch_related(
+            Prefetch("form_field_through", queryset=m["FormFieldThrough"].objects.select_related("field", "category")),
+            Prefetch("form_apis", queryset=m["FormAPIThrough"].objects.select_related("api")),
+        )
+    )
+
+    field_ids = {through.field_id for form in forms for through in form.form_field_through.all()}
+    fields = {}
+    option_ids = set()
+    field_type = ContentType.objects.get_for_model(m["Field"])
+    option_type = ContentType.objects.get_for_model(m["Option"])
+    # the fields the exported fields depend on are exported too
+    while field_ids:
+        batch = m["Field"].objects.filter(id__in=field_ids).prefetch_related(
+            "validators", Prefetch("field_options", queryset=m["FieldOptionThrough"].objects.select_related("option"))
+        )
+        field_ids = set()
+        for field in batch:
+            fields[field.pk] = field
+            if field.content_type_id == field_type.pk and field.object_id not in fields:
+                field_ids.add(field.object_id)
+            elif field.content_type_id == option_type.pk:
+                option_ids.add(field.object_id)
+    depends_on_options = {option.pk: option for option in m["Option"].objects.filter(id__in=option_ids)}
+    option_names = {pk: option.name for pk, option in depends_on_options.items()}
+
+    categories = {}
+    category_ids = {
+        through.category_id for form in forms for through in form.form_field_through.all() if through.category_id
+    }
+    while category_ids:
+        batch = list(m["FieldCategory"].objects.filter(id__in=category_ids))
+        categories.update((category.pk, category) for category in batch)
+        category_ids = {category.parent_id for category in batch if category.parent_id and category.parent_id not in categories}
+
+    options = {}
+    for field in fields.values():
+        for through in field.field_options.all():
+            options.setdefault(through.option.name, through.option)
+    for option in depends_on_options.values():
+        options.setdefault(option.name, option)
+    apis = {}
+    for form in forms:
+        for through in form.form_apis.all():
+            apis.setdefault(through.api.title, through.api)
+
+    def depends_on(field):
+        if field.content_type_id == field_type.pk and field.object_id in fields:
+            return {"field": fields[field.object_id].name}
+        if field.content_type_id == option_type.pk and field.object_id in option_names:
+            return {"option": option_names[field.object_id]}
+        return None
+
+    return {
+        "version": VERSION,
+        "categories": [
+            {
+                "title": category.title,
+                "parent": categories[category.parent_id].title if category.parent_id else None,
+                **_attributes(category, CATEGORY_ATTRIBUTES),
+            }
+            for category in sorted(categories.values(), key=lambda category: category.pk)
+        ],
+        "options": [
+            {"name": option.name, **_attributes(option, OPTION_ATTRIBUTES)}
+            for option in sorted(options.values(), key=lambda option: option.pk)
+        ],
+        "apis": [
+            {"title": api.title, **_attributes(api, API_ATTRIBUTES)}
+            for api in sorted(apis.values(), key=lambda api: api.pk)
+        ],
+        "fields": [
+            {
+                "name": field.name,
+                **_attributes(field, FIELD_ATTRIBUTES),
+                "depends_on": depends_on(field),
+                "options": [
+                    {"option": through.option.name, "weight": through.weight}
+                    for through in field.field_options.all()
+                ],
+                "validators": [
+                    {"validator": validator.validator, **_attributes(validator, VALIDATOR_ATTRIBUTES)}
+                    for validator in field.validators.all()
+                ],
+            }
+            for field in sorted(fields.values(), key=lambda field: field.pk)
+        ],
+        "forms": [
+            {
+                "slug": form.slug,
+                **_attributes(form, FORM_ATTRIBUTES),
+                "fields": [
+                    {
+                        "field": through.field.name,
+                        "category": through.category.title if through.category_id else None,
+                        "position": through.position,
+                        "weight": through.weight,
+                    }
+                    for through in form.form_field_through.all()
+                ],
+                "apis": [{"api": through.api.title, "weight": through.weight} for through in form.form_apis.all()],
+            }
+            for form in forms
+        ],
+    }
+
+
+def dumps(data: dict, format: str = "json", indent: int | None = 2) -> str:
+    if format == "yaml":
+        if yaml is None:
+            raise DefinitionError("PyYAML is required for the yaml format: pip install pyyaml")
+        return yaml.safe_dump(data, allow_unicode=True, sort_keys=False)
+    if indent in (None, 2):
+        return fast_json.dumps(data, indent=indent == 2)
+    return json.dumps(data, ensure_ascii=False, indent=indent)
+
+
+def loads(content: str | bytes, format: str = "json") -> dict:
+    try:
+        if format == "yaml":
+            if yaml is None:
+                raise DefinitionError("PyYAML is required for the yaml format: pip install pyyaml")
+            return yaml.safe_load(content)
+        return fast_json.loads(content)
+    except (ValueError, getattr(yaml, "YAMLError", ValueError)) as e:
+        raise DefinitionError(f"Invalid {format} definition: {e}")
+
+
+def merge(definitions: list[dict]) -> dict:
+    """Merge some definitions into one, the last definition of an object wins."""
+    for definition in definitions:
+        _check(definition)
+    merged = {"version": VERSION}
+    for section, key in SECTION_KEYS.items():
+        items = {}
+        for definition in definitions:
+            for item in definition.get(section) or []:
+                items[item[key]] = item
+        merged[section] = list(items.values())
+    return merged
+
+
+# ---------------------------------------------------------------- import
+
+
+def _check(definition: dict):
+    if not isinstance(definition, dict):
+        raise DefinitionError("A definition must be an object.")
+    if not isinstance(definition.get("version", VERSION), int) or definition.get("version", VERSION) > VERSION:
+        raise DefinitionError(f"Unsupported definition version {definition['version']}.")
+    for section, key in SECTION_KEYS.items():
+        seen = set()
+        for item in definition.get(section) or []:
+            if not isinstance(item, dict) or not item.get(key):
+                raise DefinitionError(f"Every item of `{section}` must have a `{key}`.")
+            if item[key] in seen:
+                raise DefinitionError(f"`{item[key]}` is defined twice in `{section}`.")
+            seen.add(item[key])
+
+
+def _values(item: dict, attributes, model) -> dict:
+    """Attributes of a definition item, missing ones get the default of the model field."""
+    values = {}
+    for attribute in attributes:
+        if attribute in item:
+            value = item[attribute]
+            if attribute in DATETIME_ATTRIBUTES and isinstance(value, str):
+                value = parse_datetime(value)
+        else:
+            value = model._meta.get_field(attribute).get_default()
+        if value is None and not model._meta.get_field(attribute).null:
+            raise DefinitionError(f"`{attribute}` of {model._meta.verbose_name} is required.")
+        values[attribute] = value
+    return values
+
+
+def _lookup(mapping: dict, key, kind: str):
+    try:
+        return mapping[key]
+    except KeyError:
+        raise DefinitionError(f"Unknown {kind} `{key}`.")
+
+
+def _upsert(model, objs, unique_field: str, attributes) -> dict:
+    """`bulk_create` the objects updating the existing rows with the same `unique_field`, return {key: id}."""
+    model.objects.bulk_create(
+        objs,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=[unique_field],
+        update_fields=[*attributes, "updated_at"],
+    )
+    keys = [getattr(obj, unique_field) for obj in objs]
+    return dict(model.objects.filter(**{f"{unique_field}__in": keys}).values_list(unique_field, "id"))
+
+
+def _upsert_by_name(model, items: list[dict], key: str, attributes) -> dict:
+    """Upsert of models without a unique key (options & apis), the oldest object with the same name is updated."""
+    names = [item[key] for item in items]
+    existing = {}
+    for obj in model.objects.filter(**{f"{key}__in": names}).order_by("-pk"):
+        existing[getattr(obj, key)] = obj
+    changed, created = [], []
+    for item in items:
+        values = _values(item, attributes, model)
+        obj = existing.get(item[key])
+        if obj is None:
+            created.append(model(**{key: item[key]}, **values))
+        elif any(getattr(obj, attribute) != value for attribute, value in values.items()):
+            for attribute, value in values.items():
+                setattr(obj, attribute, value)
+            changed.append(obj)
+    model.objects.bulk_update(changed, attributes, batch_size=BATCH_SIZE)
+    model.objects.bulk_create(created, batch_size=BATCH_SIZE)
+    ids = {name: obj.pk for name, obj in existing.items()}
+    if created:
+        ids.update(model.objects.filter(**{f"{key}__in": [getattr(obj, key) for obj in created]}).values_list(key, "id"))
+    return ids
+
+
+def _add_existing(ids: dict, model, key: str, names: set):
+    """Add the ids of the objects referenced by a definition that aren't defined in it."""
+    missing = names - set(ids)
+    if missing:
+        # the oldest object wins for the names that aren't unique
+        ids.update(model.objects.filter(**{f"{key}__in": missing}).order_by("-pk").values_list(key, "id"))
+
+
+def _category_levels(categories: list[dict], existing: set) -> list[list[dict]]:
+    """Categories in topological order: every level only has parents in the previous levels (or the database)."""
+    by_title = {category["title"]: category for category in categories}
+    depths = {}
+
+    def depth(title, path=()):
+        if title in depths:
+            return depths[title]
+        if title in path:
+            raise DefinitionError(f"Category `{title}` is its own parent.")
+        parent = by_title[title].get("parent")
+        if not parent:
+            result = 0
+        elif parent in by_title:
+            result = depth(parent, (*path, title)) + 1
+        elif parent in existing:
+            result = 0
+        else:
+            raise DefinitionError(f"Unknown category `{parent}`.")
+        depths[title] = result
+        return result
+
+    levels = defaultdict(list)
+    for category in categories:
+        levels[depth(category["title"])].append(category)
+    return [levels[level] for level in sorted(levels)]
+
+
+def _sync(model, existing, wanted: dict, update_fields) -> None:
+    """Make the rows of a through table match `wanted` ({key: values}), `existing` are the current rows by key."""
+    changed, created = [], []
+    for key, values in wanted.items():
+        obj = existing.pop(key, None)
+        if obj is None:
+            created.append(model(**values))
+        elif any(getattr(obj, attribute) != values[attribute] for attribute in update_fields):
+            for attribute in update_fields:
+                setattr(obj, attribute, values[attribute])
+            changed.append(obj)
+    model.objects.filter(pk__in=[obj.pk for obj in existing.values()]).delete()
+    model.objects.bulk_update(changed, update_fields, batch_size=BATCH_SIZE)
+    model.objects.bulk_create(created, batch_size=BATCH_SIZE)
+
+
+@transaction.atomic
+def import_definitions(definition: dict) -> dict:
+    """Create or update everything in a definition, return the number of imported objects per section."""
+    _check(definition)
+    m = _models()
+    categories = definition.get("categories") or []
+    options = definition.get("options") or []
+    apis = definition.get("apis") or []
+    fields = definition.get("fields") or []
+    forms = definition.get("forms") or []
+
+    # categories, parents first
+    FieldCategory = m["FieldCategory"]
+    parents = {category["parent"] for category in categories if category.get("parent")}
+    category_ids = dict(FieldCategory.objects.filter(title__in=parents).values_list("title", "id"))
+    for level in _category_levels(categories, set(category_ids)):
+        category_ids.update(_upsert(FieldCategory, [
+            FieldCategory(
+                title=category["title"],
+                parent_id=_lookup(category_ids, category["parent"], "category") if category.get("parent") else None,
+                **_values(category, CATEGORY_ATTRIBUTES, FieldCategory),
+            )
+            for category in level
+        ], "title", [*CATEGORY_ATTRIBUTES, "parent_id"]))
+
+    _add_existing(category_ids, FieldCategory, "title", {
+        item["category"] for form in forms for item in form.get("fields") or [] if item.get("category")
+    })
+    option_ids = _upsert_by_name(m["Option"], options, "name", OPTION_ATTRIBUTES)
+    _add_existing(option_ids, m["Option"], "name", {
+        item["option"] for field in fields for item in field.get("options") or []
+    } | {
+        field["depends_on"]["option"] for field in fields if (field.get("depends_on") or {}).get("option")
+    })
+    api_ids = _upsert_by_name(m["FormAPIManager"], apis, "title", API_ATTRIBUTES)
+    _add_existing(api_ids, m["FormAPIManager"], "title", {
+        item["api"] for form in forms for item in form.get("apis") or []
+    })
+
+    # fields, then what they depend on (a field can depend on a field of the same definition)
+    Field = m["Field"]
+    field_ids = _upsert(Field, [
+        Field(name=field["name"], **_values(field, FIELD_ATTRIBUTES, Field)) for field in fields
+    ], "name", FIELD_ATTRIBUTES)
+    _add_existing(field_ids, Field, "name", {
+        item["field"] for form in forms for item in form.get("fields") or []
+    } | {
+        field["depends_on"]["field"] for field in fields if (field.get("depends_on") or {}).get("field")
+    })
+
+    field_type = ContentType.objects.get_for_model(Field)
+    option_type = ContentType.objects.get_for_model(m["Option"])
+    dependencies = []
+    for field in fields:
+        depends_on = field.get("depends_on") or {}
+        content_type = object_id = None
+        if depends_on.get("field"):
+            content_type, object_id = field_type, _lookup(field_ids, depends_on["field"], "field")
+        elif depends_on.get("option"):
+            content_type, object_id = option_type, _lookup(option_ids, depends_on["option"], "option")
+        dependencies.append(Field(pk=field_ids[field["name"]], content_type=content_type, object_id=object_id))
+    Field.objects.bulk_update(dependencies, ["content_type", "object_id"], batch_size=BATCH_SIZE)
+
+    imported_field_ids = [field_ids[field["name"]] for field in fields]
+    FieldValidator = m["FieldValidator"]
+    validators = {
+        (field_ids[field["name"]], validator["validator"]): validator
+        for field in fields
+        for validator in field.get("validators") or []
+    }
+    FieldValidator.objects.bulk_create(
+        [
+            FieldValidator(field_id=field_id, validator=name, **_values(validator, VALIDATOR_ATTRIBUTES, FieldValidator))
+            for (field_id, name), validator in validators.items()
+        ],
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["field_id", "validator"],
+        update_fields=[*VALIDATOR_ATTRIBUTES, "updated_at"],
+    )
+    FieldValidator.objects.filter(pk__in=[
+        pk for pk, field_id, name in FieldValidator.objects.filter(
+            field_id__in=imported_field_ids
+        ).values_list("pk", "field_id", "validator")
+        if (field_id, name) not in validators
+    ]).delete()
+
+    # the options of a field keep their current option object when there are options with the same name
+    FieldOptionThrough = m["FieldOptionThrough"]
+    existing = {
+        (through.field_id, through.option.name): through
+        for through in FieldOptionThrough.objects.filter(field_id__in=imported_field_ids).select_related("option")
+    }
+    wanted = {}
+    for field in fields:
+        field_id = field_ids[field["name"]]
+        for item in field.get("options") or []:
+            through = existing.get((field_id, item["option"]))
+            wanted[(field_id, item["option"])] = {
+                "field_id": field_id,
+                "option_id": through.option_id if through else _lookup(option_ids, item["option"], "option"),
+                "weight": item.get("weight", 0),
+            }
+    _sync(FieldOptionThrough, existing, wanted, ["weight"])
+
+    Form = m["Form"]
+    form_ids = _upsert(Form, [
+        Form(slug=form["slug"], **_values(form, FORM_ATTRIBUTES, Form)) for form in forms
+    ], "slug", FORM_ATTRIBUTES)
+
+    FormFieldThrough = m["FormFieldThrough"]
+    form_fields = {
+        (form_ids[form["slug"]], _lookup(field_ids, item["field"], "field")): item
+        for form in forms
+        for item in form.get("fields") or []
+    }
+    FormFieldThrough.objects.bulk_create(
+        [
+            FormFieldThrough(
+                form_id=form_id,
+                field_id=field_id,
+                category_id=_lookup(category_ids, item["category"], "category") if item.get("category") else None,
+                position=item.get("position") or FormFieldThrough._meta.get_field("position").get_default(),
+                weight=item.get("weight", 0),
+            )
+            for (form_id, field_id), item in form_fields.items()
+        ],
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["field_id", "form_id"],
+        update_fields=["category_id", "position", "weight"],
+    )
+    imported_form_ids = [form_ids[form["slug"]] for form in forms]
+    FormFieldThrough.objects.filter(pk__in=[
+        pk for pk, form_id, field_id in FormFieldThrough.objects.filter(
+            form_id__in=imported_form_ids
+        ).values_list("pk", "form_id", "field_id")
+        if (form_id, field_id) not in form_fields
+    ]).delete()
+
+    FormAPIThrough = m["FormAPIThrough"]
+    existing = {
+        (through.form_id, through.api_id): through
+        for through in FormAPIThrough.objects.filter(form_id__in=imported_form_ids)
+    }
+    wanted = {}
+    for form in forms:
+        form_id = form_ids[form["slug"]]
+        for item in form.get("apis") or []:
+            api_id = _lookup(api_ids, item["api"], "api")
+            wanted[(form_id, api_id)] = {"form_id": form_id, "api_id": api_id, "weight": item.get("weight", 0)}
+    _sync(FormAPIThrough, existing, wanted, ["weight"])
+
+    # the bulk queries don't send the signals that invalidate the cached schemas
+    transaction.on_commit(schema.invalidate)
+    return {
+        "categories": len(categories),
+        "options": len(options),
+        "apis": len(apis),
+        "fields": len(fields),
+        "validators": len(validators),
+        "forms": len(forms),
+    }
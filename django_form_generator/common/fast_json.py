@@ -0,0 +1,54 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+# the digits -> "0" & the other bytes -> " ", so long numbers are found without a regex
+_DIGITS = bytes(48 if 48 <= byte <= 57 else 32 for byte in range(256))
+_LONG_NUMBER = b"0" * 20
+
+
+def is_enabled() -> bool:
+    return orjson is not None and fg_settings.FAST_JSON
+
+
+def dumpb(value, default=None, passthrough_datetime: bool = False, indent: bool = False) -> bytes:
+    """UTF-8 JSON of a value, with `orjson` when it's enabled.
+
+    The values `orjson` refuses (e.g. integers beyond 64 bits) are encoded by the json module, `default` encodes
+    the other types (like the `default` of `json.JSONEncoder`).
+    """
+    if is_enabled():
+        option = orjson.OPT_NON_STR_KEYS
+        if passthrough_datetime:
+            option |= orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(value, default=default, option=option)
+        except TypeError:
+            pass
+    return json.dumps(value, default=default, ensure_ascii=False, indent=2 if indent else None).encode()
+
+
+def dumps(value, default=None, passthrough_datetime: bool = False, indent: bool = False) -> str:
+    return dumpb(value, default, passthrough_datetime, indent).decode()
+
+
+def loads(value: str | bytes):
+    """Value of a JSON document, raises a `ValueError` (`json.JSONDecodeError`) when it's invalid.
+
+    Documents with numbers of 20 digits or more are decoded by the json module, `orjson` turns the integers
+    beyond 64 bits into floats.
+    """
+    if is_enabled():
+        if isinstance(value, str):
+            value = value.encode("utf-8", "surrogatepass")
+        if _LONG_NUMBER not in value.translate(_DIGITS):
+            return orjson.loads(value)
+    return json.loads(value)
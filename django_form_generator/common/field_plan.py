@@ -0,0 +1,73 @@
+from collections import defaultdict
+
+from django_form_generator.common import genres, schema
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+# form_id -> (version, plan), the plans of this worker
+_plans: dict = {}
+
+
+class PlannedField:
+    """What `_generate_data` needs to know about a field of a form, resolved once per version of the form."""
+
+    __slots__ = ("id", "name", "label", "genre", "category", "depends_on", "evaluate")
+
+    def __init__(self, field, category: str | None, depends_on: dict | None):
+        self.id = field.id
+        self.name = field.name
+        self.label = field.label
+        self.genre = field.genre
+        self.category = category
+        self.depends_on = depends_on
+        self.evaluate = genres.get_codec(field.genre).encode
+
+
+def _existing_parents(fields) -> set:
+    """`(content_type_id, object_id)` of the parents (`content_object`) of the fields that still exist."""
+    ids = defaultdict(set)
+    content_types = {}
+    for field in fields:
+        if field.content_type_id is not None and field.object_id is not None:
+            ids[field.content_type_id].add(field.object_id)
+            content_types[field.content_type_id] = field.content_type
+    existing = set()
+    for content_type_id, object_ids in ids.items():
+        model = content_types[content_type_id].model_class()
+        if model is None:
+            continue
+        for pk in model._base_manager.filter(pk__in=object_ids).values_list("pk", flat=True):
+            existing.add((content_type_id, pk))
+    return existing
+
+
+def build_plan(form) -> list[PlannedField]:
+    fields = list(form.get_fields().select_related("content_type"))
+    categories = dict(form.form_field_through.values_list("field_id", "category__title"))
+    parents = _existing_parents(fields)
+    plan = []
+    for field in fields:
+        depends_on = None
+        if (field.content_type_id, field.object_id) in parents:
+            depends_on = {"id": field.object_id, "type": field.content_type.model}
+        plan.append(PlannedField(field, categories.get(field.id), depends_on))
+    return plan
+
+
+def get_field_plan(form) -> list[PlannedField]:
+    """Fields of a form in order with their category & dependency, built again when the definitions change
+    (with the version of the schema).
+
+    With a cache of a single process (`LocMemCache`) the generation of `schema.invalidate` only counts the changes made
+    by this worker: the changes of the fields made by another worker are seen when the form is saved again
+    (its `updated_at`), set `FIELD_PLAN_CACHE` to False to build the plan for every response instead.
+    """
+    if not fg_settings.FIELD_PLAN_CACHE:
+        return build_plan(form)
+    version = schema.get_version(form)
+    cached = _plans.get(form.pk)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    plan = build_plan(form)
+    _plans[form.pk] = (version, plan)
+    return plan
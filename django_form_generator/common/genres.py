@@ -0,0 +1,172 @@
+from datetime import datetime
+
+from django_form_generator.common.helpers import FileFieldHelper
+from django_form_generator.const import FieldGenre
+
+
+class GenreCodec:
+    """How a genre of fields is built, stored, shown & filtered.
+
+    `encode(value, **kwargs)` turns a submitted value into its stored value, `decode(value)` turns a stored value
+    into its displayed value (None: shown as stored) & `coerce(value)` turns a filter parameter into a comparable
+    value (defaults to `encode`).
+    `form_field(form, instance, field)` & `serializer_field(serializer, field)` build the fields of the forms
+    & the serializers, None: the `prepare_<genre>` method of the form / serializer class builds it.
+    """
+
+    __slots__ = ("genre", "label", "encode", "decode", "coerce", "form_field", "serializer_field")
+
+    def __init__(self, genre: str, encode, decode=None, coerce=None, form_field=None, serializer_field=None,
+                 label=None):
+        self.genre = str(genre)
+        self.label = label or self.genre
+        self.encode = encode
+        self.decode = decode
+        self.coerce = coerce or encode
+        self.form_field = form_field
+        self.serializer_field = serializer_field
+
+    def __repr__(self):
+        return f"<GenreCodec: {self.genre}>"
+
+
+def encode_text(value, **kwargs):
+    if value is None or value == '':
+        return None
+    return str(value)
+
+
+def encode_text_area(value, **kwargs):
+    if value is None or value == '':
+        return value
+    return str(value)
+
+
+def encode_multi_text(value, **kwargs):
+    if isinstance(value, list):
+        return [str(val) for val in value]
+    return []
+
+
+def encode_number(value, **kwargs):
+    if value is None or value == '':
+        return None
+    return int(value)
+
+
+def encode_option(value, regex=False, **kwargs):
+    if regex:
+        return encode_text(value)
+    return encode_number(value)
+
+
+def encode_multi_option(value, **kwargs):
+    if isinstance(value, list):
+        return [int(val) for val in value]
+    return []
+
+
+def encode_bool(value, **kwargs):
+    return bool(value)
+
+
+def encode_nothing(value, **kwargs):
+    return None
+
+
+def encode_file(value, host=None, instance_directory=None, **kwargs):
+    if value is not None and not isinstance(value, dict):
+        return FileFieldHelper.upload_file(host, value, instance_directory)
+    return value
+
+
+def decode_file(value):
+    if value is None:
+        return None
+    return FileFieldHelper(value["url"], value["directory"])
+
+
+def decode_datetime(value):
+    if value and value != 'None':
+        return datetime.fromisoformat(value)
+    return value
+
+
+# genre -> codec
+_codecs: dict = {}
+# (class, attribute) -> (version, {genre: builder})
+_builders: dict = {}
+_version = 0
+# {genre: decode}, None: built again on the next `get_decoders`
+_decoders = None
+
+
+def register_genre(codec: GenreCodec):
+    """Adds (or replaces) the codec of a genre, the builders & the decoders are resolved again."""
+    global _version, _decoders
+    _codecs[codec.genre] = codec
+    _version += 1
+    _decoders = None
+
+
+for _codec in (
+    GenreCodec(FieldGenre.TEXT_INPUT, encode_text),
+    GenreCodec(FieldGenre.MULTI_TEXT_INPUT, encode_multi_text),
+    GenreCodec(FieldGenre.TEXT_AREA, encode_text_area),
+    GenreCodec(FieldGenre.NUMBER, encode_number),
+    GenreCodec(FieldGenre.DROPDOWN, encode_option, coerce=encode_text),
+    GenreCodec(FieldGenre.DATE, encode_text, decode=decode_datetime),
+    GenreCodec(FieldGenre.TIME, encode_text),
+    GenreCodec(FieldGenre.DATETIME, encode_text, decode=decode_datetime),
+    GenreCodec(FieldGenre.EMAIL, encode_text),
+    GenreCodec(FieldGenre.PASSWORD, encode_text),
+    GenreCodec(FieldGenre.CHECKBOX, encode_bool),
+    GenreCodec(FieldGenre.MULTI_CHECKBOX, encode_multi_option),
+    GenreCodec(FieldGenre.RADIO, encode_option, coerce=encode_text),
+    GenreCodec(FieldGenre.HIDDEN, encode_text),
+    GenreCodec(FieldGenre.CAPTCHA, encode_nothing),
+    GenreCodec(FieldGenre.UPLOAD_FILE, encode_file, decode=decode_file, coerce=encode_text),
+):
+    _codecs[_codec.genre] = _codec
+
+
+def get_codec(genre: str) -> GenreCodec:
+    try:
+        return _codecs[genre]
+    except KeyError:
+        raise ValueError(f"{genre!r} is not a registered field genre")
+
+
+def is_registered(genre: str) -> bool:
+    return genre in _codecs
+
+
+def get_choices() -> list:
+    """The choices of the genres, the built-in genres first."""
+    choices = list(FieldGenre.choices)
+    choices.extend((genre, codec.label) for genre, codec in _codecs.items() if genre not in FieldGenre.values)
+    return choices
+
+
+def get_decoders() -> dict:
+    """`{genre: decode}` of the genres whose stored values aren't shown as they are, built once per registration."""
+    global _decoders
+    if _decoders is None:
+        _decoders = {genre: codec.decode for genre, codec in _codecs.items() if codec.decode is not None}
+    return _decoders
+
+
+def get_builders(cls, attribute: str) -> dict:
+    """`{genre: builder}` of a form (`attribute="form_field"`) or serializer (`attribute="serializer_field"`) class,
+    resolved once per class: its `prepare_<genre>` method, else the builder of the codec.
+    Builders are called like the methods, `builder(form, instance, field)` / `builder(serializer, field)`."""
+    cached = _builders.get((cls, attribute))
+    if cached is not None and cached[0] == _version:
+        return cached[1]
+    builders = {}
+    for genre, codec in _codecs.items():
+        builder = getattr(cls, f"prepare_{genre}", None) or getattr(codec, attribute)
+        if builder is not None:
+            builders[genre] = builder
+    _builders[(cls, attribute)] = (_version, builders)
+    return builders
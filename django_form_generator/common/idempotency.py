@@ -0,0 +1,133 @@
+import hashlib
+import uuid
+from collections.abc import Mapping
+
+from django.core.cache import cache
+
+from django_form_generator.common.utils import get_client_ip
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+IN_PROGRESS = "in_progress"
+DONE = "done"
+HEADER = "HTTP_IDEMPOTENCY_KEY"
+MAX_KEY_LENGTH = 255
+
+
+def new_key() -> str:
+    return uuid.uuid4().hex
+
+
+def get_key(request) -> str | None:
+    """Idempotency key of a request, from the `Idempotency-Key` header or the `IDEMPOTENCY_FIELD_NAME` field."""
+    key = request.META.get(HEADER)
+    if not key:
+        data = getattr(request, "data", None)
+        if not isinstance(data, Mapping):
+            data = request.POST
+        key = data.get(fg_settings.IDEMPOTENCY_FIELD_NAME)
+    if not isinstance(key, str) or not key.strip() or len(key) > MAX_KEY_LENGTH:
+        return None
+    return key.strip()
+
+
+def get_caller(request) -> tuple[str, bool]:
+    """Who sent a request (the logged in user, else the session, else the IP address) & whether it's identified
+    by its user or session: the callers of the same IP address may be different clients."""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}", True
+    session = getattr(request, "session", None)
+    if session is not None and session.session_key:
+        return f"session:{session.session_key}", True
+    return f"ip:{get_client_ip(request)}", False
+
+
+class Idempotency:
+    """Outcome of the submissions sent with the same idempotency key to the same url by the same caller.
+
+    The first request marks the key as in progress with `cache.add` (atomic set-if-absent) before doing any work,
+    so a duplicate (a double click or a retry) never validates, saves or calls the apis again.
+    The `data` of an outcome is only replayed to the callers identified by their user or session.
+    """
+
+    key_prefix = "FormIdempotency"
+
+    def __init__(self, request, key: str):
+        caller, self.identified = get_caller(request)
+        digest = hashlib.sha256(f"{caller}:{request.path}:{key}".encode()).hexdigest()
+        self.cache_key = f"{self.key_prefix}_{digest}"
+
+    def _replayable(self, outcome: dict) -> dict:
+        if self.identified:
+            return outcome
+        return {key: value for key, value in outcome.items() if key != "data"}
+
+    @classmethod
+    def from_request(cls, request):
+        if not fg_settings.IDEMPOTENCY_ENABLED or request.method not in ("POST", "PUT", "PATCH"):
+            return None
+        key = get_key(request)
+        return None if key is None else cls(request, key)
+
+    def begin(self) -> dict | None:
+        """Return None when this request owns the key, else the outcome of the first request."""
+        if cache.add(self.cache_key, {"state": IN_PROGRESS}, fg_settings.IDEMPOTENCY_LOCK_TIMEOUT):
+            return None
+        return self._replayable(cache.get(self.cache_key) or {"state": IN_PROGRESS})
+
+    def finish(self, outcome: dict | None):
+        """Keep the outcome of a successful submission for replays, forget the key of a failed one so it can be retried."""
+        if outcome is None:
+            cache.delete(self.cache_key)
+        else:
+            cache.set(self.cache_key, {"state": DONE, **outcome}, fg_settings.IDEMPOTENCY_TIMEOUT)
+
+    async def abegin(self) -> dict | None:
+        if await cache.aadd(self.cache_key, {"state": IN_PROGRESS}, fg_settings.IDEMPOTENCY_LOCK_TIMEOUT):
+            return None
+        return self._replayable(await cache.aget(self.cache_key) or {"state": IN_PROGRESS})
+
+    async def afinish(self, outcome: dict | None):
+        if outcome is None:
+            await cache.adelete(self.cache_key)
+        else:
+            await cache.aset(self.cache_key, {"state": DONE, **outcome}, fg_settings.IDEMPOTENCY_TIMEOUT)
+
+
+def idempotent(request, process, get_outcome, replay):
+    """Run `process()` once per idempotency key.
+
+    `get_outcome(response)` returns what to replay for a successful response (None for a failed one)
+    & `replay(outcome)` builds the response of a duplicate request (the outcome state is `in_progress` or `done`).
+    """
+    idempotency = Idempotency.from_request(request)
+    if idempotency is None:
+        return process()
+    outcome = idempotency.begin()
+    if outcome is not None:
+        return replay(outcome)
+    try:
+        response = process()
+    except BaseException:
+        idempotency.finish(None)
+        raise
+    idempotency.finish(get_outcome(response))
+    return response
+
+
+async def aidempotent(request, process, get_outcome, replay):
+    """`idempotent` for async views, `process` is a coroutine function."""
+    idempotency = Idempotency.from_request(request)
+    if idempotency is None:
+        return await process()
+    outcome = await idempotency.abegin()
+    if outcome is not None:
+        return replay(outcome)
+    try:
+        response = await process()
+    except BaseException:
+        await idempotency.afinish(None)
+        raise
+    await idempotency.afinish(get_outcome(response))
+    return response
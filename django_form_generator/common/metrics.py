@@ -0,0 +1,161 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from django_form_generator.signals import operation_measured
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+# the counters of the `measure` blocks the code runs in. concurrent tasks (the async api calls) share the connections
+# of a thread, each of them only counts the queries of its own context
+_counters: ContextVar[tuple] = ContextVar("form_generator_query_counters", default=())
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+
+def count_query(execute, sql, params, many, context):
+    for counter in _counters.get():
+        counter.count += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(connection, **kwargs):
+    """Add `count_query` to the execute wrappers of a connection once, it stays for the life of the connection:
+    wrappers entered & exited by concurrent tasks (`connection.execute_wrapper`) would be removed out of order.
+
+    It's the first wrapper, `execute_wrapper` blocks remove the last one when they exit.
+    """
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_query)
+
+
+@contextmanager
+def measure(operation: str, sender=None, **labels):
+    """Measure duration & number of queries of the wrapped block and send `operation_measured`.
+
+    Yields the labels dict so the block can add labels that are only known at the end (like a status code).
+    Nothing is measured when no one listens to the signal.
+    """
+    if not operation_measured.has_listeners(sender):
+        yield labels
+        return
+
+    # the connections of the other threads (`sync_to_async`) get the wrapper when they connect
+    connection_created.connect(install_query_counter, dispatch_uid="form_generator_query_counter")
+    for connection in connections.all():
+        install_query_counter(connection)
+    counter = QueryCounter()
+    token = _counters.set(_counters.get() + (counter,))
+    start = time.perf_counter()
+    try:
+        yield labels
+    except Exception as e:
+        labels["error"] = e.__class__.__name__
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        _counters.reset(token)
+        operation_measured.send(
+            sender=sender,
+            operation=operation,
+            duration=duration,
+            queries=counter.count,
+            labels=labels,
+        )
+
+
+class MetricsCollector:
+    """Aggregate `operation_measured` signals in-process (per worker) as counters & histograms.
+
+    Metrics can be exported in prometheus text format via `render`.
+    """
+
+    namespace = "django_form_generator"
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(sorted(buckets or fg_settings.METRICS_BUCKETS))
+        self._lock = threading.Lock()
+        self._series: dict[tuple, dict] = {}
+
+    def __call__(self, sender, operation, duration, queries, labels, **kwargs):
+        self.observe(operation, duration, queries, labels)
+
+    def observe(self, operation: str, duration: float, queries: int, labels: dict | None = None):
+        key = (operation, tuple(sorted((str(k), str(v)) for k, v in (labels or {}).items() if v is not None)))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    "buckets": [0] * len(self.buckets),
+                    "count": 0,
+                    "sum": 0.0,
+                    "queries": 0,
+                }
+            for i, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    series["buckets"][i] += 1
+            series["count"] += 1
+            series["sum"] += duration
+            series["queries"] += queries
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    @staticmethod
+    def _format_labels(labels):
+        if not labels:
+            return ""
+        escaped = (
+            (k, v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+            for k, v in labels
+        )
+        return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+    def render(self) -> str:
+        with self._lock:
+            series = sorted(
+                (key, {**value, "buckets": list(value["buckets"])})
+                for key, value in self._series.items()
+            )
+
+        duration = f"{self.namespace}_operation_duration_seconds"
+        queries = f"{self.namespace}_operation_queries_total"
+        lines = [
+            f"# HELP {duration} Duration of django form generator operations.",
+            f"# TYPE {duration} histogram",
+        ]
+        for (operation, labels), value in series:
+            labels = (("operation", operation),) + labels
+            for bound, count in zip(self.buckets, value["buckets"]):
+                lines.append(f"{duration}_bucket{self._format_labels(labels + (('le', repr(float(bound))),))} {count}")
+            lines.append(f"{duration}_bucket{self._format_labels(labels + (('le', '+Inf'),))} {value['count']}")
+            lines.append(f"{duration}_sum{self._format_labels(labels)} {value['sum']}")
+            lines.append(f"{duration}_count{self._format_labels(labels)} {value['count']}")
+
+        lines += [
+            f"# HELP {queries} Database queries executed by django form generator operations.",
+            f"# TYPE {queries} counter",
+        ]
+        for (operation, labels), value in series:
+            labels = (("operation", operation),) + labels
+            lines.append(f"{queries}{self._format_labels(labels)} {value['queries']}")
+        return "\n".join(lines) + "\n"
+
+
+_collector = None
+
+
+def get_collector() -> MetricsCollector:
+    global _collector
+    if _collector is None:
+        _collector = fg_settings.METRICS_COLLECTOR()
+    return _collector
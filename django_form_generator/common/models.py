@@ -1,10 +1,102 @@
+import json
+
 from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+from django.db.models.fields.json import KeyTransform
 from django.utils.translation import gettext_lazy as _
 
+from django_form_generator.common import api_results, fast_json
+
 
 class BaseModel(models.Model):
     created_at = models.DateTimeField(_("Created at"), auto_now_add=True)
     updated_at = models.DateTimeField(_("Updated at"), auto_now=True)
 
     class Meta:
-        abstract = True
\ No newline at end of file
+        abstract = True
+
+
+class EncodedJSON(str):
+    """JSON encoded by `FastJSONField.get_prep_value`, saved as it is."""
+
+
+class FastJSONField(models.JSONField):
+    """`JSONField` encoded & decoded with `common.fast_json` (`orjson` when it's installed) unless it has
+    a custom `encoder` / `decoder`."""
+
+    def from_db_value(self, value, expression, connection):
+        if value is None or self.decoder is not None:
+            return super().from_db_value(value, expression, connection)
+        # Some backends (SQLite at least) extract non-string values in their SQL datatypes.
+        if isinstance(expression, KeyTransform) and not isinstance(value, str):
+            return value
+        try:
+            return fast_json.loads(value)
+        except json.JSONDecodeError:
+            return value
+
+    def get_prep_value(self, value):
+        if value is None or self.encoder is not None or hasattr(value, "resolve_expression"):
+            return super().get_prep_value(value)
+        # datetimes are refused like by the json module
+        return EncodedJSON(fast_json.dumps(value, passthrough_datetime=True))
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        # Django >= 4.2 encodes the prepared value again (`connection.ops.adapt_json_value`)
+        if not prepared:
+            value = self.get_prep_value(value)
+        if isinstance(value, EncodedJSON):
+            return str(value)
+        return super().get_db_prep_value(value, connection, prepared=True)
+
+
+class CompressedJSONAttribute(DeferredAttribute):
+    """Value of a `CompressedJSONField`, decompressed from its `compressed_field` on the first access."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        data = instance.__dict__
+        attname, compressed_field = self.field.attname, self.field.compressed_field
+        if attname not in data:
+            instance.refresh_from_db(fields=[attname, compressed_field])
+        value = data[attname]
+        if value is None:
+            compressed = getattr(instance, compressed_field)
+            if compressed:
+                value = data[attname] = api_results.decompress(compressed)
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+        if value is None and self.field.compressed_field in instance.__dict__:
+            instance.__dict__[self.field.compressed_field] = None
+
+
+class CompressedJSONField(FastJSONField):
+    """`FastJSONField` whose values of at least `API_RESPONSE_COMPRESS_SIZE` bytes are saved zlib compressed
+    in `compressed_field` (a `BinaryField` declared after it) instead, the column of the field is null for them.
+
+    Save `compressed_field` with the field when you use `update_fields`.
+    """
+
+    descriptor_class = CompressedJSONAttribute
+
+    def __init__(self, *args, compressed_field: str, **kwargs):
+        self.compressed_field = compressed_field
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["compressed_field"] = self.compressed_field
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        data = model_instance.__dict__
+        value = data.get(self.attname)
+        if value is None:
+            # not decompressed since it was loaded: the compressed value is saved as it is
+            return None
+        compressed = api_results.compress(value)
+        data[self.compressed_field] = compressed
+        return None if compressed is not None else value
@@ -0,0 +1,84 @@
+import hashlib
+import math
+import time
+
+from django.core.cache import cache
+
+from django_form_generator.common.utils import get_client_ip
+from django_form_generator.const import RateLimitBy
+
+
+class RateLimiter:
+    """Submissions of a client to a form, limited to `form.rate_limit` per `form.rate_limit_period` seconds.
+
+    Works like a bucket of `rate_limit` tokens refilled over `rate_limit_period`: the hits of the current and of the
+    previous period are counted with atomic `cache.incr` (shared by all the workers) and the previous period
+    counts for the part of it that is still inside the sliding period.
+    """
+
+    key_prefix = "FormRateLimit"
+
+    def __init__(self, form):
+        self.form_id = form.pk
+        self.limit = form.rate_limit
+        self.period = max(form.rate_limit_period or 0, 1)
+        self.by = form.rate_limit_by
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.limit)
+
+    def get_identity(self, request) -> str:
+        """User or session of the client, the IP address when the client has no session or isn't logged in."""
+        if self.by == RateLimitBy.USER:
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated:
+                return f"user:{user.pk}"
+        elif self.by == RateLimitBy.SESSION:
+            session = getattr(request, "session", None)
+            if session is not None and session.session_key:
+                return f"session:{session.session_key}"
+        return f"ip:{get_client_ip(request)}"
+
+    def _keys(self, request, now: float):
+        identity = hashlib.sha256(self.get_identity(request).encode()).hexdigest()[:32]
+        window = int(now // self.period)
+        prefix = f"{self.key_prefix}_{self.form_id}_{identity}"
+        return f"{prefix}_{window}", f"{prefix}_{window - 1}", now - window * self.period
+
+    def _retry_after(self, current: int, previous: int, elapsed: float) -> int | None:
+        weight = 1 - elapsed / self.period
+        if previous * weight + current <= self.limit:
+            return None
+        if current > self.limit or not previous:
+            wait = self.period - elapsed
+        else:
+            # until enough of the previous period slid out
+            wait = self.period * (1 - (self.limit - current) / previous) - elapsed
+        return max(1, math.ceil(wait))
+
+    def hit(self, request) -> int | None:
+        """Count a submission, return the seconds to wait when the client is over the limit (None when allowed)."""
+        if not self.enabled:
+            return None
+        current_key, previous_key, elapsed = self._keys(request, time.time())
+        cache.add(current_key, 0, self.period * 2)
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            # the key expired between add & incr
+            cache.set(current_key, 1, self.period * 2)
+            current = 1
+        return self._retry_after(current, cache.get(previous_key, 0), elapsed)
+
+    async def ahit(self, request) -> int | None:
+        if not self.enabled:
+            return None
+        current_key, previous_key, elapsed = self._keys(request, time.time())
+        await cache.aadd(current_key, 0, self.period * 2)
+        try:
+            current = await cache.aincr(current_key)
+        except ValueError:
+            await cache.aset(current_key, 1, self.period * 2)
+            current = 1
+        return self._retry_after(current, await cache.aget(previous_key, 0), elapsed)
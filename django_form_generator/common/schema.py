@@ -0,0 +1,184 @@
+import hashlib
+
+from django.core.cache import cache
+
+from django_form_generator.const import FieldGenre, Validator
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+DIALECT = "https://json-schema.org/draft/2020-12/schema"
+GENERATION_KEY = "FormSchemaGeneration"
+EMPTY = {"enum": [None, "", []]}
+
+FORMATS = {
+    FieldGenre.EMAIL: "email",
+    FieldGenre.DATE: "date",
+    FieldGenre.TIME: "time",
+    FieldGenre.DATETIME: "date-time",
+}
+# keywords of the validators for a string / an array value, `x-` keywords aren't part of JSON Schema
+VALIDATOR_KEYWORDS = {
+    Validator.MAX_LENGTH: ("maxLength", "maxItems"),
+    Validator.MIN_LENGTH: ("minLength", "minItems"),
+    Validator.MAX_VALUE: ("maximum", "maximum"),
+    Validator.MIN_VALUE: ("minimum", "minimum"),
+    Validator.REGEX: ("pattern", "pattern"),
+    Validator.FILE_EXTENTION: ("x-fileExtensions", "x-fileExtensions"),
+    Validator.FILE_SIZE: ("x-maxFileSize", "x-maxFileSize"),
+}
+
+
+def get_generation() -> int:
+    cache.add(GENERATION_KEY, 1, None)
+    return cache.get(GENERATION_KEY) or 1
+
+
+def invalidate(*args, **kwargs):
+    """Receiver of the changes of forms, fields, options & validators: every schema is built again.
+
+    A single generation is simpler than finding the forms that use a changed field or option, the definitions rarely change.
+    """
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 2, None)
+
+
+def get_version(form) -> str:
+    """Version of the schema of a form, used as its ETag."""
+    key = f"{form.pk}:{form.updated_at.isoformat()}:{get_generation()}"
+    return hashlib.sha256(key.encode()).hexdigest()[:20]
+
+
+def _validator_value(validator):
+    value = Validator(validator.validator).evaluate(validator.value)
+    if validator.validator == Validator.FILE_EXTENTION:
+        return [extension.strip().lower() for extension in value if extension.strip()]
+    if validator.validator == Validator.FILE_SIZE:
+        return int(value)
+    return value
+
+
+def build_field_schema(field) -> dict:
+    genre = field.genre
+    if genre in (FieldGenre.DROPDOWN, FieldGenre.RADIO):
+        schema = {"type": "integer"}
+    elif genre == FieldGenre.MULTI_CHECKBOX:
+        schema = {"type": "array", "items": {"type": "integer"}, "uniqueItems": True}
+    elif genre == FieldGenre.MULTI_TEXT_INPUT:
+        schema = {"type": "array", "items": {"type": "string"}}
+    elif genre == FieldGenre.NUMBER:
+        schema = {"type": "integer"}
+    elif genre == FieldGenre.CHECKBOX:
+        schema = {"type": "boolean"}
+    elif genre == FieldGenre.UPLOAD_FILE:
+        schema = {"type": "string", "contentEncoding": "binary"}
+    elif genre in FORMATS:
+        schema = {"type": "string", "format": FORMATS[genre]}
+    else:
+        schema = {"type": "string"}
+
+    if genre in FieldGenre.selectable_fields():
+        if field.async_options:
+            schema["x-optionsUrl"] = field.options_url
+        else:
+            options = list(field.get_choices().values_list("id", flat=True))
+            if genre == FieldGenre.MULTI_CHECKBOX:
+                schema["items"]["enum"] = options
+            else:
+                schema["enum"] = options
+
+    schema["title"] = field.label
+    if field.help_text:
+        schema["description"] = field.help_text
+    if field.default is not None:
+        schema["default"] = field.default
+    if field.read_only:
+        schema["readOnly"] = True
+    if field.write_only:
+        schema["writeOnly"] = True
+
+    messages = {}
+    for validator in field.validators.all():
+        if not validator.is_active:
+            continue
+        keyword = VALIDATOR_KEYWORDS[validator.validator][schema["type"] == "array"]
+        schema[keyword] = _validator_value(validator)
+        if validator.error_message:
+            messages[keyword] = validator.error_message
+    if messages:
+        schema["x-errorMessages"] = messages
+    return schema
+
+
+def _dependency(field, fields_by_option: dict, names: dict) -> dict | None:
+    """`if`/`then` rule that requires a dependent field only when its parent is answered (or has the option chosen)."""
+    parent = field.content_object
+    if parent is None:
+        return None
+    if field.content_type.model == "option":
+        parent_field = fields_by_option.get(field.object_id)
+        if parent_field is None:
+            return None
+        if parent_field.genre == FieldGenre.MULTI_CHECKBOX:
+            condition = {"contains": {"const": field.object_id}}
+        else:
+            condition = {"const": field.object_id}
+        parent_name = parent_field.name
+    else:
+        if parent.pk not in names:
+            return None
+        parent_name = names[parent.pk]
+        condition = {"not": EMPTY}
+    return {
+        "if": {"properties": {parent_name: condition}, "required": [parent_name]},
+        "then": {"required": [field.name]},
+    }
+
+
+def build_schema(form) -> dict:
+    """JSON Schema of the submitted data of a form: the fields, their validators, whether they are required
+    & the dependencies between them."""
+    fields = list(form.get_fields().prefetch_related("validators").select_related("content_type"))
+    names = {field.pk: field.name for field in fields}
+    fields_by_option = {}
+    for field in fields:
+        if field.genre in FieldGenre.selectable_fields():
+            for option_id in field.options.values_list("id", flat=True):
+                fields_by_option[option_id] = field
+
+    schema = {
+        "$schema": DIALECT,
+        "title": form.title,
+        "type": "object",
+        "properties": {},
+        "required": [],
+    }
+    rules = []
+    for field in fields:
+        schema["properties"][field.name] = build_field_schema(field)
+        if not field.is_required or field.genre == FieldGenre.CAPTCHA:
+            continue
+        if field.genre == FieldGenre.CHECKBOX:
+            # a required checkbox must be checked
+            schema["properties"][field.name]["const"] = True
+        if field.content_object is None:
+            schema["required"].append(field.name)
+        else:
+            rule = _dependency(field, fields_by_option, names)
+            if rule is not None:
+                rules.append(rule)
+    if rules:
+        schema["allOf"] = rules
+    return schema
+
+
+def get_schema(form) -> tuple[str, dict]:
+    """The version & the schema of a form, the schema is cached until the form (or one of its parts) changes."""
+    version = get_version(form)
+    key = f"FormSchema_{form.pk}_{version}"
+    schema = cache.get(key)
+    if schema is None:
+        schema = build_schema(form)
+        cache.set(key, schema, fg_settings.SCHEMA_CACHE_TIMEOUT)
+    return version, schema
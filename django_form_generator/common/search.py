@@ -0,0 +1,131 @@
+import re
+
+from django.db import connections, models, router, transaction
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from django_form_generator.const import FieldGenre, SearchBackend
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+MAX_TOKEN_LENGTH = 100
+TERM_RE = re.compile(r"[\w@.+-]+")
+SEPARATORS_RE = re.compile(r"[@.+-]+")
+# sorts after every character of the tokens: `word <= token < word + PREFIX_END` is `token.startswith(word)`
+PREFIX_END = "\uffff"
+
+
+def _token_model():
+    return import_string("django_form_generator.models.FormResponseSearchToken")
+
+
+def get_backend(model=None) -> str:
+    backend = fg_settings.SEARCH_BACKEND
+    if backend != SearchBackend.AUTO:
+        return backend
+    model = model or import_string("django_form_generator.models.FormResponse")
+    vendor = connections[router.db_for_read(model)].vendor
+    return SearchBackend.POSTGRES if vendor == "postgresql" else SearchBackend.TOKENS
+
+
+def uses_tokens(model=None) -> bool:
+    """Whether the responses are indexed in the token table, `SEARCH_INDEX_ENABLED` and not on the postgres backend
+    (it searches the `search_text` column of the responses)."""
+    return fg_settings.SEARCH_INDEX_ENABLED and get_backend(model) == SearchBackend.TOKENS
+
+
+def build_search_text(data: list | None) -> str:
+    """Text of the searchable (text like) values of a response."""
+    values = []
+    for item in data or []:
+        if item["genre"] not in FieldGenre.searchable_fields() or item["value"] in (None, "", "None"):
+            continue
+        if isinstance(item["value"], list):
+            values.extend(str(value) for value in item["value"])
+        else:
+            values.append(str(item["value"]))
+    return "\n".join(values).lower()
+
+
+def terms(text: str) -> list[str]:
+    return [term[:MAX_TOKEN_LENGTH] for term in TERM_RE.findall(text.lower())]
+
+
+def tokenize(text: str) -> set[str]:
+    """Words of a text, `john.doe@example.com` is indexed as itself and as `john`, `doe`, `example` & `com`."""
+    tokens = set()
+    for term in terms(text):
+        tokens.add(term)
+        tokens.update(part for part in SEPARATORS_RE.split(term) if part)
+    return tokens
+
+
+@transaction.atomic
+def index_response(response):
+    """Update the token table of a response (the search text is saved with the response), see `uses_tokens`."""
+    FormResponseSearchToken = _token_model()
+    FormResponseSearchToken.objects.filter(response=response).delete()
+    FormResponseSearchToken.objects.bulk_create(
+        [FormResponseSearchToken(response=response, token=token) for token in tokenize(response.search_text)]
+    )
+
+
+def search(queryset: models.QuerySet, text: str) -> models.QuerySet:
+    """Responses of `queryset` that have a searchable value starting with every word of `text`."""
+    words = terms(text)
+    if not words:
+        return queryset
+    if get_backend(queryset.model) == SearchBackend.POSTGRES:
+        # every word as a prefix, see the index of the `0010_formresponse_search` migration
+        query = " & ".join(f"{word}:*" for word in words)
+        table = queryset.model._meta.db_table
+        return queryset.filter(RawSQL(
+            f"to_tsvector('simple', \"{table}\".\"search_text\") @@ to_tsquery('simple', %s)",
+            (query,),
+            output_field=models.BooleanField(),
+        ))
+
+    if not fg_settings.SEARCH_INDEX_ENABLED:
+        # no token table: the search text of every response is read
+        for word in words:
+            queryset = queryset.filter(search_text__contains=word)
+        return queryset
+
+    FormResponseSearchToken = _token_model()
+    for word in words:
+        # a range instead of `startswith`: `LIKE 'word%'` can't use the index of the tokens (SQLite scans the table)
+        tokens = FormResponseSearchToken.objects.filter(token__gte=word, token__lt=word + PREFIX_END)
+        queryset = queryset.filter(pk__in=tokens.values("response_id"))
+    return queryset
+
+
+def rebuild(queryset, chunk_size: int = 1000) -> int:
+    count = 0
+    batch = []
+    for response in queryset.iterator(chunk_size):
+        response.search_text = build_search_text(response.data)
+        batch.append(response)
+        if len(batch) >= chunk_size:
+            count += _rebuild_batch(batch)
+            batch = []
+    if batch:
+        count += _rebuild_batch(batch)
+    return count
+
+
+@transaction.atomic
+def _rebuild_batch(responses) -> int:
+    model = type(responses[0])
+    model.objects.bulk_update(responses, ["search_text"])
+    if uses_tokens(model):
+        FormResponseSearchToken = _token_model()
+        FormResponseSearchToken.objects.filter(response__in=responses).delete()
+        FormResponseSearchToken.objects.bulk_create(
+            [
+                FormResponseSearchToken(response=response, token=token)
+                for response in responses
+                for token in tokenize(response.search_text)
+            ],
+            batch_size=1000,
+        )
+    return len(responses)
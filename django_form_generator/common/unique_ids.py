@@ -0,0 +1,47 @@
+import os
+import threading
+import time
+import uuid
+
+from django_form_generator.const import UniqueIDVersion
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+_lock = threading.Lock()
+# (milliseconds, counter) of the last UUIDv7 of this process
+_last = (0, 0)
+
+
+def uuid7(milliseconds: int | None = None) -> uuid.UUID:
+    """A time ordered UUID (RFC 9562 version 7): 48 bits of unix time in milliseconds, a 12 bits counter & 62 random bits.
+
+    The counter starts at a random value every millisecond & is incremented for the UUIDs of the same millisecond,
+    so the UUIDs of a process are increasing (the time moves forward by a millisecond when the counter overflows).
+    """
+    global _last
+    if milliseconds is None:
+        milliseconds = time.time_ns() // 1_000_000
+    random = int.from_bytes(os.urandom(10), "big")
+    with _lock:
+        last_milliseconds, counter = _last
+        if milliseconds > last_milliseconds:
+            # the top bit is left clear, so the counter has room to grow
+            counter = (random >> 62) & 0x7FF
+        else:
+            milliseconds = last_milliseconds
+            counter += 1
+            if counter > 0xFFF:
+                milliseconds += 1
+                counter = 0
+        _last = (milliseconds, counter)
+    value = (milliseconds & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76 | counter << 64
+    value |= 0b10 << 62 | random & 0x3FFF_FFFF_FFFF_FFFF
+    return uuid.UUID(int=value)
+
+
+def new_unique_id() -> uuid.UUID:
+    """`unique_id` of a new response, by `UNIQUE_ID_VERSION`."""
+    if fg_settings.UNIQUE_ID_VERSION == UniqueIDVersion.UUID7:
+        return uuid7()
+    return uuid.uuid4()
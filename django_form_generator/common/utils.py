@@ -1,4 +1,8 @@
+import asyncio
+import functools
+import ipaddress
 import requests
+import time
 import uuid
 import os
 import ast
@@ -12,9 +16,17 @@ from django.utils.translation import gettext as _
 from django.core.validators import BaseValidator
 from django.utils.module_loading import import_string
 from django.db import models
+from asgiref.sync import sync_to_async
 
-from django_form_generator.const import FormAPIManagerMethod, FieldLookupType, FieldGenre
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from django_form_generator.const import FormAPIManagerMethod, FieldLookupType, APICallOutcome
 from django_form_generator.settings import form_generator_settings as fg_settings
+from django_form_generator.common import fast_json
+from django_form_generator.common.metrics import measure
 
 
 FILE_UPLOAD_DIRECTORY = os.path.join(settings.MEDIA_ROOT, 'django_form_generator')
@@ -34,17 +46,67 @@ def upload_file_handler(f):
     return dest
 
 
+MEMO_ATTRIBUTE = "_form_generator_memo"
+
+
+def request_memo(request) -> dict:
+    """Values computed once per request (forms looked up by the template tags, results of the apis, ...)."""
+    if request is None:
+        return {}
+    # a DRF request & its django request share the memo
+    request = getattr(request, "_request", request)
+    memo = getattr(request, MEMO_ATTRIBUTE, None)
+    if memo is None:
+        memo = {}
+        setattr(request, MEMO_ATTRIBUTE, memo)
+    return memo
+
+
+def memoize(request, key, factory):
+    memo = request_memo(request)
+    if key not in memo:
+        memo[key] = factory()
+    return memo[key]
+
+
+@functools.lru_cache(maxsize=8)
+def _proxy_networks(proxies: tuple) -> tuple:
+    return tuple(ipaddress.ip_network(proxy, strict=False) for proxy in proxies)
+
+
+def _is_trusted_proxy(address, networks) -> bool:
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def can_preview(user) -> bool:
+    """Staff members & superusers also see the forms that aren't valid (draft, expired, full), to preview them."""
+    return getattr(user, "is_staff", False) or getattr(user, "is_superuser", False)
+
+
 def get_client_ip(request):
-    """get the client IP address"""
-    remote_address = request.META.get('REMOTE_ADDR')
-    ip = remote_address
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        proxies = x_forwarded_for.split(',')
-        while (len(proxies) > 0):
-            proxies.pop(0)
-        if len(proxies) > 0:
-            ip = proxies[0]
+    """get the client IP address
+
+    `REMOTE_ADDR`, or when the request comes from one of the `TRUSTED_PROXIES` the rightmost address of
+    `X-Forwarded-For` that wasn't added by a trusted proxy (the addresses on its left are sent by the client).
+    """
+    ip = request.META.get('REMOTE_ADDR')
+    networks = _proxy_networks(tuple(fg_settings.TRUSTED_PROXIES))
+    if not networks or not _is_trusted_proxy(ip, networks):
+        return ip
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR') or ''
+    for address in reversed([address.strip() for address in x_forwarded_for.split(',')]):
+        try:
+            ipaddress.ip_address(address)
+        except ValueError:
+            # not an address: the last trusted proxy is the closest known hop
+            break
+        ip = address
+        if not _is_trusted_proxy(address, networks):
+            break
     return ip
 
 
@@ -58,10 +120,15 @@ def evaluate_data(data: str, replace_with: dict|list) -> str | list:
     Returns:
         str: 'hello john doe'
     """
+    with measure("evaluate_data", sender=evaluate_data):
+        return _evaluate_data(data, replace_with)
+
+
+def _evaluate_data(data: str, replace_with: dict|list) -> str | list:
     if isinstance(replace_with, list):
         l_data = []
         for item in replace_with:
-            l_data.append(evaluate_data(data, item))
+            l_data.append(_evaluate_data(data, item))
         return l_data
     elif isinstance(replace_with, dict):
         if fg_settings.FORM_EVALUATIONS['form_data'] in data:
@@ -78,28 +145,116 @@ class APICall:
     body = None
     status_code = None
     result = None
+    duration: float = 0.0
+    payload_size: int = 0
+    outcome: APICallOutcome | None = None
 
     def __init__(self, method, url, body: str|None=None, data_response: dict|list|None=None, **kwargs):
         request = getattr(requests, method)
-        if data_response is not None:
-            url = evaluate_data(url, data_response)
+        url, body = self._prepare(method, url, body, data_response)
+        start = time.perf_counter()
         if method == FormAPIManagerMethod.GET:
             response = request(url, **kwargs)
         else:
-            if data_response is not None:
-                self.body = body = evaluate_data(body, data_response) #type: ignore
             response = request(url, data=body, **kwargs)
+        self.duration = time.perf_counter() - start
+        self._set_response(response)
+
+    def _prepare(self, method, url, body, data_response):
+        if data_response is not None:
+            url = evaluate_data(url, data_response)
+            if method != FormAPIManagerMethod.GET:
+                self.body = body = evaluate_data(body, data_response) #type: ignore
+        return url, body
+
+    def _set_response(self, response):
+        """`response` is a `requests` or `httpx` response."""
+        ok = response.status_code < 400
+        self.payload_size = len(response.content)
         try:
-            result = response.json()
+            result = fast_json.loads(response.content)
             self.result: dict = result
+            self.outcome = APICallOutcome.SUCCESS if ok else APICallOutcome.HTTP_ERROR
         except Exception as e:
-            self.result: dict = {"error": response.reason}
+            self.result: dict = {"error": getattr(response, "reason", None) or getattr(response, "reason_phrase", "")}
+            self.outcome = APICallOutcome.INVALID_JSON if ok else APICallOutcome.HTTP_ERROR
         self.status_code: int = response.status_code
 
     def get_result(self) -> tuple[int, dict, dict]:
         return  self.status_code, self.result, self.body
 
 
+class AsyncAPICall(APICall):
+    """Non-blocking `APICall`, use `await AsyncAPICall.call(...)`.
+
+    `httpx` is used when it's installed otherwise the blocking call runs in a thread.
+    """
+
+    def __init__(self):
+        pass
+
+    @classmethod
+    async def call(cls, method, url, body: str|None=None, data_response: dict|list|None=None, **kwargs):
+        if httpx is None:
+            return await sync_to_async(APICall, thread_sensitive=False)(method, url, body, data_response, **kwargs)
+
+        self = cls()
+        url, body = self._prepare(method, url, body, data_response)
+        if method != FormAPIManagerMethod.GET:
+            kwargs["content"] = body
+        start = time.perf_counter()
+        client = await _get_async_client()
+        response = await client.request(method.upper(), url, **kwargs)
+        self.duration = time.perf_counter() - start
+        self._set_response(response)
+        return self
+
+
+_async_clients = {}
+
+
+async def _get_async_client():
+    """A shared `httpx.AsyncClient` (connection pool) per event loop, the clients of the closed loops are closed
+    when a new one is created."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        # kept before closing the others: the other calls of the loop get it while they are closed
+        client = _async_clients[loop] = httpx.AsyncClient()
+        for old_client in [_async_clients.pop(l) for l in list(_async_clients) if l.is_closed()]:
+            try:
+                await old_client.aclose()
+            except RuntimeError:
+                # a connection that can't be closed without its loop, it's dropped with the client
+                pass
+    return client
+
+
+# errors of the http clients that mean the api could not be reached
+API_CALL_ERRORS: tuple[type[Exception], ...] = (requests.RequestException,)
+if httpx is not None:
+    API_CALL_ERRORS += (httpx.HTTPError,)
+
+
+async def gather_or_cancel(*coroutines) -> list:
+    """`asyncio.gather` that cancels the other coroutines as soon as one of them raises (like a `TaskGroup`
+    of python 3.11), so an api error doesn't leave the other api calls of the request running."""
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+@functools.cache
+def _codec_lookup():
+    # `common.genres` imports this module (through `common.helpers`), it's resolved on the first use
+    return import_string('django_form_generator.common.genres.get_codec')
+
+
 class FileSizeValidator(BaseValidator):
 
     def compare(self, file_, limit_value):
@@ -119,12 +274,13 @@ class FilterMixin:
             value = ast.literal_eval(value)
         except (ValueError, SyntaxError):
             value = str(value)
+        coerce = _codec_lookup()(genre).coerce
         if isinstance(value, (list, tuple)):
             temp_val = []
             for v in value:
-                temp_val.append(FieldGenre(genre).evaluate(v, regex=True))
+                temp_val.append(coerce(v))
         else:
-            temp_val = FieldGenre(genre).evaluate(value, regex=True)
+            temp_val = coerce(value)
         return temp_val
 
     def _evaluate_filter(self, field_id:int, index: int, value: Any, field_lookup: str) -> models.Q:
@@ -158,6 +314,10 @@ class FilterMixin:
 
 
     def get_lookups(self, request) -> tuple[models.Q, dict]:
+        with measure("filter_compile", sender=self.__class__):
+            return self._get_lookups(request)
+
+    def _get_lookups(self, request) -> tuple[models.Q, dict]:
         form_id ,field_ids ,field_lookups ,operands ,values = self.get_parameters(request)
         if form_id:
             form_id = int(form_id)
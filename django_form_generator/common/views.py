@@ -1,5 +1,176 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from rest_framework import exceptions, status
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.http import Http404
+from django.contrib import messages
+from django.http import Http404, HttpResponse
+from django.http.response import HttpResponseRedirectBase
+from django.shortcuts import render
+from django.utils.translation import gettext as _
+
+from django_form_generator.api.parsers import FastJSONParser
+from django_form_generator.api.renderers import FastJSONRenderer
+from django_form_generator.common import fast_json, idempotency
+from django_form_generator.common.metrics import measure
+from django_form_generator.common.rate_limit import RateLimiter
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+class MeasureRenderMixin:
+    """Render template responses eagerly so the rendering time can be measured."""
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        with measure("render", sender=self.__class__, view=self.__class__.__name__):
+            response.render()
+        return response
+
+
+class HtmxErrorSwapsMixin:
+    """Answer an invalid htmx submission with out-of-band swaps of the form errors & of the fields with errors
+    (and of the fields that had errors before) instead of rendering the whole form again.
+
+    The other fields aren't rendered, so what the user typed in them (and the selected files) is kept.
+    """
+
+    errors_template_name = "django_form_generator/form_errors.html"
+
+    def use_error_swaps(self) -> bool:
+        return fg_settings.HTMX_ERROR_SWAPS and self.request.headers.get("HX-Request") == "true"
+
+    def process_invalid(self, form):
+        if not self.use_error_swaps():
+            messages.success(self.request, str(form.errors), "danger")
+        return self.form_invalid(form)
+
+    def form_invalid(self, form):
+        if not self.use_error_swaps():
+            return super().form_invalid(form)
+        names = set(form.invalid_fields).union(self.request.POST.get(form.invalid_fields_name, "").split())
+        context = {
+            "form": form,
+            "errors": form.get_context()["errors"],
+            "fields": [form[name] for name in form.fields if name in names and not form.fields[name].widget.is_hidden],
+        }
+        with measure("render", sender=self.__class__, view=self.__class__.__name__):
+            response = render(self.request, self.errors_template_name, context)
+        # only the out-of-band swaps are applied, the form stays as it is
+        response["HX-Reswap"] = "none"
+        return response
+
+
+class IdempotencyMixin:
+    """Process a submission once per idempotency key, duplicates get the outcome of the first request."""
+
+    replayed_header = "Idempotent-Replayed"
+
+    def idempotency_outcome(self, response) -> dict | None:
+        raise NotImplementedError
+
+    def idempotency_replay(self, outcome: dict):
+        raise NotImplementedError
+
+    def get_idempotency_conflict_message(self):
+        return _("This submission is already in progress.")
+
+    def idempotent(self, request, process):
+        return idempotency.idempotent(request, process, self.idempotency_outcome, self.idempotency_replay)
+
+    async def aidempotent(self, request, process):
+        return await idempotency.aidempotent(request, process, self.idempotency_outcome, self.idempotency_replay)
+
+
+class IdempotentFormViewMixin(IdempotencyMixin):
+    """Add an idempotency key to the rendered form & replay the redirect of a successful submission."""
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["idempotency_field_name"] = fg_settings.IDEMPOTENCY_FIELD_NAME
+        context["idempotency_key"] = idempotency.new_key()
+        return context
+
+    def idempotency_outcome(self, response):
+        if not isinstance(response, HttpResponseRedirectBase):
+            return None  # the form was re-rendered with its errors
+        headers = {key: value for key, value in response.items() if key.lower() != "set-cookie"}
+        return {"status": response.status_code, "headers": headers}
+
+    def idempotency_replay(self, outcome):
+        if outcome["state"] == idempotency.IN_PROGRESS:
+            return HttpResponse(self.get_idempotency_conflict_message(), status=status.HTTP_409_CONFLICT)
+        response = HttpResponse(status=outcome["status"], headers=outcome["headers"])
+        response[self.replayed_header] = "true"
+        return response
+
+
+class IdempotentAPIViewMixin(IdempotencyMixin):
+    """Replay the status & data of a successful submission to an api view (only the status to the callers that
+    aren't identified by their user or session)."""
+
+    def idempotency_outcome(self, response):
+        if not status.is_success(response.status_code):
+            return None
+        return {"status": response.status_code, "data": response.data}
+
+    def idempotency_replay(self, outcome):
+        if outcome["state"] == idempotency.IN_PROGRESS:
+            return Response({"detail": self.get_idempotency_conflict_message()}, status=status.HTTP_409_CONFLICT)
+        return Response(outcome.get("data"), status=outcome["status"], headers={self.replayed_header: "true"})
+
+
+class RateLimitMixin:
+    """Check the rate limit of a form before the submission is validated."""
+
+    def get_rate_limit_message(self, retry_after: int):
+        return _("Too many submissions, please try again in %(seconds)s seconds.") % {"seconds": retry_after}
+
+
+class RateLimitFormViewMixin(RateLimitMixin):
+    rate_limited_template_name = "django_form_generator/rate_limited.html"
+
+    def rate_limited(self, form) -> HttpResponse | None:
+        retry_after = RateLimiter(form).hit(self.request)
+        return None if retry_after is None else self.rate_limited_response(retry_after)
+
+    async def arate_limited(self, form) -> HttpResponse | None:
+        retry_after = await RateLimiter(form).ahit(self.request)
+        return None if retry_after is None else self.rate_limited_response(retry_after)
+
+    def rate_limited_response(self, retry_after: int):
+        response = render(
+            self.request,
+            self.rate_limited_template_name,
+            {"message": self.get_rate_limit_message(retry_after), "retry_after": retry_after},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+        response["Retry-After"] = str(retry_after)
+        if self.request.headers.get("HX-Request"):
+            # htmx only swaps 2xx responses: show the error above the form & keep what the user typed
+            response.status_code = status.HTTP_200_OK
+            response["HX-Retarget"] = "#hx-django_form_generator"
+            response["HX-Reswap"] = "afterbegin"
+        return response
+
+
+class RateLimitAPIViewMixin(RateLimitMixin):
+
+    def get_rate_limit_message(self, retry_after: int):
+        # `Throttled` adds the seconds to wait
+        return _("Too many submissions.")
+
+    def check_rate_limit(self, form):
+        retry_after = RateLimiter(form).hit(self.request)
+        if retry_after is not None:
+            raise exceptions.Throttled(retry_after, self.get_rate_limit_message(retry_after))
+
+    async def acheck_rate_limit(self, form):
+        retry_after = await RateLimiter(form).ahit(self.request)
+        if retry_after is not None:
+            raise exceptions.Throttled(retry_after, self.get_rate_limit_message(retry_after))
 
 
 class BaseAPIView(APIView):
@@ -18,4 +189,72 @@ class BaseAPIView(APIView):
         try:
             return self.get_queryset().get(**{self.lookup_field: arg})
         except self.model.DoesNotExist:
-            raise Http404
\ No newline at end of file
+            raise Http404
+
+    def get_renderers(self):
+        """The renderers of the project, with the fast JSON renderer in place of `JSONRenderer`."""
+        renderers = super().get_renderers()
+        if fast_json.is_enabled():
+            renderers = [FastJSONRenderer() if type(renderer) is JSONRenderer else renderer for renderer in renderers]
+        return renderers
+
+    def get_parsers(self):
+        parsers = super().get_parsers()
+        if fast_json.is_enabled():
+            parsers = [FastJSONParser() if type(parser) is JSONParser else parser for parser in parsers]
+        return parsers
+
+
+class AsyncDetailMixin:
+    """Load the object of a `DetailView` with the async ORM."""
+
+    async def aget_object(self):
+        queryset = await sync_to_async(self.get_queryset)()
+        pk = self.kwargs.get(self.pk_url_kwarg)
+        if pk is not None:
+            lookup = {"pk": pk}
+        else:
+            lookup = {self.get_slug_field(): self.kwargs.get(self.slug_url_kwarg)}
+        try:
+            return await queryset.aget(**lookup)
+        except queryset.model.DoesNotExist:
+            raise Http404(
+                _("No %(verbose_name)s found matching the query")
+                % {"verbose_name": queryset.model._meta.verbose_name}
+            )
+
+
+class AsyncAPIViewMixin:
+    """Let a `BaseAPIView` have `async` handlers (DRF only dispatches sync handlers).
+
+    Authentication, permissions & throttling run in a thread, the handler runs on the event loop.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            if asyncio.iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = await sync_to_async(self.handle_exception)(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aget_object(self, arg):
+        try:
+            return await self.get_queryset().aget(**{self.lookup_field: arg})
+        except self.model.DoesNotExist:
+            raise Http404
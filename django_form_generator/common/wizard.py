@@ -0,0 +1,70 @@
+import uuid
+
+from django.core.cache import cache
+from django.http import QueryDict
+
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+FIELD_NAME = "wizard"
+# {form_id: token} of the wizards started by a session
+SESSION_KEY = "form_generator_wizards"
+
+
+class WizardState:
+    """Answers of the finished steps of a wizard form, kept in the cache between the requests of the steps.
+
+    Every step keeps the submitted data (to show it again & to resolve the dependencies of the next steps)
+    and the cleaned data (to assemble the response when the last step is submitted).
+    """
+
+    key_prefix = "FormWizard"
+
+    def __init__(self, form_id: int, token: str | None = None):
+        if not token or not isinstance(token, str) or not token.isalnum() or len(token) > 64:
+            token = uuid.uuid4().hex
+        self.token = token
+        self.cache_key = f"{self.key_prefix}_{form_id}_{token}"
+        self.steps: dict = cache.get(self.cache_key) or {}
+
+    @classmethod
+    def from_request(cls, request, form_id: int):
+        """The wizard of the token sent by the request, only when it was started by the session of the request
+        (the token travels in the forms & urls), a new wizard otherwise."""
+        token = request.POST.get(FIELD_NAME) or request.GET.get(FIELD_NAME)
+        tokens = request.session.get(SESSION_KEY, {})
+        if not token or tokens.get(str(form_id)) != token:
+            token = None
+        state = cls(form_id, token)
+        if state.token != token:
+            request.session[SESSION_KEY] = {**tokens, str(form_id): state.token}
+        return state
+
+    def is_done(self, step: int) -> bool:
+        return step in self.steps
+
+    def first_missing_step(self, count: int) -> int | None:
+        return next((step for step in range(count) if step not in self.steps), None)
+
+    def get_data(self, step: int | None = None, exclude: int | None = None) -> QueryDict:
+        """Submitted data of a step (of every step but `exclude` when `step` is None)."""
+        data = QueryDict(mutable=True)
+        for index, state in sorted(self.steps.items()):
+            if (step is None and index != exclude) or index == step:
+                for key, values in state["data"].items():
+                    data.setlist(key, values)
+        return data
+
+    def get_cleaned_data(self) -> dict:
+        cleaned_data = {}
+        for _, state in sorted(self.steps.items()):
+            cleaned_data.update(state["cleaned_data"])
+        return cleaned_data
+
+    def save_step(self, step: int, data: dict, cleaned_data: dict):
+        self.steps[step] = {"data": data, "cleaned_data": cleaned_data}
+        cache.set(self.cache_key, self.steps, fg_settings.WIZARD_TIMEOUT)
+
+    def delete(self):
+        self.steps = {}
+        cache.delete(self.cache_key)
@@ -1,3 +1,6 @@
+import functools
+import re
+
 from django.db.models import TextChoices
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
@@ -39,85 +42,13 @@ class FieldGenre(TextChoices):
     def selectable_fields(cls):
         return [cls.DROPDOWN, cls.RADIO, cls.MULTI_CHECKBOX]
 
-    def evaluate(self, value, **kwargs):
-        return getattr(self, "eval_" + self.name.lower())(value, **kwargs)
-
-    def eval_text_input(self, value, **kwargs):
-        if value is None or value == '':
-            return None
-        return str(value)
-
-    def eval_multi_text_input(self, value, **kwargs):
-        if value is None or value == '':
-            return []
-        if isinstance(value, list):
-            return [str(val) for val in value]
-        else:
-            return []
-
-    def eval_text_area(self, value, **kwargs):
-        if value is None or value == '':
-            return value
-        return self.eval_text_input(value)
-
-    def eval_number(self, value, **kwargs):
-        if value is None or value == '':
-            return None
-        return int(value)
-
-    def eval_dropdown(self, value, **kwargs):
-        if kwargs.get('regex'):
-            return self.eval_text_input(value)
-        return self.eval_number(value)
-
-    def eval_date(self, value, **kwargs):
-        return self.eval_text_input(value)
-
-    def eval_time(self, value, **kwargs):
-        return self.eval_text_input(value)
-
-    def eval_datetime(self, value, **kwargs):
-        return self.eval_text_input(value)
-
-    def eval_email(self, value, **kwargs):
-        return self.eval_text_input(value)
-
-    def eval_password(self, value, **kwargs):
-        return self.eval_text_input(value)
-
-    def eval_checkbox(self, value, **kwargs):
-        return bool(value)
-
-    def eval_multi_checkbox(self, value, **kwargs):
-        if value is None or value == '':
-            return []
-        if isinstance(value, list):
-            return [int(val) for val in value]
-        else:
-            return []
-
-    def eval_radio(self, value, **kwargs):
-        if kwargs.get('regex'):
-            return self.eval_text_input(value)
-        return self.eval_number(value)
-
-    def eval_hidden(self, value, **kwargs):
-        return self.eval_text_input(value)
-
-    def eval_captcha(self, value, **kwargs):
-        return None
-
-    def eval_upload_file(self, value, **kwargs):
-        FileFieldHelper = import_string('django_form_generator.common.helpers.FileFieldHelper')
+    @classmethod
+    def searchable_fields(cls):
+        return [cls.TEXT_INPUT, cls.TEXT_AREA, cls.EMAIL, cls.MULTI_TEXT_INPUT, cls.HIDDEN]
 
-        if (
-            value is not None
-            and not isinstance(value, dict)
-        ):
-            return FileFieldHelper.upload_file(
-                kwargs['host'], value, kwargs['instance_directory']
-            )
-        return  value
+    def evaluate(self, value, **kwargs):
+        """Stored value of a submitted value, see `common.genres` for the codecs of the genres."""
+        return _codec_lookup()(self).encode(value, **kwargs)
 
 
 class FormAPIManagerMethod(TextChoices):
@@ -132,6 +63,46 @@ class FormAPIManagerExecuteTime(TextChoices):
     PRE_LOAD = 'pre_load', _('Pre load')
     POST_LOAD = 'post_load', _('Post load')
 
+class APICallOutcome(TextChoices):
+    SUCCESS = 'success', _('Success')
+    HTTP_ERROR = 'http_error', _('HTTP error')
+    INVALID_JSON = 'invalid_json', _('Invalid JSON')
+    EXCEPTION = 'exception', _('Exception')
+
+class APIFallback(TextChoices):
+    SKIP = 'skip', _('Skip the api')
+    CACHE = 'cache', _('Use the last successful result')
+    FAIL = 'fail', _('Fail the submit')
+
+class APIUpdateTrigger(TextChoices):
+    ALWAYS = 'always', _('Always')
+    CHANGED_FIELDS = 'changed_fields', _('When a field of its url or body changed')
+    NEVER = 'never', _('Never')
+
+class APIResponseStorage(TextChoices):
+    NONE = 'none', _('Nothing')
+    STATUS = 'status', _('Status code only')
+    KEYS = 'keys', _('Selected keys')
+    FULL = 'full', _('Full response')
+
+class RateLimitBy(TextChoices):
+    IP = 'ip', _('IP Address')
+    SESSION = 'session', _('Session')
+    USER = 'user', _('User')
+
+class PreAPILoading(TextChoices):
+    LAZY = 'lazy', _('Lazy')
+    BACKGROUND = 'background', _('Background')
+
+class SearchBackend(TextChoices):
+    AUTO = 'auto', _('Auto')
+    POSTGRES = 'postgres', _('Postgres full-text')
+    TOKENS = 'tokens', _('Token table')
+
+class UniqueIDVersion(TextChoices):
+    UUID4 = 'uuid4', _('Random (UUIDv4)')
+    UUID7 = 'uuid7', _('Time ordered (UUIDv7)')
+
 class FieldPosition(TextChoices):
     INLINE = 'inline', _('In-line')
     INORDER = 'inorder', _('In-Order')
@@ -156,26 +127,11 @@ class Validator(TextChoices):
     FILE_EXTENTION = 'file-extention', _('File extention')
     FILE_SIZE = 'file-size', _('File size (MB)')
 
-    @classmethod
-    def __validators_map(cls):
-        FileSizeValidator = import_string('django_form_generator.common.utils.FileSizeValidator')
-
-        validators_map = {
-        cls.MAX_LENGTH: MaxLengthValidator,
-        cls.MIN_LENGTH: MinLengthValidator,
-        cls.MAX_VALUE: MaxValueValidator,
-        cls.MIN_VALUE: MinValueValidator,
-        cls.REGEX: RegexValidator,
-        cls.FILE_EXTENTION: FileExtensionValidator,
-        cls.FILE_SIZE: FileSizeValidator,
-        }
-        return validators_map
-
     def clean(self, value):
-        getattr(self, "clean_" + self.name.lower())(value)
+        _VALIDATOR_CLEANERS[self](self, value)
 
     def evaluate(self, value):
-        return getattr(self, "eval_" + self.name.lower())(value)
+        return _VALIDATOR_EVALUATORS[self](self, value)
 
     def eval_max_length(self, value):
         return int(value)
@@ -189,6 +145,9 @@ class Validator(TextChoices):
     def eval_min_value(self, value):
         return int(value)
 
+    def eval_regex(self, value):
+        return value
+
     def eval_file_extention(self, value):
         return value.split(',')
 
@@ -210,6 +169,12 @@ class Validator(TextChoices):
     def clean_min_value(self, value):
         self.clean_max_length(value)
 
+    def clean_regex(self, value):
+        try:
+            re.compile(value)
+        except re.error:
+            raise ValidationError(_("Value for %s should be a valid regular expression") % self.label)
+
     def clean_file_extention(self, value):
         if ',' not in value and len(value.split(' ')) > 1:
             raise ValidationError(_('Separate values with comma for %s like: jpg,png,...') % self.label)
@@ -222,7 +187,33 @@ class Validator(TextChoices):
 
     def validate(self, value, error_message=None):
         value = self.evaluate(value)
-        return self.__validators_map()[self](value, error_message)
+        return _validator_classes()[self](value, error_message)
+
+
+# the methods of the validators, resolved once instead of on every call
+_VALIDATOR_EVALUATORS = {validator: getattr(Validator, "eval_" + validator.name.lower()) for validator in Validator}
+_VALIDATOR_CLEANERS = {validator: getattr(Validator, "clean_" + validator.name.lower()) for validator in Validator}
+
+
+@functools.cache
+def _codec_lookup():
+    # `common.genres` imports this module, it's resolved on the first use
+    return import_string('django_form_generator.common.genres.get_codec')
+
+
+@functools.cache
+def _validator_classes():
+    FileSizeValidator = import_string('django_form_generator.common.utils.FileSizeValidator')
+
+    return {
+        Validator.MAX_LENGTH: MaxLengthValidator,
+        Validator.MIN_LENGTH: MinLengthValidator,
+        Validator.MAX_VALUE: MaxValueValidator,
+        Validator.MIN_VALUE: MinValueValidator,
+        Validator.REGEX: RegexValidator,
+        Validator.FILE_EXTENTION: FileExtensionValidator,
+        Validator.FILE_SIZE: FileSizeValidator,
+    }
 
 
 class CacheMethod(TextChoices):
@@ -0,0 +1,17 @@
+from django.utils.translation import gettext_lazy as _
+
+
+class FormAPIError(Exception):
+    """Raised when an api with `fail` fallback could not be called while submitting a form."""
+
+    default_message = _("The form could not be submitted at the moment, please try again later.")
+
+    def __init__(self, api, reason: str | None = None, message=None):
+        self.api = api
+        self.reason = reason
+        self.message = message or self.default_message
+        super().__init__(f"{api}: {reason}" if reason else str(api))
+
+
+class DefinitionError(Exception):
+    """Raised when a form definition can't be imported."""
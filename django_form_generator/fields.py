@@ -38,4 +38,64 @@ class MultiInputField(forms.CharField):
 
 
 class CustomeSelectFormField(forms.Select):
-    option_inherits_attrs = True
\ No newline at end of file
+    option_inherits_attrs = True
+
+class AsyncOptionsSelect(forms.Select):
+    """Select without inline options: only the selected options are rendered, the others are searched
+    (`options_url`) with htmx while typing."""
+
+    template_name = "django_form_generator/widgets/async_options.html"
+    option_inherits_attrs = True
+
+    def __init__(self, queryset, options_url: str, attrs=None, multiple: bool = False):
+        super().__init__(attrs)
+        self.queryset = queryset
+        self.options_url = options_url
+        self.allow_multiple_selected = multiple
+
+    def optgroups(self, name, value, attrs=None):
+        ids = [val for val in value if str(val).isdigit()]
+        self.choices = list(self.queryset.filter(id__in=ids).values_list("id", "name")) if ids else []
+        return super().optgroups(name, value, attrs)
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context["widget"]["options_url"] = self.options_url
+        return context
+
+    def value_from_datadict(self, data, files, name):
+        if self.allow_multiple_selected:
+            try:
+                return data.getlist(name)
+            except AttributeError:
+                pass
+        return data.get(name)
+
+    def value_omitted_from_data(self, data, files, name):
+        return False if self.allow_multiple_selected else super().value_omitted_from_data(data, files, name)
+
+
+class OptionLookupMixin:
+    """Validate the submitted option ids with `lookup(values) -> valid ids` (an indexed query)
+    instead of a list of every option."""
+
+    def __init__(self, *, lookup, **kwargs):
+        super().__init__(**kwargs)
+        self.lookup = lookup
+        self._valid_ids = set()
+
+    def validate(self, value):
+        values = value if isinstance(value, (list, tuple)) else [value]
+        self._valid_ids = {str(id_) for id_ in self.lookup([val for val in values if val not in self.empty_values])}
+        super().validate(value)
+
+    def valid_value(self, value):
+        return str(value) in self._valid_ids
+
+
+class OptionChoiceField(OptionLookupMixin, forms.ChoiceField):
+    pass
+
+
+class OptionMultipleChoiceField(OptionLookupMixin, forms.MultipleChoiceField):
+    pass
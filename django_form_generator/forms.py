@@ -1,4 +1,6 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
+from django.urls import reverse
 from django.utils.translation import gettext as _
 
 from captcha.fields import ReCaptchaField
@@ -6,23 +8,59 @@ from captcha.widgets import ReCaptchaV2Checkbox
 from tempus_dominus.widgets import DatePicker, TimePicker, DateTimePicker
 
 from django_form_generator.settings import form_generator_settings as fg_settings
-from django_form_generator.models import Field, Form, Option, FieldValidator
-from django_form_generator.fields import MultiInputWidgetField, MultiInputField, CustomeSelectFormField
+from django_form_generator.common import genres
+from django_form_generator.common.definitions import loads
+from django_form_generator.common.helpers import FileFieldHelper
+from django_form_generator.common.metrics import measure
+from django_form_generator.common.wizard import FIELD_NAME as WIZARD_FIELD_NAME, WizardState
+from django_form_generator.exceptions import DefinitionError
+from django_form_generator.models import CHANGED_FIELDS_KEY, Field, Form, Option, FieldValidator
+from django_form_generator.fields import (
+    AsyncOptionsSelect,
+    CustomeSelectFormField,
+    MultiInputField,
+    MultiInputWidgetField,
+    OptionChoiceField,
+    OptionMultipleChoiceField,
+)
 from django_form_generator import const
 
 
 class FormGeneratorBaseForm(forms.Form):
+    invalid_fields_name = "invalid_fields"
+
     def __init__(self, form, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.instance = form
-        self.template_name_p = getattr(self.instance, "style", self.template_name_p)
-        self._initial_fields()
+        with measure("form_build", sender=self.__class__, form=form.pk):
+            super().__init__(*args, **kwargs)
+            self.instance = form
+            self.template_name_p = getattr(self.instance, "style", self.template_name_p)
+            with measure("initial_fields", sender=self.__class__, form=form.pk):
+                self._initial_fields()
         
+    @property
+    def submit_url(self) -> str:
+        return reverse("django_form_generator:form_detail", args=(self.instance.id,))
+
+    @property
+    def submit_text(self) -> str:
+        return self.instance.submit_text
+
+    def get_fields(self):
+        return self.instance.get_fields()
+
+    @property
+    def invalid_fields(self) -> list:
+        """Names of the shown fields with errors, kept in the form so their errors are cleared by the next htmx submit."""
+        if not self.is_bound:
+            return []
+        return [name for name in self.errors if name in self.fields and not self.fields[name].widget.is_hidden]
+
     def _initial_fields(self):
-        for field in self.instance.get_fields():
-            method = f"prepare_{field.genre}"
-            if hasattr(self, method):
-                self.fields[field.name] = getattr(self, method)(self.instance, field)
+        builders = genres.get_builders(type(self), "form_field")
+        for field in self.get_fields():
+            prepare = builders.get(field.genre)
+            if prepare is not None:
+                self.fields[field.name] = prepare(self, self.instance, field)
                 self._handel_required_fields(field, self.fields[field.name])
 
     def _handel_required_fields(self, field, form_field):
@@ -132,7 +170,24 @@ class FormGeneratorBaseForm(forms.Form):
         )
         return forms.BooleanField(**field_attrs)
 
+    def prepare_async_options(self, form: Form, field: Field, multiple: bool = False):
+        """Dropdown, radio & multi checkbox fields with `async_options`: a searchable select without inline choices."""
+        widget_attrs: dict = field.build_widget_attrs(
+            form, {"content_type": "option"}
+        )
+        field_attrs: dict = field.build_field_attrs(
+            {
+                "widget": AsyncOptionsSelect(field.get_choices(), field.options_url, widget_attrs, multiple),
+                "lookup": field.filter_choice_ids,
+            }
+        )
+        if multiple:
+            return OptionMultipleChoiceField(**field_attrs)
+        return OptionChoiceField(**field_attrs)
+
     def prepare_dropdown(self, form: Form, field: Field):
+        if field.async_options:
+            return self.prepare_async_options(form, field)
         widget_attrs: dict = field.build_widget_attrs(
             form, {"content_type": "option"}
         )
@@ -146,6 +201,8 @@ class FormGeneratorBaseForm(forms.Form):
         return forms.ChoiceField(**field_attrs)
 
     def prepare_multi_checkbox(self, form: Form, field: Field):
+        if field.async_options:
+            return self.prepare_async_options(form, field, multiple=True)
         widget_attrs: dict = field.build_widget_attrs(
             form, {"content_type": "option"}
         )
@@ -159,6 +216,8 @@ class FormGeneratorBaseForm(forms.Form):
         return forms.MultipleChoiceField(**field_attrs)
 
     def prepare_radio(self, form: Form, field: Field):
+        if field.async_options:
+            return self.prepare_async_options(form, field)
         widget_attrs: dict = field.build_widget_attrs(
             form, {"content_type": "option"}
         )
@@ -204,13 +263,100 @@ class FormGeneratorForm(FormGeneratorBaseForm):
         self.request = request
         super().__init__(form, *args, **kwargs)
 
-    def save(self):
+    def get_response_data(self):
         form_data = self.cleaned_data.copy()
         form_data.setdefault("request", self.request)
+        return form_data
+
+    def save(self):
+        form_data = self.get_response_data()
         save_module = fg_settings.FORM_RESPONSE_SAVE  
         save_module(self.instance, form_data, self.user_ip)# type: ignore
 
 
+class FormWizardStepForm(FormGeneratorForm):
+    """A step of a wizard form: only the fields of one category are built, validated & rendered.
+
+    The answers of the steps are kept in a `WizardState` and assembled into one response by the last step.
+    """
+
+    wizard_field_name = WIZARD_FIELD_NAME
+
+    def __init__(self, form, request, user_ip, step: int, state: WizardState, *args, **kwargs):
+        self.steps = form.get_steps()
+        if not 0 <= step < len(self.steps):
+            raise IndexError(step)
+        self.step = step
+        self.state = state
+        if kwargs.get("data") is not None:
+            # the answers of the other steps decide which dependent fields are required
+            data = state.get_data(exclude=step)
+            for key in kwargs["data"]:
+                data.setlist(key, kwargs["data"].getlist(key))
+            kwargs["data"] = data
+        super().__init__(form, request, user_ip, *args, **kwargs)
+
+    def _initial_fields(self):
+        super()._initial_fields()
+        if self.is_bound:
+            return
+        # show the answers of a finished step again
+        data = self.state.get_data(self.step)
+        for name, field in self.fields.items():
+            values = data.getlist(name)
+            if values:
+                field.initial = values if isinstance(field, forms.MultipleChoiceField) else values[0]
+
+    def get_fields(self):
+        return self.instance.get_step_fields(self.steps[self.step])
+
+    @property
+    def is_last_step(self) -> bool:
+        return self.step == len(self.steps) - 1
+
+    @property
+    def category(self):
+        return self.instance.get_step_category(self.steps[self.step])
+
+    def get_step_url(self, step: int) -> str:
+        url = reverse("django_form_generator:form_wizard_step", args=(self.instance.id, step))
+        return f"{url}?{self.wizard_field_name}={self.state.token}"
+
+    @property
+    def submit_url(self) -> str:
+        return reverse("django_form_generator:form_wizard_step", args=(self.instance.id, self.step))
+
+    @property
+    def previous_url(self) -> str | None:
+        return self.get_step_url(self.step - 1) if self.step else None
+
+    @property
+    def submit_text(self) -> str:
+        return self.instance.submit_text if self.is_last_step else _("Next")
+
+    def get_step_cleaned_data(self) -> dict:
+        """Cleaned data of the step, the uploaded files are stored right away (the cache can't keep them)."""
+        cleaned_data = self.cleaned_data.copy()
+        for name, value in cleaned_data.items():
+            if isinstance(value, UploadedFile):
+                cleaned_data[name] = FileFieldHelper.upload_file(self.request._current_scheme_host, value)
+        return cleaned_data
+
+    def save_step(self):
+        data = {name: self.data.getlist(name) for name in self.fields if name in self.data}
+        self.state.save_step(self.step, data, self.get_step_cleaned_data())
+
+    def get_response_data(self):
+        form_data = self.state.get_cleaned_data()
+        form_data.update(self.cleaned_data)
+        form_data.setdefault("request", self.request)
+        return form_data
+
+    def save(self):
+        super().save()
+        self.state.delete()
+
+
 class FormGeneratorResponseForm(FormGeneratorBaseForm):
     def __init__(self, form, request, form_response, *args, **kwargs):
         self.request = request
@@ -219,11 +365,12 @@ class FormGeneratorResponseForm(FormGeneratorBaseForm):
 
     def _initial_fields(self):
         form_response_data = self.form_response.get_data()
+        builders = genres.get_builders(type(self), "form_field")
         for i, field in enumerate(self.form_response.form.get_fields()):
             field_name = field.name
-            method = f"prepare_{field.genre}"
-            if hasattr(self, method):
-                self.fields[field_name] = getattr(self, method)(self.instance, field)
+            prepare = builders.get(field.genre)
+            if prepare is not None:
+                self.fields[field_name] = prepare(self, self.instance, field)
                 try:
                     initial_value = form_response_data[i].get(
                         "value", None
@@ -244,13 +391,18 @@ class FormGeneratorResponseForm(FormGeneratorBaseForm):
                 
                 self._handel_required_fields(field, self.fields[field.name])
 
-    def save(self):
-        save_module = fg_settings.FORM_RESPONSE_SAVE
+    def get_response_data(self):
         form_data = self.form_response.pure_data
         for changed_data in self.changed_data:
             form_data[changed_data] = self.cleaned_data[changed_data]
 
         form_data.setdefault("request", self.request)
+        form_data[CHANGED_FIELDS_KEY] = self.changed_data
+        return form_data
+
+    def save(self):
+        save_module = fg_settings.FORM_RESPONSE_SAVE
+        form_data = self.get_response_data()
         save_module(self.instance, form_data, update_form_response_id=self.form_response.id)# type: ignore
         
 
@@ -260,6 +412,11 @@ class FieldForm(forms.ModelForm):
         model = Field
         fields = "__all__"
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if "genre" in self.fields:
+            self.fields["genre"].choices = [("", "---------"), *genres.get_choices()]
+
     def clean(self):
         cleaned_data = super().clean()
         if 'genre' in cleaned_data and cleaned_data["genre"] == const.FieldGenre.UPLOAD_FILE:
@@ -295,4 +452,18 @@ class FormResponseFilterForm(forms.Form):
     field = forms.ModelChoiceField(Field.objects.all(), required=False, widget=forms.widgets.Select(attrs={'onchange': 'valueField(event)'}))
     field_lookup = forms.ChoiceField(choices=const.FieldLookupType.choices,  required=False,
          widget=forms.widgets.Select(attrs={'onchange': 'typeField(event)'}))
-    value = forms.CharField(max_length=120, required=False)
\ No newline at end of file
+    value = forms.CharField(max_length=120, required=False)
+
+class DefinitionImportForm(forms.Form):
+    file = forms.FileField(label=_("Definition file"), help_text=_("json, or yaml when PyYAML is installed."))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        file = cleaned_data.get('file')
+        if file:
+            format = 'yaml' if file.name.endswith(('.yaml', '.yml')) else 'json'
+            try:
+                cleaned_data['definition'] = loads(file.read(), format)
+            except DefinitionError as e:
+                self.add_error('file', str(e))
+        return cleaned_data
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import BinaryField, Case, Value, When
+
+from django_form_generator.common import fast_json
+from django_form_generator.common.api_results import compress
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+class Command(BaseCommand):
+    help = "Compress the api responses of the saved responses that are larger than API_RESPONSE_COMPRESS_SIZE."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--form", type=int, action="append", dest="forms", default=[],
+                            help="Id of a form to compress (can be repeated), all forms by default.")
+        parser.add_argument("--min-size", type=int, default=fg_settings.API_RESPONSE_COMPRESS_SIZE,
+                            help="Size (bytes of JSON) from which an api response is compressed "
+                                 "(default: API_RESPONSE_COMPRESS_SIZE).")
+        parser.add_argument("--chunk-size", type=int, default=100, help="Responses fetched & updated per query.")
+
+    def handle(self, *args, **options):
+        if options["min_size"] is None:
+            raise CommandError("Set the API_RESPONSE_COMPRESS_SIZE setting or pass --min-size.")
+        response_model = fg_settings.FORM_GENERATOR_RESPONSE_MODEL
+        queryset = response_model.objects.filter(api_response__isnull=False).order_by("pk")
+        if options["forms"]:
+            queryset = queryset.filter(form_id__in=options["forms"])
+
+        start = time.perf_counter()
+        count = compressed_count = saved = 0
+        last_pk = 0
+        while True:
+            # keyset pagination, the compressed responses leave the queryset
+            chunk = list(queryset.filter(pk__gt=last_pk).values_list("pk", "api_response")[:options["chunk_size"]])
+            if not chunk:
+                break
+            last_pk = chunk[-1][0]
+            count += len(chunk)
+            compressed = {}
+            for pk, api_response in chunk:
+                content = compress(api_response, options["min_size"])
+                if content is not None:
+                    compressed[pk] = content
+                    saved += len(fast_json.dumpb(api_response)) - len(content)
+            if compressed:
+                with transaction.atomic():
+                    response_model.objects.filter(pk__in=compressed).update(
+                        api_response=None,
+                        api_response_compressed=Case(
+                            *[When(pk=pk, then=Value(content, output_field=BinaryField())) for pk, content in compressed.items()]
+                        ),
+                    )
+                compressed_count += len(compressed)
+
+        self.stdout.write(
+            f"{compressed_count} of {count} api responses compressed ({saved / 2 ** 20:.1f} MB saved) "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        self.stdout.write(self.style.SUCCESS("Api responses compressed."))
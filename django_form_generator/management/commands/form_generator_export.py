@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django_form_generator.common.definitions import dumps, export_definitions
+from django_form_generator.exceptions import DefinitionError
+from django_form_generator.models import Form
+
+
+class Command(BaseCommand):
+    help = "Export the definition of forms (with their fields, categories, options, validators & apis) as json or yaml."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--form", action="append", dest="forms", default=[],
+                            help="Slug of a form to export (can be repeated), all forms by default.")
+        parser.add_argument("--format", choices=("json", "yaml"), default="json")
+        parser.add_argument("--indent", type=int, default=2, help="Indentation of the json output.")
+        parser.add_argument("-o", "--output", help="File to write the definition to, stdout by default.")
+
+    def handle(self, *args, **options):
+        forms = Form.objects.all()
+        if options["forms"]:
+            forms = forms.filter(slug__in=options["forms"])
+            missing = set(options["forms"]) - set(forms.values_list("slug", flat=True))
+            if missing:
+                raise CommandError(f"Form(s) not found: {', '.join(sorted(missing))}")
+
+        try:
+            content = dumps(export_definitions(forms), options["format"], options["indent"])
+        except DefinitionError as e:
+            raise CommandError(e)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                f.write(content)
+            self.stderr.write(self.style.SUCCESS(f"Definition written to {options['output']}."))
+        else:
+            self.stdout.write(content)
@@ -0,0 +1,52 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from django_form_generator.common.definitions import import_definitions, loads, merge
+from django_form_generator.exceptions import DefinitionError
+
+
+class DryRun(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Create or update forms (with their fields, categories, options, validators & apis) from definition files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+", help="Definition files (.json, .yaml or .yml), `-` for stdin.")
+        parser.add_argument("--format", choices=("json", "yaml"),
+                            help="Format of the files, guessed from the file extension by default (json for stdin).")
+        parser.add_argument("--dry-run", action="store_true", help="Check the definitions & roll back the import.")
+
+    def read(self, path, format):
+        if path == "-":
+            return loads(sys.stdin.read(), format or "json")
+        format = format or ("yaml" if path.endswith((".yaml", ".yml")) else "json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                return loads(f.read(), format)
+        except OSError as e:
+            raise CommandError(e)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            definition = merge([self.read(path, options["format"]) for path in options["files"]])
+            with transaction.atomic():
+                counts = import_definitions(definition)
+                if options["dry_run"]:
+                    raise DryRun
+        except DryRun:
+            pass
+        except DefinitionError as e:
+            raise CommandError(e)
+
+        summary = ", ".join(f"{count} {section}" for section, count in counts.items())
+        self.stdout.write(f"{summary} in {time.perf_counter() - start:.2f}s")
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("Dry run, nothing was saved."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Definitions imported."))
@@ -0,0 +1,438 @@
+import json
+import random
+import re
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from django_form_generator import const
+from django_form_generator.models import (
+    Field,
+    FieldCategory,
+    FieldOptionThrough,
+    Form,
+    FormAPIManager,
+    FormAPIThrough,
+    FormFieldThrough,
+    Option,
+)
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+ENDPOINTS = ("form_get", "form_post", "api_get", "api_post")
+CSRF_INPUT = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+GENRES = (
+    const.FieldGenre.TEXT_INPUT,
+    const.FieldGenre.TEXT_AREA,
+    const.FieldGenre.NUMBER,
+    const.FieldGenre.EMAIL,
+    const.FieldGenre.DROPDOWN,
+    const.FieldGenre.RADIO,
+    const.FieldGenre.MULTI_CHECKBOX,
+    const.FieldGenre.CHECKBOX,
+    const.FieldGenre.DATE,
+)
+
+
+class StubAPIHandler(BaseHTTPRequestHandler):
+    """Answers every request like a slow external API would."""
+
+    def _respond(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        delay = max(0.0, random.gauss(server.latency, server.jitter))
+        time.sleep(delay)
+        if random.random() < server.error_rate:
+            status, body = 500, b"Internal Server Error"
+            content_type = "text/plain"
+        else:
+            status = 200
+            body = json.dumps(
+                {
+                    "result": [
+                        {"first_name": "john", "last_name": "doe", "id": i}
+                        for i in range(server.result_size)
+                    ],
+                    "path": self.path,
+                }
+            ).encode()
+            content_type = "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubAPIServer(ThreadingHTTPServer):
+    """Local HTTP server standing in for the external APIs of FormAPIManager.
+
+    `latency` and `jitter` are in seconds, `error_rate` is the probability (0-1)
+    of answering with a 500.
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, port=0, latency=0.05, jitter=0.0, error_rate=0.0, result_size=5):
+        super().__init__(("127.0.0.1", port), StubAPIHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.result_size = result_size
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Linear interpolated percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    k = (len(values) - 1) * percent / 100
+    f = int(k)
+    c = min(f + 1, len(values) - 1)
+    return values[f] + (values[c] - values[f]) * (k - f)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed forms with pre/post load APIs pointing at a local stub API server and "
+        "drive concurrent traffic against the form views and the API views, "
+        "reporting throughput and latency percentiles per endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--forms", type=int, default=1, help="Number of forms to seed.")
+        parser.add_argument("--fields", type=int, default=20, help="Number of fields per form.")
+        parser.add_argument("--options", type=int, default=10, help="Number of options per selectable field.")
+        parser.add_argument("--pre-apis", type=int, default=1, help="Number of pre load APIs per form.")
+        parser.add_argument("--post-apis", type=int, default=1, help="Number of post load APIs per form.")
+        parser.add_argument("--latency", type=float, default=50, help="Mean latency of the stub API in milliseconds.")
+        parser.add_argument("--jitter", type=float, default=0, help="Standard deviation of the stub API latency in milliseconds.")
+        parser.add_argument("--error-rate", type=float, default=0, help="Probability (0-1) of the stub API answering with 500.")
+        parser.add_argument("--stub-port", type=int, default=0, help="Port of the stub API server (random by default).")
+        parser.add_argument("--requests", type=int, default=200, help="Total number of requests to send.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Number of concurrent clients.")
+        parser.add_argument(
+            "--mix",
+            default=",".join(f"{e}=1" for e in ENDPOINTS),
+            help="Weights of the endpoints, e.g. form_get=3,form_post=1,api_get=0,api_post=1.",
+        )
+        parser.add_argument(
+            "--base-url",
+            help="Send the traffic over HTTP to a running server (e.g. http://127.0.0.1:8000/form-generator) "
+            "instead of the in-process test client.",
+        )
+        parser.add_argument("--host", help="Host header used by the test client (defaults to the first ALLOWED_HOSTS).")
+        parser.add_argument("--json", dest="json_output", help="Also write the report as JSON to this file.")
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded data (and responses) after the run.")
+        parser.add_argument("--seed", type=int, default=None, help="Random seed for the traffic mix.")
+
+    def handle(self, *args, **options):
+        weights = self.parse_mix(options["mix"])
+        rnd = random.Random(options["seed"])
+        server = StubAPIServer(
+            options["stub_port"],
+            options["latency"] / 1000,
+            options["jitter"] / 1000,
+            options["error_rate"],
+        ).start()
+        self.stdout.write(f"Stub API server listening on {server.url}")
+        self._local = threading.local()
+        seeded = None
+        try:
+            seeded = self.seed(server.url, options)
+            plan = rnd.choices(list(weights), weights=list(weights.values()), k=options["requests"])
+            targets = [(endpoint, rnd.choice(seeded["forms"])) for endpoint in plan]
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+                results = list(
+                    executor.map(lambda target: self.send(target, options), targets)
+                )
+            elapsed = time.perf_counter() - started
+            report = self.build_report(results, elapsed, options)
+            self.print_report(report)
+            if options["json_output"]:
+                with open(options["json_output"], "w", encoding="utf-8") as f:
+                    json.dump(report, f, indent=2)
+        finally:
+            server.stop()
+            if not options["keep"]:
+                self.cleanup(seeded)
+
+    def parse_mix(self, mix):
+        weights = {}
+        for item in mix.split(","):
+            name, _, weight = item.partition("=")
+            if name not in ENDPOINTS:
+                raise CommandError(f"Unknown endpoint '{name}', choose from {', '.join(ENDPOINTS)}.")
+            weights[name] = float(weight or 1)
+        weights = {k: v for k, v in weights.items() if v > 0}
+        if not weights:
+            raise CommandError("At least one endpoint should have a positive weight.")
+        return weights
+
+    @transaction.atomic
+    def seed(self, stub_url, options):
+        token = uuid.uuid4().hex[:8]
+        seeded = {"forms": [], "fields": [], "options": [], "apis": [], "categories": []}
+        options_ = Option.objects.bulk_create(
+            [Option(name=f"Load test {token} {i}") for i in range(options["options"])]
+        )
+        seeded["options"] = [o.pk for o in options_]
+        for n in range(options["forms"]):
+            form = Form.objects.create(
+                title=f"Load test {token} {n}",
+                slug=f"load-test-{token}-{n}",
+                status=const.FormStatus.PUBLISH,
+                style=const.FormStyle.DYNAMIC,
+            )
+            category = FieldCategory.objects.create(title=f"Load test {token} {n}", weight=n)
+            fields = Field.objects.bulk_create(
+                [
+                    Field(
+                        label=f"Field {i}",
+                        name=f"load_test_{token}_{n}_{i}",
+                        genre=GENRES[i % len(GENRES)],
+                        is_required=GENRES[i % len(GENRES)] != const.FieldGenre.CHECKBOX,
+                        is_active=True,
+                    )
+                    for i in range(options["fields"])
+                ]
+            )
+            FormFieldThrough.objects.bulk_create(
+                [
+                    FormFieldThrough(form=form, field=field, weight=i, category=category)
+                    for i, field in enumerate(fields)
+                ]
+            )
+            FieldOptionThrough.objects.bulk_create(
+                [
+                    FieldOptionThrough(field=field, option=option, weight=w)
+                    for field in fields
+                    if field.genre in const.FieldGenre.selectable_fields()
+                    for w, option in enumerate(options_)
+                ]
+            )
+            apis = []
+            for i in range(options["pre_apis"]):
+                apis.append(
+                    FormAPIManager(
+                        title=f"Load test pre {token} {n} {i}",
+                        url=f"{stub_url}/pre/{form.pk}/{i}/",
+                        method=const.FormAPIManagerMethod.GET,
+                        execute_time=const.FormAPIManagerExecuteTime.PRE_LOAD,
+                        response="{% for item in result %}<p>{{item.first_name}} {{item.last_name}}</p>{% endfor %}",
+                        is_active=True,
+                    )
+                )
+            for i in range(options["post_apis"]):
+                apis.append(
+                    FormAPIManager(
+                        title=f"Load test post {token} {n} {i}",
+                        url=f"{stub_url}/post/{form.pk}/{i}/",
+                        method=const.FormAPIManagerMethod.POST,
+                        body=fg_settings.FORM_EVALUATIONS["form_data"],
+                        execute_time=const.FormAPIManagerExecuteTime.POST_LOAD,
+                        response="{{path}}",
+                        is_active=True,
+                    )
+                )
+            apis = FormAPIManager.objects.bulk_create(apis)
+            FormAPIThrough.objects.bulk_create(
+                [FormAPIThrough(form=form, api=api, weight=i) for i, api in enumerate(apis)]
+            )
+            seeded["forms"].append(form.pk)
+            seeded["fields"] += [f.pk for f in fields]
+            seeded["apis"] += [a.pk for a in apis]
+            seeded["categories"].append(category.pk)
+
+        self.payloads = {pk: self.build_payloads(Form.objects.get(pk=pk)) for pk in seeded["forms"]}
+        self.stdout.write(
+            f"Seeded {len(seeded['forms'])} form(s) with {options['fields']} fields, "
+            f"{options['pre_apis']} pre and {options['post_apis']} post load API(s) each."
+        )
+        return seeded
+
+    def build_payloads(self, form):
+        html, api = {}, {}
+        for field in form.get_fields():
+            option_ids = list(field.get_choices().values_list("id", flat=True))
+            if field.genre == const.FieldGenre.MULTI_CHECKBOX:
+                value = option_ids[:2]
+            elif field.genre in const.FieldGenre.selectable_fields():
+                value = option_ids[0]
+            else:
+                value = {
+                    const.FieldGenre.TEXT_INPUT: "John",
+                    const.FieldGenre.TEXT_AREA: "Lorem ipsum dolor sit amet",
+                    const.FieldGenre.NUMBER: 42,
+                    const.FieldGenre.EMAIL: "john@example.com",
+                    const.FieldGenre.CHECKBOX: True,
+                    const.FieldGenre.DATE: "2023-01-02",
+                }[field.genre]
+            api[field.name] = value
+            if isinstance(value, list):
+                html[field.name] = [str(v) for v in value]
+            elif isinstance(value, bool):
+                html[field.name] = "on"
+            else:
+                html[field.name] = str(value)
+        return {"html": html, "api": api}
+
+    def get_client(self, options):
+        local = self._local
+        if not hasattr(local, "client"):
+            if options["base_url"]:
+                local.client = requests.Session()
+            else:
+                host = options["host"] or next(
+                    (h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "testserver"
+                )
+                local.client = Client(HTTP_HOST=host)
+        return local.client
+
+    def build_url(self, endpoint, form_id, options):
+        is_api = endpoint.startswith("api")
+        if options["base_url"]:
+            path = f"/api/forms/{form_id}/" if is_api else f"/form/{form_id}/"
+            return options["base_url"].rstrip("/") + path
+        name = "api:api_form_detail" if is_api else "form_detail"
+        return reverse(f"django_form_generator:{name}", kwargs={"pk": form_id})
+
+    def get_csrf_token(self, client, url):
+        """CSRF token of a running server: the form is fetched once per client (outside the measured time)
+        for its `csrftoken` cookie, or for the token of the page when the server keeps it in the session."""
+        local = self._local
+        if getattr(local, "csrf_token", None) is None:
+            response = client.get(url)
+            response.raise_for_status()
+            token = client.cookies.get(settings.CSRF_COOKIE_NAME)
+            if token is None:
+                match = CSRF_INPUT.search(response.text)
+                token = match and match.group(1)
+            local.csrf_token = token
+        return local.csrf_token
+
+    def send(self, target, options):
+        endpoint, form_id = target
+        client = self.get_client(options)
+        url = self.build_url(endpoint, form_id, options)
+        payloads = self.payloads[form_id]
+        remote = bool(options["base_url"])
+        headers = {"HX-Request": "true"}
+        if remote and endpoint == "form_post":
+            try:
+                headers.update({"X-CSRFToken": self.get_csrf_token(client, url) or "", "Referer": url})
+            except requests.RequestException as e:
+                self.stderr.write(f"{endpoint}: could not get a CSRF token: {e.__class__.__name__}: {e}")
+                return endpoint, None, 0.0
+        started = time.perf_counter()
+        try:
+            if endpoint in ("form_get", "api_get"):
+                response = client.get(url)
+            elif endpoint == "form_post":
+                if remote:
+                    response = client.post(url, data=payloads["html"], headers=headers)
+                else:
+                    response = client.post(url, payloads["html"], HTTP_HX_REQUEST="true")
+            elif remote:
+                response = client.post(url, json=payloads["api"])
+            else:
+                response = client.post(url, payloads["api"], content_type="application/json")
+            status_code = response.status_code
+        except Exception as e:
+            status_code = None
+            self.stderr.write(f"{endpoint}: {e.__class__.__name__}: {e}")
+        return endpoint, status_code, time.perf_counter() - started
+
+    def build_report(self, results, elapsed, options):
+        report = {
+            "requests": len(results),
+            "concurrency": options["concurrency"],
+            "elapsed": elapsed,
+            "throughput": len(results) / elapsed if elapsed else 0.0,
+            "stub": {
+                "latency_ms": options["latency"],
+                "jitter_ms": options["jitter"],
+                "error_rate": options["error_rate"],
+            },
+            "endpoints": {},
+        }
+        for endpoint in ENDPOINTS:
+            latencies = sorted(d for e, _, d in results if e == endpoint)
+            if not latencies:
+                continue
+            statuses = [s for e, s, _ in results if e == endpoint]
+            errors = sum(1 for s in statuses if s is None or s >= 400)
+            report["endpoints"][endpoint] = {
+                "requests": len(latencies),
+                "errors": errors,
+                "throughput": len(latencies) / elapsed if elapsed else 0.0,
+                "mean": statistics.mean(latencies),
+                "p50": percentile(latencies, 50),
+                "p90": percentile(latencies, 90),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "max": latencies[-1],
+            }
+        return report
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"\n{report['requests']} requests in {report['elapsed']:.2f}s "
+            f"with {report['concurrency']} clients: {report['throughput']:.1f} req/s"
+        )
+        self.stdout.write(
+            f"{'endpoint':<10} {'requests':>8} {'errors':>7} {'req/s':>8} "
+            f"{'mean':>8} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8}  (ms)"
+        )
+        for endpoint, stats in report["endpoints"].items():
+            self.stdout.write(
+                f"{endpoint:<10} {stats['requests']:>8} {stats['errors']:>7} {stats['throughput']:>8.1f} "
+                + " ".join(
+                    f"{stats[k] * 1000:>8.1f}" for k in ("mean", "p50", "p90", "p95", "p99", "max")
+                )
+            )
+
+    @transaction.atomic
+    def cleanup(self, seeded):
+        if not seeded:
+            return
+        fg_settings.FORM_GENERATOR_RESPONSE_MODEL.objects.filter(form_id__in=seeded["forms"]).delete()
+        Form.objects.filter(pk__in=seeded["forms"]).delete()
+        Field.objects.filter(pk__in=seeded["fields"]).delete()
+        Option.objects.filter(pk__in=seeded["options"]).delete()
+        FormAPIManager.objects.filter(pk__in=seeded["apis"]).delete()
+        FieldCategory.objects.filter(pk__in=seeded["categories"]).delete()
+        self.stdout.write("Seeded data removed.")
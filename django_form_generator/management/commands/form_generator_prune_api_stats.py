@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django_form_generator.common.api_stats import prune
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+class Command(BaseCommand):
+    help = "Delete the FormAPIManager stats older than API_STATS_RETENTION days, run it periodically (e.g. daily cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None,
+                            help="Keep the stats of the last DAYS days, API_STATS_RETENTION by default.")
+
+    def handle(self, *args, **options):
+        days = options["days"] if options["days"] is not None else fg_settings.API_STATS_RETENTION
+        if not days or days < 0:
+            raise CommandError("Set --days or API_STATS_RETENTION to a positive number of days.")
+        deleted = prune(days)
+        self.stdout.write(self.style.SUCCESS(f"{deleted} stats older than {days} days deleted."))
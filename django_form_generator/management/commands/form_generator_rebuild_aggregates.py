@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from django_form_generator.common.aggregates import rebuild
+from django_form_generator.models import Form
+
+
+class Command(BaseCommand):
+    help = "Recalculate the per field aggregates (option tallies, numbers, dates & fill rates) from the saved responses."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--form", type=int, action="append", dest="forms", default=[],
+                            help="Id of a form to rebuild (can be repeated), all forms by default.")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Responses fetched per query.")
+
+    def handle(self, *args, **options):
+        forms = Form.objects.order_by("pk")
+        if options["forms"]:
+            forms = forms.filter(pk__in=options["forms"])
+            missing = set(options["forms"]) - set(forms.values_list("pk", flat=True))
+            if missing:
+                raise CommandError(f"Form(s) not found: {', '.join(map(str, sorted(missing)))}")
+
+        for form in forms:
+            start = time.perf_counter()
+            count = rebuild(form.pk, options["chunk_size"])
+            self.stdout.write(f"{form} ({form.pk}): {count} responses in {time.perf_counter() - start:.2f}s")
+        self.stdout.write(self.style.SUCCESS("Aggregates rebuilt."))
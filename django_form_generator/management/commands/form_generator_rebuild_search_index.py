@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from django_form_generator.common.search import get_backend, rebuild
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+class Command(BaseCommand):
+    help = "Recalculate the search text (and the search tokens when not on Postgres) of the saved responses."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--form", type=int, action="append", dest="forms", default=[],
+                            help="Id of a form to reindex (can be repeated), all forms by default.")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Responses fetched & updated per query.")
+
+    def handle(self, *args, **options):
+        response_model = fg_settings.FORM_GENERATOR_RESPONSE_MODEL
+        queryset = response_model.objects.order_by("pk")
+        if options["forms"]:
+            queryset = queryset.filter(form_id__in=options["forms"])
+
+        start = time.perf_counter()
+        count = rebuild(queryset, options["chunk_size"])
+        self.stdout.write(
+            f"{count} responses indexed with the {get_backend(response_model)} backend "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -2,6 +2,7 @@ from django.db import models
 from django.utils import timezone
 
 from django_form_generator import const
+from django_form_generator.common import aggregates
 from django_form_generator.settings import form_generator_settings as fg_settings
 
 class FormQuerySet(models.QuerySet):
@@ -22,4 +23,43 @@ class FormManager(models.Manager):
         return FormQuerySet(model=self.model, using=self._db)
 
     def filter_valid(self):
-        return self.get_queryset().filter_valid()
\ No newline at end of file
+        return self.get_queryset().filter_valid()
+
+
+class FieldQuerySet(models.QuerySet):
+
+    def filter_in_valid_forms(self) -> models.QuerySet:
+        """The fields of at least one valid form (see `FormQuerySet.filter_valid`)."""
+        through = self.model.forms.through
+        Form = through._meta.get_field("form").related_model
+        valid_forms = Form.objects.filter_valid().values("pk")
+        return self.filter(pk__in=through.objects.filter(form__in=valid_forms).values("field_id"))
+
+
+class OptionQuerySet(models.QuerySet):
+    """Keep `name_key` in sync with `name` in the bulk queries too (they don't call `save`)."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        for obj in objs:
+            obj.name_key = self.model.get_name_key(obj.name)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if "name" in fields:
+            for obj in objs:
+                obj.name_key = self.model.get_name_key(obj.name)
+            fields = [*fields, "name_key"]
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+
+class FormResponseQuerySet(models.QuerySet):
+
+    def delete(self):
+        """Delete the responses & remove them from the aggregates of their forms, with a query per chunk of
+        responses (instead of a `post_delete` signal per response)."""
+        if not fg_settings.AGGREGATES_ENABLED:
+            return super().delete()
+        deltas = aggregates.removal_deltas(self.values_list("form_id", "data").iterator(chunk_size=2000))
+        result = super().delete()
+        aggregates.apply_deltas(deltas, using=self.db)
+        return result
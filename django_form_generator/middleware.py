@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+from django.utils.decorators import sync_and_async_middleware
+
+from django_form_generator.routers import RoutingState, reset_routing_state, set_routing_state
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+def _begin(request):
+    try:
+        pinned_until = float(request.COOKIES.get(fg_settings.REPLICA_PIN_COOKIE, 0))
+    except ValueError:
+        pinned_until = 0
+    state = RoutingState(pinned=pinned_until > time.time())
+    return state, set_routing_state(state)
+
+
+def _end(response, state, token):
+    reset_routing_state(token)
+    if state.wrote and fg_settings.REPLICA_PIN_SECONDS:
+        response.set_cookie(
+            fg_settings.REPLICA_PIN_COOKIE,
+            str(time.time() + fg_settings.REPLICA_PIN_SECONDS),
+            max_age=fg_settings.REPLICA_PIN_SECONDS,
+            httponly=True,
+            samesite="Lax",
+        )
+    return response
+
+
+@sync_and_async_middleware
+def ReplicaPinMiddleware(get_response):
+    """Pin a client to the primary database for `REPLICA_PIN_SECONDS` after it wrote something.
+
+    Use it with `django_form_generator.routers.FormGeneratorRouter`.
+    """
+    if asyncio.iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            state, token = _begin(request)
+            try:
+                response = await get_response(request)
+            except Exception:
+                reset_routing_state(token)
+                raise
+            return _end(response, state, token)
+
+    else:
+
+        def middleware(request):
+            state, token = _begin(request)
+            try:
+                response = get_response(request)
+            except Exception:
+                reset_routing_state(token)
+                raise
+            return _end(response, state, token)
+
+    return middleware
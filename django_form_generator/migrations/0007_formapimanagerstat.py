@@ -0,0 +1,45 @@
+# Generated by Django 4.1.1 on 2026-10-19 17:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_form_generator', '0006_alter_fieldvalidator_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FormAPIManagerStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(verbose_name='Bucket (minute)')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Count')),
+                ('success_count', models.PositiveIntegerField(default=0, verbose_name='Success Count')),
+                ('http_error_count', models.PositiveIntegerField(default=0, verbose_name='HTTP Error Count')),
+                ('invalid_json_count', models.PositiveIntegerField(default=0, verbose_name='Invalid JSON Count')),
+                ('exception_count', models.PositiveIntegerField(default=0, verbose_name='Exception Count')),
+                ('total_duration', models.FloatField(default=0, verbose_name='Total Duration (s)')),
+                ('max_duration', models.FloatField(default=0, verbose_name='Max Duration (s)')),
+                ('total_payload_size', models.PositiveBigIntegerField(default=0, verbose_name='Total Payload Size (bytes)')),
+                ('histogram', models.JSONField(default=dict, verbose_name='Latency Histogram')),
+                ('status_codes', models.JSONField(default=dict, verbose_name='Status Codes')),
+                ('api', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='django_form_generator.formapimanager', verbose_name='API')),
+            ],
+            options={
+                'verbose_name': 'FormAPIManager Stat',
+                'verbose_name_plural': 'FormAPIManager Stats',
+                'ordering': ('-bucket',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='formapimanagerstat',
+            index=models.Index(fields=['bucket'], name='f_g_formapimanagerstat_bucket'),
+        ),
+        migrations.AddConstraint(
+            model_name='formapimanagerstat',
+            constraint=models.UniqueConstraint(fields=('api', 'bucket'), name='api_stat_bucket_unique'),
+        ),
+    ]
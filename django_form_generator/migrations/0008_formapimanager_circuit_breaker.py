@@ -0,0 +1,33 @@
+# Generated by Django 4.1.1 on 2026-10-19 17:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_form_generator', '0007_formapimanagerstat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formapimanager',
+            name='failure_threshold',
+            field=models.PositiveIntegerField(default=5, help_text='Consecutive failures that open the circuit, 0 disables the circuit breaker.', verbose_name='Failure Threshold'),
+        ),
+        migrations.AddField(
+            model_name='formapimanager',
+            name='fallback',
+            field=models.CharField(choices=[('skip', 'Skip the api'), ('cache', 'Use the last successful result'), ('fail', 'Fail the submit')], default='skip', max_length=10, verbose_name='Fallback'),
+        ),
+        migrations.AddField(
+            model_name='formapimanager',
+            name='recovery_timeout',
+            field=models.PositiveIntegerField(default=30, help_text='How long the circuit stays open before a probe call is allowed.', verbose_name='Recovery Timeout (seconds)'),
+        ),
+        migrations.AddField(
+            model_name='formapimanager',
+            name='timeout',
+            field=models.FloatField(blank=True, help_text='Leave empty to use the API_DEFAULT_TIMEOUT setting.', null=True, verbose_name='Timeout (seconds)'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.1.1 on 2026-10-19 18:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_form_generator', '0008_formapimanager_circuit_breaker'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FieldOptionTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Count')),
+                ('field', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='option_tallies', to='django_form_generator.field', verbose_name='Field')),
+                ('form', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='option_tallies', to='django_form_generator.form', verbose_name='Form')),
+                ('option', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tallies', to='django_form_generator.option', verbose_name='Option')),
+            ],
+            options={
+                'verbose_name': 'Field Option Tally',
+                'verbose_name_plural': 'Field Option Tallies',
+            },
+        ),
+        migrations.CreateModel(
+            name='FieldDateTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Count')),
+                ('field', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='date_tallies', to='django_form_generator.field', verbose_name='Field')),
+                ('form', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='date_tallies', to='django_form_generator.form', verbose_name='Form')),
+            ],
+            options={
+                'verbose_name': 'Field Date Tally',
+                'verbose_name_plural': 'Field Date Tallies',
+                'ordering': ('date',),
+            },
+        ),
+        migrations.CreateModel(
+            name='FieldAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('response_count', models.PositiveIntegerField(default=0, verbose_name='Response Count')),
+                ('filled_count', models.PositiveIntegerField(default=0, verbose_name='Filled Count')),
+                ('value_count', models.PositiveIntegerField(default=0, verbose_name='Value Count')),
+                ('value_sum', models.FloatField(default=0, verbose_name='Value Sum')),
+                ('value_min', models.FloatField(blank=True, null=True, verbose_name='Value Min')),
+                ('value_max', models.FloatField(blank=True, null=True, verbose_name='Value Max')),
+                ('histogram', models.JSONField(default=dict, verbose_name='Histogram')),
+                ('field', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aggregates', to='django_form_generator.field', verbose_name='Field')),
+                ('form', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='field_aggregates', to='django_form_generator.form', verbose_name='Form')),
+            ],
+            options={
+                'verbose_name': 'Field Aggregate',
+                'verbose_name_plural': 'Field Aggregates',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='fieldoptiontally',
+            constraint=models.UniqueConstraint(fields=('form', 'field', 'option'), name='form_field_option_tally_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='fielddatetally',
+            constraint=models.UniqueConstraint(fields=('form', 'field', 'date'), name='form_field_date_tally_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='fieldaggregate',
+            constraint=models.UniqueConstraint(fields=('form', 'field'), name='form_field_aggregate_unique'),
+        ),
+    ]
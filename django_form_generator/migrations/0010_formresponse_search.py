@@ -0,0 +1,54 @@
+# Generated by Django 4.1.1 on 2026-10-19 18:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+INDEX_NAME = "f_g_formresponse_search"
+
+
+def create_search_index(apps, schema_editor):
+    # full-text index used by `common.search` on Postgres, the other databases use FormResponseSearchToken
+    if schema_editor.connection.vendor == "postgresql":
+        table = apps.get_model("django_form_generator", "FormResponse")._meta.db_table
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{INDEX_NAME}" ON "{table}" '
+            f"USING gin (to_tsvector('simple', \"search_text\"))"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{INDEX_NAME}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_form_generator', '0009_field_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formresponse',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Search Text'),
+        ),
+        migrations.CreateModel(
+            name='FormResponseSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=100, verbose_name='Token')),
+                ('response', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='django_form_generator.formresponse', verbose_name='Response')),
+            ],
+            options={
+                'verbose_name': 'Form Response Search Token',
+                'verbose_name_plural': 'Form Response Search Tokens',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='formresponsesearchtoken',
+            index=models.Index(fields=['token', 'response'], name='f_g_search_token'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.1.1 on 2026-10-19 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_form_generator', '0010_formresponse_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='form',
+            name='rate_limit',
+            field=models.PositiveIntegerField(blank=True, help_text='Maximum submissions of a client in the rate limit period, empty for no limit.', null=True, verbose_name='Rate Limit'),
+        ),
+        migrations.AddField(
+            model_name='form',
+            name='rate_limit_by',
+            field=models.CharField(choices=[('ip', 'IP Address'), ('session', 'Session'), ('user', 'User')], default='ip', help_text='Session & user fall back to the IP address for clients without a session or login.', max_length=10, verbose_name='Rate Limit By'),
+        ),
+        migrations.AddField(
+            model_name='form',
+            name='rate_limit_period',
+            field=models.PositiveIntegerField(default=60, help_text='In seconds.', verbose_name='Rate Limit Period'),
+        ),
+    ]
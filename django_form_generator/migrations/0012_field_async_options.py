@@ -0,0 +1,39 @@
+# Generated by Django 4.1.1 on 2026-10-19 18:25
+
+from django.db import migrations, models
+
+
+INDEX_NAME = "f_g_option_name_prefix"
+
+
+def create_prefix_index(apps, schema_editor):
+    # `name__istartswith` of `Field.search_choices` is `UPPER("name"::text) LIKE UPPER(...)` on Postgres
+    if schema_editor.connection.vendor == "postgresql":
+        table = apps.get_model("django_form_generator", "Option")._meta.db_table
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{INDEX_NAME}" ON "{table}" (UPPER("name"::text) text_pattern_ops)'
+        )
+
+
+def drop_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{INDEX_NAME}"')
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_form_generator', '0011_form_rate_limit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='field',
+            name='async_options',
+            field=models.BooleanField(default=False, help_text='Search the options while typing instead of rendering all of them, for fields with a lot of options', verbose_name='Async Options'),
+        ),
+        migrations.AddIndex(
+            model_name='fieldoptionthrough',
+            index=models.Index(fields=['field', 'weight'], name='f_g_fieldoptionthrough_field'),
+        ),
+        migrations.RunPython(create_prefix_index, drop_prefix_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.1 on 2026-10-19 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_form_generator', '0012_field_async_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='form',
+            name='is_wizard',
+            field=models.BooleanField(default=False, help_text='Show one category of fields per step, the next step is loaded when the current one is valid.', verbose_name='Is Wizard'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.1 on 2026-10-19 18:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_form_generator', '0013_form_is_wizard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formapimanager',
+            name='update_trigger',
+            field=models.CharField(choices=[('always', 'Always'), ('changed_fields', 'When a field of its url or body changed'), ('never', 'Never')], default='always', help_text='When the api is called for an edited response.', max_length=15, verbose_name='Call On Edit'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.1.1 on 2026-10-19 18:51
+
+from django.db import migrations
+import django_form_generator.common.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_form_generator', '0014_formapimanager_update_trigger'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='formresponse',
+            name='api_response',
+            field=django_form_generator.common.models.FastJSONField(blank=True, null=True, verbose_name='Api Respons'),
+        ),
+        migrations.AlterField(
+            model_name='formresponse',
+            name='data',
+            field=django_form_generator.common.models.FastJSONField(verbose_name='Data'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.1.1 on 2026-10-19 18:56
+
+from django.db import migrations, models
+import django_form_generator.common.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_form_generator', '0015_formresponse_fast_json'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formapimanager',
+            name='response_keys',
+            field=models.CharField(blank=True, help_text='Comma separated keys of the result to save (dotted for nested keys, like data.total) with the selected keys storage.', max_length=500, null=True, verbose_name='Response Keys'),
+        ),
+        migrations.AddField(
+            model_name='formapimanager',
+            name='response_storage',
+            field=models.CharField(choices=[('none', 'Nothing'), ('status', 'Status code only'), ('keys', 'Selected keys'), ('full', 'Full response')], default='full', help_text='What is saved of the result in the api response of a form response.', max_length=10, verbose_name='Response Storage'),
+        ),
+        migrations.AddField(
+            model_name='formresponse',
+            name='api_response_compressed',
+            field=models.BinaryField(blank=True, null=True, verbose_name='Compressed Api Response'),
+        ),
+        migrations.AlterField(
+            model_name='formresponse',
+            name='api_response',
+            field=django_form_generator.common.models.CompressedJSONField(blank=True, compressed_field='api_response_compressed', null=True, verbose_name='Api Respons'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.1.1 on 2026-10-19 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_form_generator', '0016_api_response_storage'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='formresponse',
+            name='f_g_formresponse_unique_id',
+        ),
+        migrations.AddIndex(
+            model_name='formfieldthrough',
+            index=models.Index(fields=['form', 'weight'], name='f_g_formfieldthrough_form'),
+        ),
+        migrations.AddIndex(
+            model_name='formresponse',
+            index=models.Index(fields=['form', 'created_at'], name='f_g_formresponse_form_created'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.1.1 on 2026-10-19 19:01
+
+from django.db import migrations, models
+import django_form_generator.common.unique_ids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_form_generator', '0017_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='formresponse',
+            name='unique_id',
+            field=models.UUIDField(default=django_form_generator.common.unique_ids.new_unique_id, unique=True, verbose_name='Unique ID'),
+        ),
+    ]
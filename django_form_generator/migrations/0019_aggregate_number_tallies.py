@@ -0,0 +1,67 @@
+# Generated by Django 4.1.1 on 2026-10-19 19:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_histograms(apps, schema_editor):
+    # the histograms of the aggregates become rows, so they are updated without locking the aggregates
+    FieldAggregate = apps.get_model("django_form_generator", "FieldAggregate")
+    FieldNumberTally = apps.get_model("django_form_generator", "FieldNumberTally")
+    FieldNumberTally.objects.bulk_create(
+        [
+            FieldNumberTally(form_id=aggregate.form_id, field_id=aggregate.field_id, bucket=bucket, count=count)
+            for aggregate in FieldAggregate.objects.exclude(histogram={}).iterator()
+            for bucket, count in aggregate.histogram.items()
+            if count > 0
+        ],
+        batch_size=500,
+    )
+
+
+def copy_tallies(apps, schema_editor):
+    FieldAggregate = apps.get_model("django_form_generator", "FieldAggregate")
+    FieldNumberTally = apps.get_model("django_form_generator", "FieldNumberTally")
+    for tally in FieldNumberTally.objects.iterator():
+        aggregate = FieldAggregate.objects.filter(form_id=tally.form_id, field_id=tally.field_id).first()
+        if aggregate is not None:
+            aggregate.histogram[tally.bucket] = tally.count
+            aggregate.save(update_fields=["histogram"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_form_generator', '0018_unique_id_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fieldaggregate',
+            name='extremes_stale',
+            field=models.BooleanField(default=False, verbose_name='Extremes Stale'),
+        ),
+        migrations.CreateModel(
+            name='FieldNumberTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.CharField(max_length=32, verbose_name='Bucket')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Count')),
+                ('field', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='number_tallies', to='django_form_generator.field', verbose_name='Field')),
+                ('form', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='number_tallies', to='django_form_generator.form', verbose_name='Form')),
+            ],
+            options={
+                'verbose_name': 'Field Number Tally',
+                'verbose_name_plural': 'Field Number Tallies',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='fieldnumbertally',
+            constraint=models.UniqueConstraint(fields=('form', 'field', 'bucket'), name='form_field_number_tally_unique'),
+        ),
+        migrations.RunPython(copy_histograms, copy_tallies),
+        migrations.RemoveField(
+            model_name='fieldaggregate',
+            name='histogram',
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.1.1 on 2026-10-19 19:43
+
+from django.db import migrations, models
+
+
+def fill_name_keys(apps, schema_editor):
+    # `casefold` has no SQL equivalent, the keys are computed in python
+    Option = apps.get_model("django_form_generator", "Option")
+    options = []
+    for option in Option.objects.only("name").iterator(chunk_size=2000):
+        option.name_key = option.name.casefold()
+        options.append(option)
+    Option.objects.bulk_update(options, ["name_key"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_form_generator', '0019_aggregate_number_tallies'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='option',
+            name='name_key',
+            field=models.CharField(default='', editable=False, max_length=300, verbose_name='Name Key'),
+        ),
+        migrations.RunPython(fill_name_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='option',
+            index=models.Index(fields=['name_key'], name='f_g_option_name_key'),
+        ),
+    ]
@@ -1,23 +1,39 @@
-import uuid
-from datetime import datetime
-from django.db import models
+import re
+import time
+from django.db import models, transaction
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.core.cache import cache
+from asgiref.sync import sync_to_async
 
-from django_form_generator.common.models import BaseModel
-from django_form_generator.common.helpers import FileFieldHelper
+from django_form_generator.common.models import BaseModel, CompressedJSONField, FastJSONField
+from django_form_generator.common import aggregates, api_results, field_plan, genres, search, unique_ids
+from django_form_generator.common.metrics import measure
+from django_form_generator.common.api_stats import api_stats
+from django_form_generator.common.circuit_breaker import APITimeBudget, CircuitBreaker
 from django_form_generator.common.utils import (
+    API_CALL_ERRORS,
     APICall,
+    AsyncAPICall,
     evaluate_data,
-    get_client_ip
+    gather_or_cancel,
+    get_client_ip,
+    request_memo,
 )
 
 from django_form_generator import const
+from django_form_generator.exceptions import FormAPIError
+from django_form_generator.managers import FieldQuerySet, FormResponseQuerySet, OptionQuerySet
 from django_form_generator.settings import form_generator_settings as fg_settings
 
 
+# results of apis that were called (asynchronously) before saving a response, see `Form.aprefetch_apis`
+API_RESULTS_ATTRIBUTE = "_form_generator_api_results"
+# names of the changed fields of an edited response, set in its form data by the edit forms & serializers
+CHANGED_FIELDS_KEY = "__changed_fields__"
+TEMPLATE_VARIABLE_RE = re.compile(r"{{\s*(\w+)")
+
 CONTENT_TYPE_MODELS_LIMIT = models.Q(
     app_label="django_form_generator", model="field"
 ) | models.Q(app_label="django_form_generator", model="option")
@@ -107,6 +123,27 @@ class Form(BaseModel):
         related_name="forms",
     )
     is_editable = models.BooleanField(_("Is Editable"), default=False)
+    is_wizard = models.BooleanField(
+        _("Is Wizard"),
+        default=False,
+        help_text=_("Show one category of fields per step, the next step is loaded when the current one is valid."),
+    )
+    rate_limit = models.PositiveIntegerField(
+        _("Rate Limit"),
+        blank=True,
+        null=True,
+        help_text=_("Maximum submissions of a client in the rate limit period, empty for no limit."),
+    )
+    rate_limit_period = models.PositiveIntegerField(
+        _("Rate Limit Period"), default=60, help_text=_("In seconds.")
+    )
+    rate_limit_by = models.CharField(
+        _("Rate Limit By"),
+        max_length=10,
+        choices=const.RateLimitBy.choices,
+        default=const.RateLimitBy.IP,
+        help_text=_("Session & user fall back to the IP address for clients without a session or login."),
+    )
 
     objects = fg_settings.FORM_MANAGER()  # type: ignore
 
@@ -126,73 +163,269 @@ class Form(BaseModel):
     def get_absolute_url(self):
         return reverse("django_form_generator:form_detail", kwargs={"pk": self.pk})
 
-    def __call_and_set_cache(self, api, cache_key, response_data, set_cache):
-        response = APICall(
-            api.method.lower(),
-            api.url,
-            api.body,
-            response_data,
-            headers=api.headers,
-        )
+    def __record_call(self, api, response, duration=None):
+        if response is None:
+            api_stats.record(api.pk, duration, None, 0, const.APICallOutcome.EXCEPTION)
+        else:
+            api_stats.record(api.pk, response.duration, response.status_code,
+                             response.payload_size, response.outcome)
+
+    def __call_api(self, api, response_data, timeout) -> APICall:
+        with measure("api_call", sender=FormAPIManager, form=self.pk, api=api.pk,
+                     execute_time=api.execute_time) as labels:
+            start = time.perf_counter()
+            try:
+                response = APICall(
+                    api.method.lower(),
+                    api.url,
+                    api.body,
+                    response_data,
+                    headers=api.headers,
+                    timeout=timeout,
+                )
+            except Exception:
+                self.__record_call(api, None, time.perf_counter() - start)
+                raise
+            self.__record_call(api, response)
+            labels["status"] = response.status_code
+        return response
+
+    async def __acall_api(self, api, response_data, timeout) -> APICall:
+        with measure("api_call", sender=FormAPIManager, form=self.pk, api=api.pk,
+                     execute_time=api.execute_time) as labels:
+            start = time.perf_counter()
+            try:
+                response = await AsyncAPICall.call(
+                    api.method.lower(),
+                    api.url,
+                    api.body,
+                    response_data,
+                    headers=api.headers,
+                    timeout=timeout,
+                )
+            except Exception:
+                await sync_to_async(self.__record_call)(api, None, time.perf_counter() - start)
+                raise
+            await sync_to_async(self.__record_call)(api, response)
+            labels["status"] = response.status_code
+        return response
+
+    def __fallback(self, api, reason, fail_silently):
+        if api.fallback == const.APIFallback.FAIL and not fail_silently:
+            raise FormAPIError(api, reason)
+        if api.fallback == const.APIFallback.CACHE:
+            last_good = cache.get(api.last_good_cache_key)
+            if last_good is not None:
+                status_code, result, body = last_good
+                return api, status_code, result, body
+        return None
+
+    def __prepare_call(self, api, execute_time, request, budget, fail_silently):
+        """Return `(response, None)` when the api must not be called (cached response, open circuit or
+        exhausted time budget) otherwise `(None, (cache_key, timeout))`."""
+        cache_key = None
+        if api.cache_by:
+            if api.cache_by == const.CacheMethod.SESSION_KEY:
+                cache_method = request.session.session_key
+            elif api.cache_by == const.CacheMethod.USER_ID and request.user.is_authenticated:
+                cache_method = request.user.id
+            else:
+                cache_method = get_client_ip(request)
+            cache_key = f"FormAPIs_{self.pk}_{api.pk}_{execute_time}_{cache_method}"
+            cached_response = cache.get(cache_key)
+            if cached_response:
+                return cached_response, None
+
+        if not CircuitBreaker(api).allow_request():
+            return self.__fallback(api, "circuit open", fail_silently), None
+        timeout = budget.timeout(api.get_timeout())
+        if timeout is not None and timeout <= 0:
+            return self.__fallback(api, "time budget exhausted", fail_silently), None
+        return None, (cache_key, timeout)
+
+    def __finish_call(self, api, cache_key, response: APICall | None, error, fail_silently):
+        """Update the circuit breaker & caches with the outcome of a call and return the response (or its fallback)."""
+        breaker = CircuitBreaker(api)
+        if error is not None:
+            breaker.record_failure()
+            return self.__fallback(api, error.__class__.__name__, fail_silently)
+
         status_code, result, body = response.get_result()
-        if set_cache:
+        if status_code >= 500:
+            breaker.record_failure()
+            return self.__fallback(api, f"status {status_code}", fail_silently)
+
+        breaker.record_success()
+        if api.fallback == const.APIFallback.CACHE:
+            cache.set(api.last_good_cache_key, (status_code, result, body), fg_settings.API_LAST_GOOD_TIMEOUT)
+        if cache_key:
             cache.set(cache_key, (api, status_code, result, body))
         return api, status_code, result, body
 
+    def __call_and_set_cache(self, api, execute_time, response_data, budget, fail_silently):
+        response, plan = self.__prepare_call(api, execute_time, response_data['request'], budget, fail_silently)
+        if plan is None:
+            return response
+        cache_key, timeout = plan
+        try:
+            response = self.__call_api(api, response_data, timeout)
+        except API_CALL_ERRORS as e:
+            return self.__finish_call(api, cache_key, None, e, fail_silently)
+        return self.__finish_call(api, cache_key, response, None, fail_silently)
+
+    async def __acall_and_set_cache(self, api, execute_time, response_data, budget, fail_silently):
+        response, plan = await sync_to_async(self.__prepare_call)(
+            api, execute_time, response_data['request'], budget, fail_silently
+        )
+        if plan is None:
+            return response
+        cache_key, timeout = plan
+        try:
+            response = await self.__acall_api(api, response_data, timeout)
+        except API_CALL_ERRORS as e:
+            return await sync_to_async(self.__finish_call)(api, cache_key, None, e, fail_silently)
+        return await sync_to_async(self.__finish_call)(api, cache_key, response, None, fail_silently)
+
+    def __memo_key(self, execute_time, response_data: dict, fail_silently: bool):
+        """Apis called to render a page (with only the request as data) are called once per request,
+        e.g. by `FormGeneratorView` & every `render_pre_api` tag of the page."""
+        if set(response_data) != {"request"}:
+            return None
+        return ("apis", self.pk, execute_time, fail_silently)
+
+    def __get_apis(self, execute_time):
+        return self.apis.filter(is_active=True, execute_time=execute_time).order_by('form_apis__weight')
+
+    @staticmethod
+    def __triggered_apis(apis, response_data: dict) -> list:
+        """An edited response (with its changed fields in the data) only calls the apis that care about them."""
+        changed_fields = response_data.get(CHANGED_FIELDS_KEY)
+        if changed_fields is None:
+            return list(apis)
+        return [api for api in apis if api.is_triggered_by(changed_fields)]
+
+    @staticmethod
+    def __api_data(response_data: dict) -> dict:
+        """The data the urls & the bodies of the apis are evaluated with, without the changed fields
+        (`{{form_data}}` is only the submitted data)."""
+        if CHANGED_FIELDS_KEY not in response_data:
+            return response_data
+        return {key: value for key, value in response_data.items() if key != CHANGED_FIELDS_KEY}
+
     def __call_apis(
-        self, execute_time: const.FormAPIManagerExecuteTime, response_data: dict
+        self, execute_time: const.FormAPIManagerExecuteTime, response_data: dict, fail_silently: bool = True
     ):
-        request = response_data['request']
-        cache_key = "FormAPIs_{}_{}_{}"
+        """Call the active apis of `execute_time` in order.
 
+        Every api is guarded by its circuit breaker and all the apis of a request share the `API_TIME_BUDGET`,
+        an api that can't be called falls back according to `api.fallback`
+        (`FormAPIError` is only raised when `fail_silently` is False).
+        """
+        request = response_data['request']
+        prefetched = getattr(request, API_RESULTS_ATTRIBUTE, {}).pop((self.pk, execute_time), None)
+        if prefetched is not None:
+            return prefetched
+        memo, memo_key = request_memo(request), self.__memo_key(execute_time, response_data, fail_silently)
+        if memo_key is not None and memo_key in memo:
+            return memo[memo_key]
+
+        budget = APITimeBudget.for_request(request)
         responses = []
-        for api in self.apis.filter(is_active=True, execute_time=execute_time).order_by('form_apis__weight'):
+        apis = self.__triggered_apis(self.__get_apis(execute_time), response_data)
+        response_data = self.__api_data(response_data)
+        for api in apis:
             api: FormAPIManager
-            if api.cache_by:
-                if api.cache_by == const.CacheMethod.SESSION_KEY:
-                    cache_method = request.session.session_key
-                elif api.cache_by == const.CacheMethod.USER_ID and request.user.is_authenticated:
-                    cache_method = request.user.id
-                else:
-                    cache_method = get_client_ip(request)
-                cache_key = cache_key.format(self.pk, execute_time, cache_method)
-                cached_response = cache.get(cache_key)
-                if cached_response:
-                    responses.append(cached_response)
-                else:
-                    response = self.__call_and_set_cache(api, cache_key, response_data, True)
-                    responses.append(response)
-
-            else:
-                response = self.__call_and_set_cache(api, cache_key, response_data, False)
+            response = self.__call_and_set_cache(api, execute_time, response_data, budget, fail_silently)
+            if response is not None:
                 responses.append(response)
 
+        if memo_key is not None:
+            memo[memo_key] = responses
+        return responses
+
+    async def __acall_apis(
+        self, execute_time: const.FormAPIManagerExecuteTime, response_data: dict, fail_silently: bool = True
+    ):
+        """Async `__call_apis`, the apis are called concurrently & cancelled when one of them raises `FormAPIError`."""
+        memo, memo_key = request_memo(response_data['request']), self.__memo_key(execute_time, response_data, fail_silently)
+        if memo_key is not None and memo_key in memo:
+            return memo[memo_key]
+        budget = APITimeBudget.for_request(response_data['request'])
+        apis = self.__triggered_apis([api async for api in self.__get_apis(execute_time)], response_data)
+        response_data = self.__api_data(response_data)
+        responses = await gather_or_cancel(*(
+            self.__acall_and_set_cache(api, execute_time, response_data, budget, fail_silently)
+            for api in apis
+        ))
+        responses = [response for response in responses if response is not None]
+        if memo_key is not None:
+            memo[memo_key] = responses
         return responses
 
-    def call_post_apis(self, response_data: dict):
+    async def acall_pre_apis(self, response_data: dict, fail_silently: bool = True):
+        return await self.__acall_apis(const.FormAPIManagerExecuteTime.PRE_LOAD, response_data, fail_silently)
+
+    async def acall_post_apis(self, response_data: dict, fail_silently: bool = True):
+        return await self.__acall_apis(const.FormAPIManagerExecuteTime.POST_LOAD, response_data, fail_silently)
+
+    async def aprefetch_apis(self, response_data: dict):
+        """Call the pre & post apis of a submit concurrently and keep the results on the request,
+        so the (synchronous) `save_response` doesn't call them again."""
+        pre_result, post_result = await gather_or_cancel(
+            self.acall_pre_apis(response_data, fail_silently=False),
+            self.acall_post_apis(response_data, fail_silently=False),
+        )
+        request = response_data['request']
+        results = getattr(request, API_RESULTS_ATTRIBUTE, None)
+        if results is None:
+            results = {}
+            setattr(request, API_RESULTS_ATTRIBUTE, results)
+        results[(self.pk, const.FormAPIManagerExecuteTime.PRE_LOAD)] = pre_result
+        results[(self.pk, const.FormAPIManagerExecuteTime.POST_LOAD)] = post_result
+
+    def call_post_apis(self, response_data: dict, fail_silently: bool = True):
         return self.__call_apis(
-            const.FormAPIManagerExecuteTime.POST_LOAD, response_data
+            const.FormAPIManagerExecuteTime.POST_LOAD, response_data, fail_silently
         )
 
     def render_post_apis(self, response_data: dict):
         data = []
         results = self.call_post_apis(response_data)
-        for api, _, result in results:
+        for api, _, result, _ in results:
             res = evaluate_data(api.response, result)
-            data.append(res)
+            data.append((api.pk, res))
         return data
 
-    def call_pre_apis(self, response_data: dict):
-        return self.__call_apis(const.FormAPIManagerExecuteTime.PRE_LOAD, response_data)
+    def call_pre_apis(self, response_data: dict, fail_silently: bool = True):
+        return self.__call_apis(const.FormAPIManagerExecuteTime.PRE_LOAD, response_data, fail_silently)
+
+    def prefetch_pre_apis(self, response_data: dict):
+        """Call the pre load apis whose results are cached (`cache_by`) to warm up their cache before the page needs
+        them, the results of the other apis couldn't be used by the page (`PRE_APIS_LOADING` is `background`)."""
+        execute_time = const.FormAPIManagerExecuteTime.PRE_LOAD
+        budget = APITimeBudget.for_request(response_data['request'])
+        responses = []
+        for api in self.__get_apis(execute_time).exclude(cache_by__isnull=True).exclude(cache_by=""):
+            response = self.__call_and_set_cache(api, execute_time, response_data, budget, True)
+            if response is not None:
+                responses.append(response)
+        return responses
 
     def render_pre_apis(self, response_data: dict):
         data = []
         results = self.call_pre_apis(response_data)
-        for api, _, result in results:
+        for api, _, result, _ in results:
             res = evaluate_data(api.response, result)
             data.append((api.pk, res))
         return data
 
+    async def arender_pre_apis(self, response_data: dict):
+        results = await self.acall_pre_apis(response_data)
+        return [(api.pk, evaluate_data(api.response, result)) for api, _, result, _ in results]
+
+    def has_pre_apis(self) -> bool:
+        return self.__get_apis(const.FormAPIManagerExecuteTime.PRE_LOAD).exists()
+
     def get_fields(self, extra: dict | None = None):
         conds = {"is_active": True}
         if extra:
@@ -203,6 +436,21 @@ class Form(BaseModel):
             "form_field_through__weight",
         )
     
+    def get_steps(self) -> list:
+        """Category ids of the wizard steps in order of their weight, `None` (the fields without category) is the last step."""
+        categories = self.form_field_through.filter(field__is_active=True).values_list(
+            "category_id", "category__weight"
+        ).distinct().order_by(models.F("category__weight").asc(nulls_last=True), "category_id")
+        return [category_id for category_id, weight in categories] or [None]
+
+    def get_step_fields(self, category_id: int | None):
+        return self.get_fields({"form_field_through__form": self, "form_field_through__category": category_id})
+
+    def get_step_category(self, category_id: int | None):
+        if category_id is None:
+            return None
+        return FieldCategory.objects.filter(pk=category_id).first()
+
     @property
     def render_fields(self):
         data = []
@@ -216,7 +464,9 @@ class Form(BaseModel):
                     "parent_content_type": getattr(field.content_type, "model", None),
                     "placeholder": field.placeholder,
                     "position": form_field_through.position,
-                    "options": field.get_choices().values('id', 'name'),
+                    "options": [] if field.async_options else field.get_choices().values('id', 'name'),
+                    "options_url": reverse("django_form_generator:api:api_field_options", args=(field.pk,))
+                    if field.async_options else None,
                     "validators": [{'code': validator.code, 'limit_value': validator.limit_value, 'message': validator.message} for validator in attrs.get('validators',[])]
                 })
             data.append({
@@ -264,6 +514,8 @@ class FormFieldThrough(models.Model):
         ordering = ("weight",)
         indexes = [
             models.Index(fields=("weight",), name="f_g_%(class)s_weight"),
+            # `Form.get_fields`: the fields of a form in order
+            models.Index(fields=("form", "weight"), name="f_g_%(class)s_form"),
         ]
         constraints = [
             models.UniqueConstraint(fields=['field', 'form'],
@@ -301,6 +553,11 @@ class Field(BaseModel):
             "Only for multi value fields like Dropdown, Radio, Checkbox, etc..."
         ),
     )
+    async_options = models.BooleanField(
+        _("Async Options"),
+        default=False,
+        help_text=_("Search the options while typing instead of rendering all of them, for fields with a lot of options"),
+    )
     is_active = models.BooleanField(_("Is Active"))
     # depends
     content_type = models.ForeignKey(
@@ -318,6 +575,8 @@ class Field(BaseModel):
 
     depends = GenericRelation('self')
 
+    objects = FieldQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Field")
         verbose_name_plural = _("Fields")
@@ -330,6 +589,12 @@ class Field(BaseModel):
     def __str__(self) -> str:
         return self.label
 
+    def clean_fields(self, exclude=None):
+        # the choices of `genre` are the built-in genres, the genres registered by the project are valid too
+        if self.genre not in const.FieldGenre.values and genres.is_registered(self.genre):
+            exclude = {*(exclude or ()), "genre"}
+        super().clean_fields(exclude)
+
     def build_serializer_attrs(self, extra_attrs: dict | None = None):
         attrs = {
             "allow_null": not self.is_required,
@@ -409,6 +674,33 @@ class Field(BaseModel):
     def get_choices(self):
         return self.options.filter(is_active=True).order_by("field_options__weight")
 
+    def search_choices(self, term: str = ""):
+        """Active options of the field whose name starts with `term` (case insensitive), in the order of their names.
+
+        The options are found with a range of the `name_key` index and then checked to be options of the field,
+        a field can have a lot of options but few of them match a prefix.
+        """
+        if not term:
+            return self.get_choices()
+        key = Option.get_name_key(term)
+        return Option.objects.filter(
+            models.Exists(FieldOptionThrough.objects.filter(field=self, option=models.OuterRef("pk"))),
+            is_active=True,
+            name_key__gte=key,
+            name_key__lt=key + search.PREFIX_END,
+        ).order_by("name_key")
+
+    def filter_choice_ids(self, values) -> set:
+        """The ids of `values` that are active options of the field, checked with one query (the options aren't loaded)."""
+        ids = {int(value) for value in values if str(value).isdigit()}
+        if not ids:
+            return set()
+        return set(self.get_choices().filter(id__in=ids).values_list("id", flat=True))
+
+    @property
+    def options_url(self) -> str:
+        return reverse("django_form_generator:field_options", args=(self.pk,))
+
 
 class FieldValidator(BaseModel):
     field = models.ForeignKey("django_form_generator.Field", verbose_name=_("Field"), on_delete=models.PROTECT, related_name='validators')
@@ -448,8 +740,10 @@ class FieldOptionThrough(models.Model):
 
     class Meta:
         ordering = ("weight",)
-        indexes = [models.Index(
-            fields=("weight",), name="f_g_%(class)s_weight")]
+        indexes = [
+            models.Index(fields=("weight",), name="f_g_%(class)s_weight"),
+            models.Index(fields=("field", "weight"), name="f_g_%(class)s_field"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.field.name} | {self.option.name}"
@@ -457,18 +751,34 @@ class FieldOptionThrough(models.Model):
 
 class Option(BaseModel):
     name = models.CharField(_("Name"), max_length=100)
+    # casefolded name, searched by prefix (see `Field.search_choices`)
+    name_key = models.CharField(_("Name Key"), max_length=300, default="", editable=False)
     is_active = models.BooleanField(_("Is Active"), default=True)
 
+    objects = OptionQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Option")
         verbose_name_plural = _("Options")
         indexes = [
             models.Index(fields=("name",), name="f_g_%(class)s_name"),
+            models.Index(fields=("name_key",), name="f_g_%(class)s_name_key"),
         ]
 
     def __str__(self) -> str:
         return self.name
 
+    @staticmethod
+    def get_name_key(name: str) -> str:
+        return name.casefold()
+
+    def save(self, *args, **kwargs):
+        self.name_key = self.get_name_key(self.name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "name" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "name_key"}
+        super().save(*args, **kwargs)
+
 
 class FormAPIThrough(models.Model):
     form = models.ForeignKey(
@@ -509,6 +819,23 @@ class FormAPIManager(BaseModel):
     )
     response = models.TextField(_("Response"), blank=True, null=True)
     cache_by = models.CharField(_("Cache By"), max_length=15, choices=const.CacheMethod.choices, blank=True, null=True)
+    timeout = models.FloatField(_("Timeout (seconds)"), blank=True, null=True,
+                                help_text=_("Leave empty to use the API_DEFAULT_TIMEOUT setting."))
+    failure_threshold = models.PositiveIntegerField(_("Failure Threshold"), default=5,
+                                                    help_text=_("Consecutive failures that open the circuit, 0 disables the circuit breaker."))
+    recovery_timeout = models.PositiveIntegerField(_("Recovery Timeout (seconds)"), default=30,
+                                                   help_text=_("How long the circuit stays open before a probe call is allowed."))
+    fallback = models.CharField(_("Fallback"), max_length=10, choices=const.APIFallback.choices,
+                                default=const.APIFallback.SKIP)
+    update_trigger = models.CharField(_("Call On Edit"), max_length=15, choices=const.APIUpdateTrigger.choices,
+                                      default=const.APIUpdateTrigger.ALWAYS,
+                                      help_text=_("When the api is called for an edited response."))
+    response_storage = models.CharField(_("Response Storage"), max_length=10, choices=const.APIResponseStorage.choices,
+                                        default=const.APIResponseStorage.FULL,
+                                        help_text=_("What is saved of the result in the api response of a form response."))
+    response_keys = models.CharField(_("Response Keys"), max_length=500, blank=True, null=True,
+                                     help_text=_("Comma separated keys of the result to save (dotted for nested keys, like data.total) "
+                                                 "with the selected keys storage."))
     is_active = models.BooleanField(_("Is Active"))
 
     class Meta:
@@ -523,18 +850,222 @@ class FormAPIManager(BaseModel):
     def __str__(self) -> str:
         return self.title
 
+    def get_timeout(self) -> float | None:
+        return self.timeout if self.timeout is not None else fg_settings.API_DEFAULT_TIMEOUT
+
+    @property
+    def last_good_cache_key(self):
+        return f"FormAPIs_last_good_{self.pk}"
+
+    def get_response_keys(self) -> list[str]:
+        return [key.strip() for key in (self.response_keys or "").split(",") if key.strip()]
+
+    def get_used_fields(self) -> set:
+        """Names of the variables of the url & the body."""
+        return set(TEMPLATE_VARIABLE_RE.findall(f"{self.url} {self.body or ''}"))
+
+    def is_triggered_by(self, changed_fields) -> bool:
+        """Whether the api is called for an edited response whose `changed_fields` changed."""
+        if self.update_trigger == const.APIUpdateTrigger.CHANGED_FIELDS:
+            used = self.get_used_fields()
+            return "form_data" in used or not used.isdisjoint(changed_fields)
+        return self.update_trigger != const.APIUpdateTrigger.NEVER
+
+
+class FormAPIManagerStat(models.Model):
+    api = models.ForeignKey(
+        "django_form_generator.FormAPIManager",
+        verbose_name=_("API"),
+        on_delete=models.CASCADE,
+        related_name="stats",
+    )
+    bucket = models.DateTimeField(_("Bucket (minute)"))
+    count = models.PositiveIntegerField(_("Count"), default=0)
+    success_count = models.PositiveIntegerField(_("Success Count"), default=0)
+    http_error_count = models.PositiveIntegerField(_("HTTP Error Count"), default=0)
+    invalid_json_count = models.PositiveIntegerField(_("Invalid JSON Count"), default=0)
+    exception_count = models.PositiveIntegerField(_("Exception Count"), default=0)
+    total_duration = models.FloatField(_("Total Duration (s)"), default=0)
+    max_duration = models.FloatField(_("Max Duration (s)"), default=0)
+    total_payload_size = models.PositiveBigIntegerField(_("Total Payload Size (bytes)"), default=0)
+    histogram = models.JSONField(_("Latency Histogram"), default=dict)
+    status_codes = models.JSONField(_("Status Codes"), default=dict)
+
+    class Meta:
+        verbose_name = _("FormAPIManager Stat")
+        verbose_name_plural = _("FormAPIManager Stats")
+        ordering = ("-bucket",)
+        indexes = [
+            models.Index(fields=("bucket",), name="f_g_%(class)s_bucket"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['api', 'bucket'],
+                name='api_stat_bucket_unique',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.api_id} | {self.bucket}"
+
+    @property
+    def error_count(self):
+        return self.http_error_count + self.invalid_json_count + self.exception_count
+
+
+class FieldAggregate(models.Model):
+    """Summary of the answers of a field in the responses of a form, maintained on every save."""
+
+    form = models.ForeignKey(
+        "django_form_generator.Form",
+        verbose_name=_("Form"),
+        on_delete=models.CASCADE,
+        related_name="field_aggregates",
+    )
+    field = models.ForeignKey(
+        "django_form_generator.Field",
+        verbose_name=_("Field"),
+        on_delete=models.CASCADE,
+        related_name="aggregates",
+    )
+    response_count = models.PositiveIntegerField(_("Response Count"), default=0)
+    filled_count = models.PositiveIntegerField(_("Filled Count"), default=0)
+    value_count = models.PositiveIntegerField(_("Value Count"), default=0)
+    value_sum = models.FloatField(_("Value Sum"), default=0)
+    value_min = models.FloatField(_("Value Min"), blank=True, null=True)
+    value_max = models.FloatField(_("Value Max"), blank=True, null=True)
+    # an extreme was removed: min & max are read again from the responses when the aggregates are read
+    extremes_stale = models.BooleanField(_("Extremes Stale"), default=False)
+
+    class Meta:
+        verbose_name = _("Field Aggregate")
+        verbose_name_plural = _("Field Aggregates")
+        constraints = [
+            models.UniqueConstraint(fields=['form', 'field'],
+                name='form_field_aggregate_unique',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.form_id} | {self.field_id}"
+
+    @property
+    def fill_rate(self) -> float | None:
+        return self.filled_count / self.response_count if self.response_count else None
+
+    @property
+    def value_avg(self) -> float | None:
+        return self.value_sum / self.value_count if self.value_count else None
+
+
+class FieldOptionTally(models.Model):
+    form = models.ForeignKey(
+        "django_form_generator.Form",
+        verbose_name=_("Form"),
+        on_delete=models.CASCADE,
+        related_name="option_tallies",
+    )
+    field = models.ForeignKey(
+        "django_form_generator.Field",
+        verbose_name=_("Field"),
+        on_delete=models.CASCADE,
+        related_name="option_tallies",
+    )
+    option = models.ForeignKey(
+        "django_form_generator.Option",
+        verbose_name=_("Option"),
+        on_delete=models.CASCADE,
+        related_name="tallies",
+    )
+    count = models.PositiveIntegerField(_("Count"), default=0)
+
+    class Meta:
+        verbose_name = _("Field Option Tally")
+        verbose_name_plural = _("Field Option Tallies")
+        constraints = [
+            models.UniqueConstraint(fields=['form', 'field', 'option'],
+                name='form_field_option_tally_unique',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.form_id} | {self.field_id} | {self.option_id}"
+
+
+class FieldNumberTally(models.Model):
+    """Count of the values of a number field in a bucket (`AGGREGATE_NUMBER_BUCKETS`) of its histogram."""
+
+    form = models.ForeignKey(
+        "django_form_generator.Form",
+        verbose_name=_("Form"),
+        on_delete=models.CASCADE,
+        related_name="number_tallies",
+    )
+    field = models.ForeignKey(
+        "django_form_generator.Field",
+        verbose_name=_("Field"),
+        on_delete=models.CASCADE,
+        related_name="number_tallies",
+    )
+    bucket = models.CharField(_("Bucket"), max_length=32)
+    count = models.PositiveIntegerField(_("Count"), default=0)
+
+    class Meta:
+        verbose_name = _("Field Number Tally")
+        verbose_name_plural = _("Field Number Tallies")
+        constraints = [
+            models.UniqueConstraint(fields=['form', 'field', 'bucket'],
+                name='form_field_number_tally_unique',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.form_id} | {self.field_id} | {self.bucket}"
+
+
+class FieldDateTally(models.Model):
+    form = models.ForeignKey(
+        "django_form_generator.Form",
+        verbose_name=_("Form"),
+        on_delete=models.CASCADE,
+        related_name="date_tallies",
+    )
+    field = models.ForeignKey(
+        "django_form_generator.Field",
+        verbose_name=_("Field"),
+        on_delete=models.CASCADE,
+        related_name="date_tallies",
+    )
+    date = models.DateField(_("Date"))
+    count = models.PositiveIntegerField(_("Count"), default=0)
+
+    class Meta:
+        verbose_name = _("Field Date Tally")
+        verbose_name_plural = _("Field Date Tallies")
+        ordering = ("date",)
+        constraints = [
+            models.UniqueConstraint(fields=['form', 'field', 'date'],
+                name='form_field_date_tally_unique',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.form_id} | {self.field_id} | {self.date}"
+
 
 class FormResponseBase(BaseModel):
     unique_id = models.UUIDField(
-        _("Unique ID"), unique=True, default=uuid.uuid4)
+        _("Unique ID"), unique=True, default=unique_ids.new_unique_id)
     form = models.ForeignKey(
         "django_form_generator.Form",
         verbose_name=_("Form"),
         on_delete=models.PROTECT,
         related_name="%(class)s_responses",
     )
-    data = models.JSONField(_("Data"))
-    api_response = models.JSONField(_("Api Respons"), blank=True, null=True)
+    data = FastJSONField(_("Data"))
+    api_response = CompressedJSONField(_("Api Respons"), blank=True, null=True, compressed_field="api_response_compressed")
+    api_response_compressed = models.BinaryField(_("Compressed Api Response"), blank=True, null=True, editable=False)
+
+    objects = FormResponseQuerySet.as_manager()
 
     class Meta:
         abstract = True
@@ -544,9 +1075,19 @@ class FormResponseBase(BaseModel):
 
     def save(self, *args, **kwargs):
         if self.unique_id is None:
-            self.unique_id = uuid.uuid4()
+            self.unique_id = unique_ids.new_unique_id()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "api_response" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "api_response_compressed"}
         return super().save(*args, **kwargs)
 
+    def delete(self, *args, **kwargs):
+        deltas = aggregates.removal_deltas([(self.form_id, self.data)]) if fg_settings.AGGREGATES_ENABLED else {}
+        using = self._state.db
+        result = super().delete(*args, **kwargs)
+        aggregates.apply_deltas(deltas, using=using)
+        return result
+
     @property
     def pure_data(self):
         result = {}
@@ -555,111 +1096,189 @@ class FormResponseBase(BaseModel):
         return result
 
     def get_data(self):
+        decoders = genres.get_decoders()
         result = []
         for data in self.data:
             data_ = data.copy()
-            if (
-                data["genre"] == const.FieldGenre.UPLOAD_FILE.value
-                and data["value"] is not None
-            ):
-                data_["value"] = FileFieldHelper(
-                    data["value"]["url"], data["value"]["directory"]
-                )
-                result.append(data_)
-            elif data_["value"] and data_["value"] !='None' and data["genre"] in (const.FieldGenre.DATETIME, const.FieldGenre.DATE):
-                data_["value"] = datetime.fromisoformat(data_["value"])
-                result.append(data_)
-            else:
-                result.append(data_)
+            decode = decoders.get(data["genre"])
+            if decode is not None:
+                data_["value"] = decode(data_["value"])
+            result.append(data_)
         return result
 
     @classmethod
     def _generate_api_result(cls, results):
         data = []
         for api, status_code, result, body in results:
-            data.append(
-                {
-                    "api": api.id,
-                    "url": api.url,
-                    "method": api.method,
-                    "body": body or api.body,
-                    "response_status_code": status_code,
-                    "result": result,
-                }
-            )
+            item = api_results.build_result(api, status_code, result, body)
+            if item is not None:
+                data.append(item)
         return data or None
 
     @classmethod
     def _generate_data(cls, form, form_data, instance=None):
         data = []
         request = form_data["request"]
-        for field in form.get_fields():
-            field_value = form_data.get(field.name, None)
+        instance_data = instance.pure_data if instance else {}
+        for field in field_plan.get_field_plan(form):
             kwargs = {}
             if field.genre == const.FieldGenre.UPLOAD_FILE:
-                pure_data = instance.pure_data.get(field.name) if instance else None
+                pure_data = instance_data.get(field.name)
                 kwargs.update({'host':  request._current_scheme_host,
                             'instance_directory': pure_data.get("directory") if pure_data else None })
-            field_value = const.FieldGenre(field.genre).evaluate(field_value, **kwargs)
-
-            category_title = field.form_field_through.filter(form_id=form.pk). \
-                values_list('category__title', flat=True).last()
-
-            new_data = {
+            data.append({
                 "id": field.id,
                 "name": field.name,
                 "label": field.label,
                 "genre": field.genre,
-                "category": category_title,
-                "value": field_value,
-                "depends_on": None
-            }
-            if field.content_object:
-                new_data["depends_on"] = {"id": field.object_id, 
-                                            "type": field.content_type.model}
-            data.append(
-                new_data
-            )
+                "category": field.category,
+                "value": field.evaluate(form_data.get(field.name, None), **kwargs),
+                "depends_on": dict(field.depends_on) if field.depends_on else None,
+            })
         return data or None
 
+    @classmethod
+    def _update_data(cls, form, form_data, instance, changed_fields: set):
+        """`data` of an edited response with the values of `changed_fields` evaluated again,
+        None when the fields of the form changed since the response was saved."""
+        fields = [(field.name, field.genre) for field in field_plan.get_field_plan(form)]
+        if fields != [(item["name"], item["genre"]) for item in instance.data or []]:
+            return None
+        request = form_data["request"]
+        data = list(instance.data)
+        for index, item in enumerate(data):
+            if item["name"] not in changed_fields:
+                continue
+            kwargs = {}
+            if item["genre"] == const.FieldGenre.UPLOAD_FILE:
+                kwargs.update({'host': request._current_scheme_host,
+                               'instance_directory': item["value"].get("directory") if item["value"] else None})
+            value = genres.get_codec(item["genre"]).encode(form_data.get(item["name"], None), **kwargs)
+            data[index] = {**item, "value": value}
+        return data
+
+    @classmethod
+    def _merge_api_response(cls, old, new):
+        """The new results replace the results of the same apis, the results of the apis that weren't called are kept."""
+        if not old:
+            return new
+        results = {item["api"]: item for group in new for item in group}
+        merged = [[results.pop(item["api"], item) for item in group] for group in old]
+        for group in new:
+            added = [item for item in group if item["api"] in results]
+            if added:
+                merged.append(added)
+        return merged
+
 
 class FormResponse(FormResponseBase):
     user_ip = models.GenericIPAddressField(
         _("IP Address"), blank=True, null=True)
+    search_text = models.TextField(_("Search Text"), blank=True, default="", editable=False)
 
     class Meta:
         verbose_name = _("Form Response")
         verbose_name_plural = _("Form Responses")
         indexes = [
             models.Index(fields=("user_ip",), name="f_g_%(class)s_user"),
-            models.Index(fields=("unique_id",),
-                         name="f_g_%(class)s_unique_id"),
+            # the responses of a form: listing, counts & date filters
+            models.Index(fields=("form", "created_at"), name="f_g_%(class)s_form_created"),
         ]
 
     @classmethod
     def save_response(cls, form, data, user_ip=None, update_form_response_id=None):
+        with measure("save_response", sender=cls, form=form.pk):
+            return cls._save_response(form, data, user_ip, update_form_response_id)
+
+    @classmethod
+    def _save_response(cls, form, data, user_ip=None, update_form_response_id=None):
         api_response = []
-        pre_result = form.call_pre_apis(data)
-        post_result = form.call_post_apis(data)
+        pre_result = form.call_pre_apis(data, fail_silently=False)
+        post_result = form.call_post_apis(data, fail_silently=False)
         pre = cls._generate_api_result(pre_result)
         post = cls._generate_api_result(post_result)
         if pre:
             api_response.append(pre)
         if post:
             api_response.append(post)
-        if update_form_response_id is None:
-            response = FormResponse.objects.create(
-                data=cls._generate_data(form, data),
-                user_ip=user_ip,
-                api_response=api_response or None,
-                form=form,
-            )
-        else:
-            response = FormResponse.objects.get(id=update_form_response_id)
+        with transaction.atomic():
+            if update_form_response_id is None:
+                old_data = None
+                response_data = cls._generate_data(form, data)
+                response = FormResponse.objects.create(
+                    data=response_data,
+                    user_ip=user_ip,
+                    api_response=api_response or None,
+                    form=form,
+                    search_text=search.build_search_text(response_data),
+                )
+                if search.uses_tokens(cls):
+                    search.index_response(response)
+                new_data = response.data
+            else:
+                response = FormResponse.objects.get(id=update_form_response_id)
+                new_data, old_data = cls._update_response(response, form, data, api_response)
+            if fg_settings.AGGREGATES_ENABLED and (new_data or old_data):
+                aggregates.record_response(form.pk, new_data, old_data)
+        return response
+
+    @classmethod
+    def _update_response(cls, response, form, data, api_response) -> tuple[list | None, list | None]:
+        """Save an edited response, return the new & the old items of its data that changed.
+
+        When the edit form (or serializer) tells which fields changed (`CHANGED_FIELDS_KEY`) only their values are
+        evaluated again and only the changed columns are written, otherwise the whole data is generated again.
+        """
+        old_data = response.data
+        changed_fields = data.get(CHANGED_FIELDS_KEY)
+        new_data = None if changed_fields is None else cls._update_data(form, data, response, set(changed_fields))
+        if new_data is None:
             response.data = cls._generate_data(form, data, response)
             response.api_response = api_response or response.api_response
+            response.search_text = search.build_search_text(response.data)
             response.save()
-        return response
+            if search.uses_tokens(cls):
+                search.index_response(response)
+            return response.data, old_data
+
+        changed = [index for index, item in enumerate(new_data) if item["value"] != old_data[index]["value"]]
+        update_fields = []
+        if changed:
+            response.data = new_data
+            update_fields.append("data")
+            if any(new_data[index]["genre"] in const.FieldGenre.searchable_fields() for index in changed):
+                response.search_text = search.build_search_text(new_data)
+                update_fields.append("search_text")
+        if api_response:
+            response.api_response = cls._merge_api_response(response.api_response, api_response)
+            update_fields.append("api_response")
+        if update_fields:
+            response.save(update_fields=update_fields + ["updated_at"])
+        if "search_text" in update_fields and search.uses_tokens(cls):
+            search.index_response(response)
+        return [new_data[index] for index in changed], [old_data[index] for index in changed]
+
+
+class FormResponseSearchToken(models.Model):
+    """Portable inverted index of the searchable values of the responses (not used on Postgres)."""
+
+    response = models.ForeignKey(
+        "django_form_generator.FormResponse",
+        verbose_name=_("Response"),
+        on_delete=models.CASCADE,
+        related_name="search_tokens",
+    )
+    token = models.CharField(_("Token"), max_length=100)
+
+    class Meta:
+        verbose_name = _("Form Response Search Token")
+        verbose_name_plural = _("Form Response Search Tokens")
+        indexes = [
+            models.Index(fields=("token", "response"), name="f_g_search_token"),
+        ]
+
+    def __str__(self) -> str:
+        return self.token
 
 
 def save_form_response(
@@ -0,0 +1,89 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+
+APP_LABEL = "django_form_generator"
+
+
+class RoutingState:
+    """Routing state of the current request (or of a `use_primary` block)."""
+
+    def __init__(self, pinned: bool = False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_routing_state: ContextVar[RoutingState | None] = ContextVar("form_generator_routing_state", default=None)
+
+
+def get_routing_state() -> RoutingState | None:
+    return _routing_state.get()
+
+
+def set_routing_state(state: RoutingState | None):
+    return _routing_state.set(state)
+
+
+def reset_routing_state(token):
+    _routing_state.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Send all the reads of the wrapped block to the primary database."""
+    token = set_routing_state(RoutingState(pinned=True))
+    try:
+        yield
+    finally:
+        reset_routing_state(token)
+
+
+class FormGeneratorRouter:
+    """Send the reads of django_form_generator models to `READ_REPLICAS` & the writes to `PRIMARY_DATABASE`.
+
+    After a write, reads of the same request and (with `ReplicaPinMiddleware`) of the same client
+    for `REPLICA_PIN_SECONDS` go to the primary, so a client always sees its own writes.
+    Models of the other apps are left to the other routers.
+    """
+
+    @property
+    def primary(self) -> str:
+        return fg_settings.PRIMARY_DATABASE
+
+    @property
+    def replicas(self) -> list[str]:
+        return list(fg_settings.READ_REPLICAS)
+
+    def _is_pinned(self) -> bool:
+        state = get_routing_state()
+        return state is not None and (state.pinned or state.wrote)
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label != APP_LABEL:
+            return None
+        replicas = self.replicas
+        if not replicas or self._is_pinned():
+            return self.primary
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label != APP_LABEL:
+            return None
+        state = get_routing_state()
+        if state is not None:
+            state.wrote = True
+        return self.primary
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {self.primary, *self.replicas}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == APP_LABEL and db in self.replicas:
+            return False
+        return None
@@ -8,11 +8,51 @@ DEFAULTS = {
     # 'MAX_UPLOAD_FILE_SIZE': 5242880,
     'FORM_GENERATOR_FORM': 'django_form_generator.forms.FormGeneratorForm',
     'FORM_RESPONSE_FORM': 'django_form_generator.forms.FormGeneratorResponseForm',
+    'FORM_WIZARD_FORM': 'django_form_generator.forms.FormWizardStepForm',
     'FORM_STYLE_CHOICES': 'django_form_generator.const.FormStyle',
     'FORM_MANAGER': 'django_form_generator.managers.FormManager',
     'FORM_GENERATOR_RESPONSE_MODEL': 'django_form_generator.models.FormResponse',
     'FORM_GENERATOR_SERIALIZER': 'django_form_generator.api.serializers.FormGeneratorSerializer',
     'FORM_RESPONSE_SERIALIZER': 'django_form_generator.api.serializers.FormGeneratorResponseSerializer',
+    'METRICS_ENABLED': False,
+    'METRICS_COLLECTOR': 'django_form_generator.common.metrics.MetricsCollector',
+    'METRICS_BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    'API_STATS_ENABLED': True,
+    'API_STATS_FLUSH_SIZE': 100,
+    'API_STATS_FLUSH_INTERVAL': 10,
+    'API_STATS_BUCKETS': (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+    'API_STATS_WINDOW': 60,
+    'API_STATS_RETENTION': 7,
+    'API_DEFAULT_TIMEOUT': 5,
+    'API_TIME_BUDGET': 10,
+    'API_LAST_GOOD_TIMEOUT': 60 * 60 * 24,
+    'ASYNC_VIEWS': False,
+    'PRE_APIS_LOADING': 'lazy',
+    'PRE_APIS_BACKGROUND_WORKERS': 4,
+    'PRIMARY_DATABASE': 'default',
+    'READ_REPLICAS': [],
+    'REPLICA_PIN_SECONDS': 5,
+    'REPLICA_PIN_COOKIE': 'form_generator_pin',
+    'TRUSTED_PROXIES': [],
+    'AGGREGATES_ENABLED': False,
+    'AGGREGATE_NUMBER_BUCKETS': (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000),
+    'SEARCH_BACKEND': 'auto',
+    'SEARCH_INDEX_ENABLED': True,
+    'CLIENT_VALIDATION': True,
+    'HTMX_ERROR_SWAPS': True,
+    'SCHEMA_CACHE_TIMEOUT': 60 * 60 * 24,
+    'FIELD_PLAN_CACHE': True,
+    'OPTIONS_PAGE_SIZE': 20,
+    'OPTIONS_MAX_PAGE_SIZE': 100,
+    'IDEMPOTENCY_ENABLED': True,
+    'IDEMPOTENCY_FIELD_NAME': 'idempotency_key',
+    'IDEMPOTENCY_TIMEOUT': 60 * 60 * 24,
+    'IDEMPOTENCY_LOCK_TIMEOUT': 60,
+    'WIZARD_TIMEOUT': 60 * 60 * 24,
+    'FIELD_GENRES': [],
+    'FAST_JSON': True,
+    'API_RESPONSE_COMPRESS_SIZE': None,
+    'UNIQUE_ID_VERSION': 'uuid4',
 }
 
 
@@ -20,11 +60,14 @@ IMPORT_STRINGS = [
     'FORM_RESPONSE_SAVE',
     'FORM_GENERATOR_FORM',
     'FORM_RESPONSE_FORM',
+    'FORM_WIZARD_FORM',
     'FORM_STYLE_CHOICES',
     'FORM_MANAGER',
     'FORM_GENERATOR_RESPONSE_MODEL',
     'FORM_GENERATOR_SERIALIZER',
     'FORM_RESPONSE_SERIALIZER',
+    'METRICS_COLLECTOR',
+    'FIELD_GENRES',
 ]
 
 def perform_import(val, setting_name):
@@ -0,0 +1,10 @@
+from django.dispatch import Signal
+
+
+# Sent after every measured operation (building a form, saving a response, calling an API, ...)
+# with these keyword arguments:
+#   operation (str): name of the operation e.g. "form_build", "save_response", "api_call"
+#   duration (float): wall time of the operation in seconds
+#   queries (int): number of database queries executed during the operation
+#   labels (dict): extra information about the operation e.g. {"form": 1, "api": 3, "status": 200}
+operation_measured = Signal()
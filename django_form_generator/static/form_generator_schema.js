@@ -0,0 +1,157 @@
+/*
+ * Client side validation of the generated forms against their JSON Schema (served by the `api_form_schema` api).
+ * The schema of every `form[data-schema-url]` is fetched once, the htmx submissions of invalid forms are cancelled
+ * and the first invalid input is reported, the server still validates everything.
+ */
+(function () {
+    if (window.formGeneratorSchema) {
+        window.formGeneratorSchema.load(document);
+        return;
+    }
+
+    var schemas = {};
+    var messages = {
+        invalid: "Enter a valid value.",
+        required: "This field is required.",
+        "x-maxFileSize": "The file is too large.",
+        "x-fileExtensions": "This file extension is not allowed."
+    };
+
+    function load(root) {
+        var forms = root.matches && root.matches("form[data-schema-url]") ? [root] : root.querySelectorAll("form[data-schema-url]");
+        Array.prototype.forEach.call(forms, function (form) {
+            var url = form.dataset.schemaUrl;
+            if (schemas[url] !== undefined) return;
+            schemas[url] = null;
+            fetch(url, {credentials: "same-origin", headers: {Accept: "application/json"}})
+                .then(function (response) { return response.ok ? response.json() : null; })
+                .then(function (schema) { schemas[url] = schema; })
+                .catch(function () { delete schemas[url]; });
+        });
+    }
+
+    function isEmpty(value) {
+        return value === undefined || value === null || value === "" || value === false || (Array.isArray(value) && !value.length);
+    }
+
+    // undefined when the field isn't on the page (e.g. on another step of a wizard)
+    function readValue(form, name, schema) {
+        var inputs = form.querySelectorAll('[name="' + name + '"]');
+        if (!inputs.length) return undefined;
+        var values = [];
+        Array.prototype.forEach.call(inputs, function (input) {
+            if (input.disabled) return;
+            if (input.type === "checkbox" || input.type === "radio") {
+                if (input.checked) values.push(input.value);
+            } else if (input.type === "file") {
+                Array.prototype.push.apply(values, input.files);
+            } else if (input.tagName === "SELECT") {
+                Array.prototype.forEach.call(input.selectedOptions, function (option) { values.push(option.value); });
+            } else if (input.value !== "") {
+                values.push(input.value);
+            }
+        });
+        if (schema.type === "array") return values;
+        if (schema.type === "boolean") return values.length > 0;
+        return values.length ? values[0] : null;
+    }
+
+    function checkItem(item, schema) {
+        if (item instanceof File) {
+            if (schema["x-maxFileSize"] !== undefined && item.size > schema["x-maxFileSize"]) return "x-maxFileSize";
+            var extensions = schema["x-fileExtensions"];
+            if (extensions && extensions.indexOf(item.name.split(".").pop().toLowerCase()) < 0) return "x-fileExtensions";
+            return null;
+        }
+        var text = String(item);
+        var type = schema.type === "array" ? (schema.items || {}).type : schema.type;
+        if (type === "integer") {
+            if (!/^-?\d+$/.test(text)) return "type";
+            if (schema.minimum !== undefined && Number(text) < schema.minimum) return "minimum";
+            if (schema.maximum !== undefined && Number(text) > schema.maximum) return "maximum";
+        }
+        if (schema.minLength !== undefined && text.length < schema.minLength) return "minLength";
+        if (schema.maxLength !== undefined && text.length > schema.maxLength) return "maxLength";
+        if (schema.pattern && !new RegExp(schema.pattern).test(text)) return "pattern";
+        if (schema.format === "email" && !/^[^@\s]+@[^@\s]+$/.test(text)) return "format";
+        return null;
+    }
+
+    function check(value, schema) {
+        if (isEmpty(value)) return null;
+        if (schema.type === "array") {
+            if (schema.minItems !== undefined && value.length < schema.minItems) return "minItems";
+            if (schema.maxItems !== undefined && value.length > schema.maxItems) return "maxItems";
+        }
+        var items = Array.isArray(value) ? value : [value];
+        for (var i = 0; i < items.length; i++) {
+            var keyword = checkItem(items[i], schema);
+            if (keyword) return keyword;
+        }
+        return null;
+    }
+
+    function matches(value, condition) {
+        if (isEmpty(value)) return false;
+        if (condition.const !== undefined) return String(value) === String(condition.const);
+        if (condition.contains) return value.map(String).indexOf(String(condition.contains.const)) >= 0;
+        return true;
+    }
+
+    function getRequired(schema, values) {
+        var required = (schema.required || []).slice();
+        (schema.allOf || []).forEach(function (rule) {
+            var conditions = rule.if.properties;
+            var applies = Object.keys(conditions).every(function (name) { return matches(values[name], conditions[name]); });
+            if (applies) required = required.concat(rule.then.required);
+        });
+        return required;
+    }
+
+    function validate(form, schema) {
+        var values = {};
+        Object.keys(schema.properties).forEach(function (name) {
+            values[name] = readValue(form, name, schema.properties[name]);
+        });
+        var required = getRequired(schema, values);
+        var names = Object.keys(schema.properties);
+        for (var i = 0; i < names.length; i++) {
+            var name = names[i];
+            var property = schema.properties[name];
+            if (values[name] === undefined) continue;
+            var keyword = required.indexOf(name) >= 0 && isEmpty(values[name]) ? "required" : check(values[name], property);
+            if (keyword) {
+                var custom = property["x-errorMessages"] || {};
+                return {name: name, message: custom[keyword] || messages[keyword] || messages.invalid};
+            }
+        }
+        return null;
+    }
+
+    function report(form, error) {
+        var input = form.querySelector('[name="' + error.name + '"]');
+        if (!input) return;
+        input.setCustomValidity(error.message);
+        input.reportValidity();
+        var clear = function () { input.setCustomValidity(""); };
+        input.addEventListener("input", clear, {once: true});
+        input.addEventListener("change", clear, {once: true});
+    }
+
+    document.addEventListener("htmx:beforeRequest", function (event) {
+        var elt = event.detail.elt;
+        if (!elt.hasAttribute("hx-post")) return;
+        var form = elt.closest("form[data-schema-url]");
+        var schema = form && schemas[form.dataset.schemaUrl];
+        if (!schema) return;
+        var error = validate(form, schema);
+        if (error) {
+            event.preventDefault();
+            report(form, error);
+        }
+    });
+    document.addEventListener("htmx:load", function (event) { load(event.detail.elt); });
+
+    window.formGeneratorSchema = {load: load, validate: validate};
+    load(document);
+})();
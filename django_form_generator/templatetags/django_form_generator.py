@@ -2,7 +2,8 @@ from django import template
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 
-from django_form_generator.models import Form, Form
+from django_form_generator.common.utils import memoize
+from django_form_generator.models import Form
 
 
 register = template.Library()
@@ -13,34 +14,37 @@ def render_form(form_id: int):
     return {'url': reverse('django_form_generator:form_detail', args=(form_id,))}
 
 
+@register.inclusion_tag('django_form_generator/tags/pre_api_tag.html')
+def render_pre_api_lazy(form_id: int, api_id=None):
+    url = reverse('django_form_generator:form_pre_apis', args=(form_id,))
+    return {'url': f'{url}?api={api_id}' if api_id else url}
+
+
+def _get_valid_form(request, form_id):
+    """The forms of the tags of a page are looked up once per request."""
+    return memoize(
+        request, ('valid_form', str(form_id)), lambda: Form.objects.filter_valid().filter(id=form_id).first()
+    )
+
+
+def _render_apis(context, form_id, api_id, render):
+    form = _get_valid_form(context['request'], form_id)
+    if form is None:
+        return 'Form id is not valid'
+    responses = render(form, {'request': context['request']})
+    if api_id:
+        return mark_safe(next((result for api_id_, result in responses if str(api_id_) == str(api_id)), ''))
+    return mark_safe('<br>'.join([result for _, result in responses]))
+
+
 @register.simple_tag(takes_context=True)
 def render_pre_api(context, form_id, api_id=None):
-    try:
-        form = Form.objects.filter_valid().get(id=form_id)
-    except Form.DoesNotExist:
-        return 'Form id is not valid'
-    else:
-        responses = form.render_pre_apis({'request': context['request']})
-        if api_id:
-            responses = mark_safe(next((result for api_id_, result in responses if api_id_ == api_id)))
-        else:
-            responses = mark_safe('<br>'.join([result for _, result in responses]))
-        return responses
+    return _render_apis(context, form_id, api_id, Form.render_pre_apis)
 
 
 @register.simple_tag(takes_context=True)
 def render_post_api(context, form_id, api_id=None):
-    try:
-        form = Form.objects.filter_valid().get(id=form_id)
-    except Form.DoesNotExist:
-        return 'Form id is not valid'
-    else:
-        responses = form.render_post_apis({'request': context['request']})
-        if api_id:
-            responses = mark_safe(next((result for api_id_, result in responses if api_id_ == api_id)))
-        else:
-            responses = mark_safe('<br>'.join([result for _, result in responses]))
-        return responses
+    return _render_apis(context, form_id, api_id, Form.render_post_apis)
 
 
 @register.filter(takes_context=True)
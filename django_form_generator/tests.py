@@ -1,8 +1,62 @@
-from django.test import TestCase
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock, skipUnless
+
+import requests
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.http import HttpRequest, HttpResponse
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.response import Response
+
+from django_form_generator import const
+from django_form_generator.common import (
+    aggregates, api_results, api_stats, circuit_breaker, definitions, field_plan, genres, idempotency, schema, search,
+    unique_ids, utils,
+)
+from django_form_generator.common.background import DetachedRequest
+from django_form_generator.common.circuit_breaker import APITimeBudget, CircuitBreaker, CircuitState
+from django_form_generator.common.field_plan import PlannedField
+from django_form_generator.common.metrics import MetricsCollector, count_query, measure
+from django_form_generator.common.rate_limit import RateLimiter
+from django_form_generator.common.utils import gather_or_cancel, get_client_ip
+from django_form_generator.common.views import IdempotentAPIViewMixin
+from django_form_generator.common.wizard import WizardState
+from django_form_generator.exceptions import FormAPIError
+from django_form_generator.fields import OptionChoiceField, OptionMultipleChoiceField
+from django_form_generator.middleware import ReplicaPinMiddleware
+from django_form_generator.models import (
+    CHANGED_FIELDS_KEY, Field, FieldAggregate, FieldCategory, FieldOptionThrough, FieldValidator, Form, FormAPIManager,
+    FormAPIManagerStat, FormAPIThrough, FormFieldThrough, FormResponse, FormResponseSearchToken, Option,
+)
+from django_form_generator.api.serializers import FormGeneratorResponseSerializer
+from django_form_generator.api.views import AsyncFormGeneratorAPIView
+from django_form_generator.routers import FormGeneratorRouter, use_primary
+from django_form_generator.signals import operation_measured
+from django_form_generator.views import MetricsView
 
 # Create your tests here.
 
 
+def create_form(slug, genres, **kwargs) -> Form:
+    """A published form with an active field (named `<slug>_<genre>`) of every genre."""
+    form = Form.objects.create(title=slug, slug=slug, status=const.FormStatus.PUBLISH, **kwargs)
+    for weight, genre in enumerate(genres):
+        field = Field.objects.create(label=genre, name=f'{slug}_{genre}', genre=genre, is_active=True)
+        FormFieldThrough.objects.create(form=form, field=field, weight=weight)
+    return form
+
+
 class TestFormGenerator(TestCase):
 
 
@@ -43,5 +97,1180 @@ class TestFormGenerator(TestCase):
         ...
 
 
+@override_settings(DJANGO_FORM_GENERATOR={'READ_REPLICAS': ['replica']})
+class TestReadReplicaRouter(SimpleTestCase):
+
+    def setUp(self):
+        self.router = FormGeneratorRouter()
+        self.factory = RequestFactory()
+
+    def test_read_from_replica(self):
+        self.assertEqual(self.router.db_for_read(Form), 'replica')
+        self.assertEqual(self.router.db_for_read(FormResponse), 'replica')
+
+    def test_write_to_primary(self):
+        self.assertEqual(self.router.db_for_write(Form), 'default')
+
+    def test_other_apps_are_not_routed(self):
+        self.assertIsNone(self.router.db_for_read(User))
+        self.assertIsNone(self.router.db_for_write(User))
+
+    @override_settings(DJANGO_FORM_GENERATOR={})
+    def test_without_replicas(self):
+        self.assertEqual(self.router.db_for_read(Form), 'default')
+
+    def test_no_migrations_on_replicas(self):
+        self.assertIs(self.router.allow_migrate('replica', 'django_form_generator'), False)
+        self.assertIsNone(self.router.allow_migrate('default', 'django_form_generator'))
+
+    def test_use_primary(self):
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(Form), 'default')
+        self.assertEqual(self.router.db_for_read(Form), 'replica')
+
+    def test_read_your_writes_in_request(self):
+        def view(request):
+            reads = [self.router.db_for_read(Form)]
+            self.router.db_for_write(FormResponse)
+            reads.append(self.router.db_for_read(FormResponse))
+            return HttpResponse(','.join(reads))
+
+        response = ReplicaPinMiddleware(view)(self.factory.post('/'))
+        self.assertEqual(response.content, b'replica,default')
+        self.assertIn('form_generator_pin', response.cookies)
+
+    def test_pinned_client(self):
+        def view(request):
+            return HttpResponse(self.router.db_for_read(FormResponse))
+
+        response = ReplicaPinMiddleware(view)(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica')
+        self.assertNotIn('form_generator_pin', response.cookies)
+
+        self.factory.cookies['form_generator_pin'] = str(time.time() + 5)
+        response = ReplicaPinMiddleware(view)(self.factory.get('/'))
+        self.assertEqual(response.content, b'default')
+
+        self.factory.cookies['form_generator_pin'] = str(time.time() - 1)
+        response = ReplicaPinMiddleware(view)(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica')
+
+    def test_pinned_client_async(self):
+        async def view(request):
+            return HttpResponse(self.router.db_for_read(FormResponse))
+
+        self.factory.cookies['form_generator_pin'] = str(time.time() + 5)
+        response = async_to_sync(ReplicaPinMiddleware(view))(self.factory.get('/'))
+        self.assertEqual(response.content, b'default')
+
+
+
+class TestIdempotency(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.view = IdempotentAPIViewMixin()
+        self.calls = 0
+
+    def tearDown(self):
+        cache.clear()
+
+    def post(self, key='key-1', **extra):
+        return self.factory.post('/api/forms/1/', HTTP_IDEMPOTENCY_KEY=key, **extra)
+
+    def process(self):
+        self.calls += 1
+        return Response({'unique_id': 'secret'}, status=201)
+
+    def test_duplicate_is_replayed(self):
+        self.view.idempotent(self.post(), self.process)
+        response = self.view.idempotent(self.post(), self.process)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual((response.status_code, response['Idempotent-Replayed']), (201, 'true'))
+        # the data is only replayed to a caller identified by its user or session
+        self.assertIsNone(response.data)
+        request = self.post()
+        request.session = mock.Mock(session_key='session-1')
+        self.view.idempotent(request, self.process)
+        self.assertEqual(self.view.idempotent(request, self.process).data, {'unique_id': 'secret'})
+        self.assertEqual(self.calls, 2)
+
+    def test_key_is_scoped_by_caller(self):
+        self.view.idempotent(self.post(REMOTE_ADDR='1.1.1.1'), self.process)
+        self.view.idempotent(self.post(REMOTE_ADDR='2.2.2.2'), self.process)
+        self.view.idempotent(self.post(key='key-2', REMOTE_ADDR='1.1.1.1'), self.process)
+        self.assertEqual(self.calls, 3)
+
+    def test_in_progress_conflict(self):
+        self.assertIsNone(idempotency.Idempotency.from_request(self.post()).begin())
+        response = self.view.idempotent(self.post(), self.process)
+        self.assertEqual((response.status_code, self.calls), (409, 0))
+
+    def test_failed_submission_releases_key(self):
+        failed = lambda: Response({'name': ['required']}, status=400)  # noqa: E731
+        self.view.idempotent(self.post(), failed)
+        self.assertEqual(self.view.idempotent(self.post(), self.process).status_code, 201)
+        with self.assertRaises(ValueError):
+            self.view.idempotent(self.post(key='key-2'), mock.Mock(side_effect=ValueError))
+        self.view.idempotent(self.post(key='key-2'), self.process)
+        self.assertEqual(self.calls, 2)
+
+
+class TestRateLimit(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_client_ip_ignores_forwarded_address_without_trusted_proxies(self):
+        request = self.factory.get('/', HTTP_X_FORWARDED_FOR='1.2.3.4', REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(get_client_ip(request), '10.0.0.2')
+
+    @override_settings(DJANGO_FORM_GENERATOR={'TRUSTED_PROXIES': ['10.0.0.0/24']})
+    def test_client_ip_is_rightmost_untrusted_forwarded_address(self):
+        # "spoofed, client, proxy": the client sent the first address
+        request = self.factory.get('/', HTTP_X_FORWARDED_FOR='6.6.6.6, 1.2.3.4, 10.0.0.1', REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(get_client_ip(request), '1.2.3.4')
+        request = self.factory.get('/', HTTP_X_FORWARDED_FOR='1.2.3.4, garbage', REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(get_client_ip(request), '10.0.0.2')
+        # not from a trusted proxy
+        request = self.factory.get('/', HTTP_X_FORWARDED_FOR='1.2.3.4', REMOTE_ADDR='5.5.5.5')
+        self.assertEqual(get_client_ip(request), '5.5.5.5')
+        self.assertEqual(get_client_ip(self.factory.get('/', REMOTE_ADDR='10.0.0.2')), '10.0.0.2')
+
+    def test_limit_per_client(self):
+        form = Form(pk=10_001, rate_limit=2, rate_limit_period=60)
+        limiter = RateLimiter(form)
+        request = self.factory.post('/', REMOTE_ADDR='1.1.1.1')
+        self.assertIsNone(limiter.hit(request))
+        self.assertIsNone(limiter.hit(request))
+        self.assertGreater(limiter.hit(request), 0)
+        self.assertIsNone(limiter.hit(self.factory.post('/', REMOTE_ADDR='2.2.2.2')))
+
+    def test_previous_period_counts_partially(self):
+        limiter = RateLimiter(Form(pk=10_002, rate_limit=10, rate_limit_period=60))
+        self.assertIsNone(limiter._retry_after(current=1, previous=10, elapsed=30))
+        self.assertIsNotNone(limiter._retry_after(current=6, previous=10, elapsed=30))
+
+    def test_no_limit(self):
+        self.assertIsNone(RateLimiter(Form(pk=10_003)).hit(self.factory.post('/')))
+
+
+class TestAsyncOptions(SimpleTestCase):
+
+    def lookup(self, values):
+        return {int(value) for value in values if str(value) in ('1', '2')}
+
+    def test_choice_is_checked_with_lookup(self):
+        field = OptionChoiceField(lookup=self.lookup)
+        self.assertEqual(field.clean('1'), '1')
+        with self.assertRaises(ValidationError):
+            field.clean('3')
+
+    def test_multiple_choices_are_checked_with_lookup(self):
+        field = OptionMultipleChoiceField(lookup=self.lookup, required=False)
+        self.assertEqual(field.clean(['1', '2']), ['1', '2'])
+        self.assertEqual(field.clean([]), [])
+        with self.assertRaises(ValidationError):
+            field.clean(['1', '3'])
+
+
+@skipUnless(utils.httpx is not None, 'httpx is not installed')
+class TestAsyncClients(SimpleTestCase):
+
+    @mock.patch.dict(utils._async_clients, clear=True)
+    def test_clients_of_closed_loops_are_closed(self):
+        old_client = asyncio.run(utils._get_async_client())
+        new_client = asyncio.run(utils._get_async_client())
+        self.assertIsNot(new_client, old_client)
+        self.assertTrue(old_client.is_closed)
+        self.assertEqual(list(utils._async_clients.values()), [new_client])
+        asyncio.run(new_client.aclose())
+
+
+class TestAsyncAPIs(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.form = create_form('async-apis', [])
+        cls.pre_api, cls.post_api = (
+            FormAPIManager.objects.create(title=execute_time, url=f'https://example.com/{execute_time}', method='get',
+                                          execute_time=execute_time, fallback=const.APIFallback.FAIL, is_active=True)
+            for execute_time in const.FormAPIManagerExecuteTime.values
+        )
+        FormAPIThrough.objects.create(form=cls.form, api=cls.pre_api, weight=0)
+        FormAPIThrough.objects.create(form=cls.form, api=cls.post_api, weight=1)
+
+    def setUp(self):
+        cache.clear()
+        self.calls = []
+
+    async def call_api(self, api, response_data, timeout):
+        """The pre load api fails at once when `self.pre_api_fails`, the post load api takes 10 seconds."""
+        self.calls.append(api.url)
+        if api.pk == self.post_api.pk:
+            try:
+                await asyncio.sleep(10 if self.pre_api_fails else 0)
+            except asyncio.CancelledError:
+                self.calls.append('cancelled')
+                raise
+        elif self.pre_api_fails:
+            raise requests.ConnectionError
+        return mock.Mock(**{'get_result.return_value': (200, {'url': api.url}, '{}')})
+
+    def patch_call_api(self, pre_api_fails):
+        self.pre_api_fails = pre_api_fails
+        return mock.patch.object(Form, '_Form__acall_api', self.call_api)
+
+    async def test_gather_or_cancel(self):
+        self.assertEqual(await gather_or_cancel(asyncio.sleep(0, 'a'), asyncio.sleep(0, 'b')), ['a', 'b'])
+        self.pre_api_fails = True
+        with self.assertRaises(requests.ConnectionError):
+            await gather_or_cancel(self.call_api(self.post_api, {}, None), self.call_api(self.pre_api, {}, None))
+        self.assertEqual(self.calls, [self.post_api.url, self.pre_api.url, 'cancelled'])
+
+    async def test_prefetch(self):
+        request = RequestFactory().post('/')
+        with self.patch_call_api(pre_api_fails=False):
+            await self.form.aprefetch_apis({'request': request})
+        self.assertCountEqual(self.calls, [self.pre_api.url, self.post_api.url])
+        # the submit uses the prefetched results
+        with mock.patch.object(Form, '_Form__call_api') as call_api:
+            results = await sync_to_async(self.form.call_post_apis)({'request': request}, False)
+        call_api.assert_not_called()
+        self.assertEqual(results, [(self.post_api, 200, {'url': self.post_api.url}, '{}')])
+
+    async def test_failed_api_cancels_the_others(self):
+        started = time.monotonic()
+        with self.patch_call_api(pre_api_fails=True), self.assertRaises(FormAPIError):
+            await self.form.aprefetch_apis({'request': RequestFactory().post('/')})
+        self.assertIn('cancelled', self.calls)
+        self.assertLess(time.monotonic() - started, 5)
+
+    async def test_view_cancels_the_others(self):
+        request = RequestFactory().post('/', {}, content_type='application/json')
+        with self.patch_call_api(pre_api_fails=True):
+            response = await AsyncFormGeneratorAPIView.as_view()(request, pk=self.form.pk)
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('cancelled', self.calls)
+        self.assertFalse(await FormResponse.objects.filter(form=self.form).aexists())
+
+
+class TestWizardState(SimpleTestCase):
+
+    def test_steps_are_kept_between_requests(self):
+        state = WizardState(10_001)
+        state.save_step(0, {'a': ['1']}, {'a': 1})
+        state.save_step(2, {'b': ['x', 'y']}, {'b': ['x', 'y']})
+        state = WizardState(10_001, state.token)
+        self.assertEqual(state.first_missing_step(3), 1)
+        self.assertEqual(state.get_cleaned_data(), {'a': 1, 'b': ['x', 'y']})
+        self.assertEqual(state.get_data(exclude=2).getlist('b'), [])
+        self.assertEqual(state.get_data(2).getlist('b'), ['x', 'y'])
+        state.delete()
+        self.assertEqual(WizardState(10_001, state.token).steps, {})
+
+    def test_invalid_token_starts_a_new_wizard(self):
+        self.assertNotEqual(WizardState(10_001, '../x').token, '../x')
+
+
+class TestWizard(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.form = create_form('wizard', ['text_input', 'number'], is_wizard=True)
+        FormFieldThrough.objects.filter(field__name='wizard_text_input').update(
+            category=FieldCategory.objects.create(title='first', weight=0)
+        )
+
+    def post_step(self, client, step, data):
+        return client.post(reverse('django_form_generator:form_wizard_step', args=(self.form.pk, step)), data)
+
+    def test_token_of_another_session(self):
+        response = self.client.get(reverse('django_form_generator:form_detail', args=(self.form.pk,)))
+        token = response.context['form'].state.token
+        self.post_step(self.client, 0, {'wizard': token, 'wizard_text_input': 'john'})
+        self.assertEqual(WizardState(self.form.pk, token).get_cleaned_data(), {'wizard_text_input': 'john'})
+
+        # another client can't finish (or read) the wizard with the token, it starts its own
+        response = self.post_step(Client(), 1, {'wizard': token, 'wizard_number': '7'})
+        self.assertEqual(response.context['form'].step, 0)
+        self.assertNotEqual(response.context['form'].state.token, token)
+        self.assertFalse(FormResponse.objects.exists())
+
+        self.post_step(self.client, 1, {'wizard': token, 'wizard_number': '7'})
+        self.assertEqual(FormResponse.objects.get().pure_data, {'wizard_text_input': 'john', 'wizard_number': 7})
+
+
+@override_settings(DJANGO_FORM_GENERATOR={'AGGREGATES_ENABLED': True})
+class TestAggregates(TestCase):
+
+    def setUp(self):
+        self.form = create_form('aggregates', [const.FieldGenre.NUMBER, const.FieldGenre.DATE])
+        self.request = RequestFactory().get('/')
+
+    def save(self, number, day='2023-01-02'):
+        data = {'aggregates_number': number, 'aggregates_date': day, 'request': self.request}
+        with self.captureOnCommitCallbacks(execute=True):
+            return FormResponse.save_response(self.form, data)
+
+    def summary(self):
+        number, date = aggregates.get_form_aggregates(self.form)
+        return number['number'], date['dates']
+
+    def test_record_and_delete(self):
+        responses = [self.save(value) for value in (1, 5, 5, 300)]
+        number, dates = self.summary()
+        self.assertEqual(number, {'count': 4, 'sum': 311, 'avg': 77.75, 'min': 1, 'max': 300,
+                                  'histogram': {'1': 1, '5': 2, '500': 1}})
+        self.assertEqual(dates, [{'date': datetime(2023, 1, 2).date(), 'count': 4}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            responses[-1].delete()
+        self.assertEqual(self.summary()[0]['max'], 5)
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(4):
+            # the data is read with a query per chunk of responses, no query per response
+            FormResponse.objects.filter(pk__in=[response.pk for response in responses[:2]]).delete()
+        number, dates = self.summary()
+        self.assertEqual((number['count'], number['min'], number['max'], number['histogram']), (1, 5, 5, {'5': 1}))
+        self.assertEqual(dates, [{'date': datetime(2023, 1, 2).date(), 'count': 1}])
+
+    def test_rebuild(self):
+        self.save(7)
+        self.save(None, day=None)
+        FieldAggregate.objects.update(value_count=0, filled_count=0)
+        self.assertEqual(aggregates.rebuild(self.form.pk), 2)
+        number = aggregates.get_form_aggregates(self.form)[0]
+        self.assertEqual((number['responses'], number['filled'], number['number']['count']), (2, 1, 1))
+        self.assertEqual(number['number']['histogram'], {'10': 1})
+
+    @override_settings(DJANGO_FORM_GENERATOR={})
+    def test_disabled_by_default(self):
+        self.save(7)
+        self.assertFalse(FieldAggregate.objects.exists())
+
+    def test_admin_view_permission(self):
+        url = reverse('admin:django_form_generator_form_aggregates', args=(self.form.pk,))
+        user = User.objects.create_user('aggregates-staff', is_staff=True)
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        user.user_permissions.add(Permission.objects.get(codename='view_form'))
+        self.assertContains(self.client.get(url), 'aggregates_number')
+
+
+@override_settings(DJANGO_FORM_GENERATOR={'SEARCH_BACKEND': 'tokens'})
+class TestSearch(TestCase):
+
+    def test_tokenize(self):
+        self.assertEqual(search.tokenize('John.Doe@Example.com, x'),
+                         {'john.doe@example.com', 'john', 'doe', 'example', 'com', 'x'})
+
+    def test_search(self):
+        form = create_form('search', [const.FieldGenre.TEXT_INPUT, const.FieldGenre.EMAIL, const.FieldGenre.NUMBER])
+        request = RequestFactory().get('/')
+        john, jane = (
+            FormResponse.save_response(form, {'search_text_input': name, 'search_email': email, 'search_number': 42,
+                                              'request': request})
+            for name, email in (('John Doe', 'john@example.com'), ('Jane Doe', 'jane@example.org'))
+        )
+        self.assertEqual(set(john.search_tokens.values_list('token', flat=True)),
+                         {'john', 'doe', 'john@example.com', 'example', 'com'})
+        responses = FormResponse.objects.all()
+        self.assertEqual(set(search.search(responses, 'doe')), {john, jane})
+        self.assertEqual(list(search.search(responses, 'Jo DOE')), [john])
+        self.assertEqual(list(search.search(responses, 'jane@example')), [jane])
+        # numbers aren't searchable
+        self.assertEqual(list(search.search(responses, '42')), [])
+        self.assertEqual(search.rebuild(responses), 2)
+        self.assertEqual(list(search.search(responses, 'jane')), [jane])
+
+    @override_settings(DJANGO_FORM_GENERATOR={'SEARCH_BACKEND': 'tokens', 'SEARCH_INDEX_ENABLED': False})
+    def test_index_disabled(self):
+        form = create_form('search', [const.FieldGenre.TEXT_INPUT])
+        request = RequestFactory().get('/')
+        response = FormResponse.save_response(form, {'search_text_input': 'John Doe', 'request': request})
+        FormResponse.save_response(form, {'search_text_input': 'John Roe', 'request': request},
+                                   update_form_response_id=response.pk)
+        search.rebuild(FormResponse.objects.all())
+        self.assertFalse(FormResponseSearchToken.objects.exists())
+        self.assertEqual(list(search.search(FormResponse.objects.all(), 'jo roe')), [response])
+
+
+class TestPreAPIs(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.form = create_form('pre-apis', ['text_input'])
+        cls.apis = [
+            FormAPIManager.objects.create(title=name, url=f'https://example.com/{name}', method='get',
+                                          execute_time=const.FormAPIManagerExecuteTime.PRE_LOAD, is_active=True,
+                                          response=f'<b>{name} {{{{ total }}}}</b>', cache_by=const.CacheMethod.USER_ID)
+            for name in ('first', 'second')
+        ]
+        for weight, api in enumerate(cls.apis):
+            FormAPIThrough.objects.create(form=cls.form, api=api, weight=weight)
+        cls.user = User.objects.create_user('pre-apis')
+
+    def setUp(self):
+        cache.clear()
+        response = mock.Mock(**{'get_result.return_value': (200, {'total': 3}, '{}')})
+        # the sync & async views call the apis differently
+        self.call_api = mock.Mock(return_value=response)
+        for name, call_api in (('_Form__call_api', self.call_api),
+                               ('_Form__acall_api', mock.AsyncMock(side_effect=self.call_api))):
+            patcher = mock.patch.object(Form, name, call_api)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_lazy_fragment(self):
+        url = reverse('django_form_generator:form_pre_apis', args=(self.form.pk,))
+        response = self.client.get(reverse('django_form_generator:form_detail', args=(self.form.pk,)))
+        # the form doesn't wait for the apis, the fragment calls them
+        self.assertContains(response, f'hx-get="{url}" hx-trigger="load"')
+        self.call_api.assert_not_called()
+
+        response = self.client.get(url)
+        self.assertContains(response, '<b>first 3</b>', html=True)
+        self.assertContains(response, '<b>second 3</b>', html=True)
+        self.assertEqual(self.call_api.call_count, 2)
+
+        response = self.client.get(url, {'api': self.apis[1].pk})
+        self.assertNotContains(response, 'first')
+        self.assertContains(response, f'data-api-id="{self.apis[1].pk}"')
+
+    def test_no_fragment_without_pre_apis(self):
+        form = create_form('no-pre-apis', ['text_input'])
+        response = self.client.get(reverse('django_form_generator:form_detail', args=(form.pk,)))
+        self.assertNotContains(response, 'hx-trigger="load"')
+
+    @override_settings(DJANGO_FORM_GENERATOR={'PRE_APIS_LOADING': 'background'})
+    @mock.patch('django_form_generator.views.run_in_background')
+    def test_background(self, run_in_background):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('django_form_generator:form_detail', args=(self.form.pk,)),
+                                   REMOTE_ADDR='10.0.0.1')
+        self.assertNotContains(response, 'hx-trigger="load"')
+        prefetch_pre_apis, response_data = run_in_background.call_args.args
+        self.assertEqual((prefetch_pre_apis.__func__, prefetch_pre_apis.__self__), (Form.prefetch_pre_apis, self.form))
+        # the task gets a copy of the request, not the live one
+        request = response_data['request']
+        self.assertIsInstance(request, DetachedRequest)
+        self.assertNotIsInstance(request, HttpRequest)
+        self.assertEqual((request.user.pk, request.META['REMOTE_ADDR']), (self.user.pk, '10.0.0.1'))
+        self.assertEqual(request.session.session_key, self.client.session.session_key)
+
+        # an api without `cache_by` isn't called, its result couldn't be used by the page
+        uncached = FormAPIManager.objects.create(title='uncached', url='https://example.com/uncached', method='get',
+                                                 execute_time=const.FormAPIManagerExecuteTime.PRE_LOAD, is_active=True)
+        FormAPIThrough.objects.create(form=self.form, api=uncached, weight=2)
+        self.assertEqual(len(prefetch_pre_apis(response_data)), 2)
+        self.assertEqual(self.call_api.call_count, 2)
+        # the results are cached for the user like in the request
+        self.assertIsNotNone(cache.get(f'FormAPIs_{self.form.pk}_{self.apis[0].pk}_pre_load_{self.user.pk}'))
+
+
+class TestFieldOptions(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.form = create_form('options', ['dropdown'])
+        cls.field = Field.objects.get(name='options_dropdown')
+        Field.objects.filter(pk=cls.field.pk).update(async_options=True)
+        FieldOptionThrough.objects.create(field=cls.field, option=Option.objects.create(name='Tehran'), weight=0)
+        cls.staff = User.objects.create_user('options-staff', is_staff=True)
+
+    def get_options(self):
+        return [
+            self.client.get(reverse(name, args=(self.field.pk,)), {'search': 'teh'})
+            for name in ('django_form_generator:field_options', 'django_form_generator:api:api_field_options')
+        ]
+
+    def test_valid_form(self):
+        page, api = self.get_options()
+        self.assertContains(page, 'Tehran')
+        self.assertEqual([option['name'] for option in api.json()['results']], ['Tehran'])
+        # a field of a draft form too, as long as one of its forms is valid
+        draft = Form.objects.create(title='draft', slug='options-draft', status=const.FormStatus.DRAFT)
+        draft.fields.add(self.field, through_defaults={'weight': 0})
+        self.assertEqual([response.status_code for response in self.get_options()], [200, 200])
+
+    def test_search_choices(self):
+        create_form('options-other', ['dropdown'])
+        other = Field.objects.get(name='options-other_dropdown')
+        for weight, name in enumerate(('TEHRANSAR', 'Tabriz')):
+            FieldOptionThrough.objects.create(field=self.field, option=Option.objects.create(name=name), weight=weight)
+        FieldOptionThrough.objects.create(field=other, option=Option.objects.create(name='Tehran Pars'), weight=0)
+        option = Option.objects.get(name='Tabriz')
+        option.name = 'Teheran'
+        option.save(update_fields=['name'])
+
+        self.assertEqual([option.name for option in self.field.search_choices('TEH')], ['Teheran', 'Tehran', 'TEHRANSAR'])
+        self.assertEqual([option.name for option in self.field.search_choices('tehr')], ['Tehran', 'TEHRANSAR'])
+        self.assertEqual(list(self.field.search_choices('x')), [])
+
+    def test_not_valid_forms(self):
+        for changes in ({'status': const.FormStatus.DRAFT}, {'valid_to': timezone.now() - timedelta(days=1)},
+                        {'limit_to': 0}):
+            with self.subTest(changes=changes):
+                Form.objects.filter(pk=self.form.pk).update(
+                    **{'status': const.FormStatus.PUBLISH, 'valid_to': None, 'limit_to': None, **changes}
+                )
+                self.assertEqual([response.status_code for response in self.get_options()], [404, 404])
+                # staff members preview the form with its options
+                self.client.force_login(self.staff)
+                self.assertEqual([response.status_code for response in self.get_options()], [200, 200])
+                self.client.logout()
+
+    def test_field_without_form(self):
+        self.form.fields.clear()
+        self.assertEqual([response.status_code for response in self.get_options()], [404, 404])
+
+
+class TestHtmxErrorSwaps(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.form = create_form('swaps', ['text_input', 'number', 'email'])
+        Field.objects.filter(name__startswith='swaps_').update(is_required=True)
+        cls.url = reverse('django_form_generator:form_detail', args=(cls.form.pk,))
+
+    def post(self, data, **headers):
+        return self.client.post(self.url, {'swaps_text_input': '', 'swaps_email': 'jane@example.com', **data}, **headers)
+
+    def test_out_of_band_swaps(self):
+        response = self.post({'swaps_number': 'abc'}, HTTP_HX_REQUEST='true')
+        self.assertEqual(response['HX-Reswap'], 'none')
+        self.assertNotContains(response, '<form')
+        self.assertContains(response, f'<div id="form_errors_{self.form.pk}" hx-swap-oob="true">')
+        self.assertContains(response, 'name="invalid_fields" value="swaps_text_input swaps_number"')
+        self.assertContains(response, '<div id="id_swaps_text_input_field" hx-swap-oob="true">')
+        self.assertContains(response, '<div id="id_swaps_number_field" hx-swap-oob="true">')
+        # the valid fields are left as the user filled them
+        self.assertNotContains(response, 'id="id_swaps_email_field"')
+        self.assertFalse(FormResponse.objects.exists())
+
+    def test_fixed_fields_are_cleared(self):
+        response = self.post({'swaps_number': '3', 'invalid_fields': 'swaps_text_input swaps_number'},
+                             HTTP_HX_REQUEST='true')
+        # the number was fixed: it's swapped again without its error
+        self.assertContains(response, '<div id="id_swaps_number_field" hx-swap-oob="true">')
+        self.assertContains(response, 'name="invalid_fields" value="swaps_text_input"')
+        self.assertNotContains(response, 'id="id_swaps_email_field"')
+
+        response = self.post({'swaps_text_input': 'Jane', 'swaps_number': 'abc', 'invalid_fields': 'swaps_text_input'},
+                             HTTP_HX_REQUEST='true')
+        self.assertContains(response, '<div id="id_swaps_text_input_field" hx-swap-oob="true">')
+        self.assertContains(response, 'name="invalid_fields" value="swaps_number"')
+
+    def test_non_htmx_fallback(self):
+        # a plain submit, or htmx without HTMX_ERROR_SWAPS: the whole form is rendered again
+        for headers, fg_settings in (({}, {}), ({'HTTP_HX_REQUEST': 'true'}, {'HTMX_ERROR_SWAPS': False})):
+            with self.subTest(headers=headers), override_settings(DJANGO_FORM_GENERATOR=fg_settings):
+                response = self.post({'swaps_number': 'abc'}, **headers)
+                self.assertNotIn('HX-Reswap', response)
+                self.assertContains(response, f'id="form-generator_{self.form.pk}"')
+                self.assertNotContains(response, 'hx-swap-oob')
+
+
+class TestMetrics(TestCase):
+
+    def setUp(self):
+        self.collector = MetricsCollector(buckets=(1, 0.01, 0.05))
+        operation_measured.connect(self.collector, dispatch_uid='test_metrics')
+        self.addCleanup(operation_measured.disconnect, dispatch_uid='test_metrics')
+
+    def test_measure(self):
+        with measure('count_forms', sender=Form, form=1) as labels:
+            Form.objects.count()
+            Form.objects.exists()
+            labels['status'] = 200
+        with self.assertRaises(ValueError), measure('count_forms', sender=Form, form=1):
+            raise ValueError
+        succeeded = ('count_forms', (('form', '1'), ('status', '200')))
+        failed = ('count_forms', (('error', 'ValueError'), ('form', '1')))
+        self.assertEqual(set(self.collector._series), {succeeded, failed})
+        self.assertEqual((self.collector._series[succeeded]['count'], self.collector._series[succeeded]['queries']),
+                         (1, 2))
+        self.assertEqual(self.collector._series[failed]['queries'], 0)
+
+    def test_concurrent_measures(self):
+        async def count(operation, delay, queries):
+            with measure(operation, sender=Form):
+                await asyncio.sleep(delay)
+                for _ in range(queries):
+                    await Form.objects.acount()
+
+        async def run():
+            # the first block exits before the second one
+            await asyncio.gather(count('first', 0, 1), count('second', 0.01, 2))
+
+        with measure('sync', sender=Form):
+            Form.objects.exists()
+        async_to_sync(run)()
+        queries = {operation: series['queries'] for (operation, _), series in self.collector._series.items()}
+        self.assertEqual(queries, {'sync': 1, 'first': 1, 'second': 2})
+        self.assertEqual(connection.execute_wrappers, [count_query])
+
+    def test_no_listeners(self):
+        with mock.patch.object(operation_measured, 'receivers', []):
+            with mock.patch.object(operation_measured, 'send') as send, measure('count_forms', form=1) as labels:
+                labels['status'] = 200
+        send.assert_not_called()
+        self.assertEqual(labels, {'form': 1, 'status': 200})
+
+    def test_buckets(self):
+        self.assertEqual(self.collector.buckets, (0.01, 0.05, 1))
+        for duration in (0.004, 0.01, 0.03, 20):
+            self.collector.observe('submit', duration, 3)
+        # the buckets are cumulative, a duration on a bound is inside the bucket
+        self.assertEqual(self.collector._series[('submit', ())],
+                         {'buckets': [2, 3, 3], 'count': 4, 'sum': 20.044, 'queries': 12})
+
+    def test_render(self):
+        self.collector.observe('submit', 0.02, 2, {'form': 'a "b"\\c', 'status': None})
+        self.assertEqual(self.collector.render(), (
+            '# HELP django_form_generator_operation_duration_seconds Duration of django form generator operations.\n'
+            '# TYPE django_form_generator_operation_duration_seconds histogram\n'
+            'django_form_generator_operation_duration_seconds_bucket{operation="submit",form="a \\"b\\"\\\\c",le="0.01"} 0\n'
+            'django_form_generator_operation_duration_seconds_bucket{operation="submit",form="a \\"b\\"\\\\c",le="0.05"} 1\n'
+            'django_form_generator_operation_duration_seconds_bucket{operation="submit",form="a \\"b\\"\\\\c",le="1.0"} 1\n'
+            'django_form_generator_operation_duration_seconds_bucket{operation="submit",form="a \\"b\\"\\\\c",le="+Inf"} 1\n'
+            'django_form_generator_operation_duration_seconds_sum{operation="submit",form="a \\"b\\"\\\\c"} 0.02\n'
+            'django_form_generator_operation_duration_seconds_count{operation="submit",form="a \\"b\\"\\\\c"} 1\n'
+            '# HELP django_form_generator_operation_queries_total Database queries executed by django form generator '
+            'operations.\n'
+            '# TYPE django_form_generator_operation_queries_total counter\n'
+            'django_form_generator_operation_queries_total{operation="submit",form="a \\"b\\"\\\\c"} 2\n'
+        ))
+
+    def test_view(self):
+        self.collector.observe('submit', 0.02, 2)
+        with mock.patch('django_form_generator.views.get_collector', return_value=self.collector):
+            response = MetricsView.as_view()(RequestFactory().get('/metrics/'))
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        self.assertEqual(response.content.decode(), self.collector.render())
+        self.assertIn('django_form_generator_operation_queries_total{operation="submit"} 2\n', response.content.decode())
+
+
+class TestDefinitions(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.form = create_form('definitions', ['text_input', 'dropdown', 'number'], is_editable=True)
+        text_input, dropdown, number = (Field.objects.get(name=f'definitions_{genre}')
+                                        for genre in ('text_input', 'dropdown', 'number'))
+        options = [Option.objects.create(name=name) for name in ('red', 'blue')]
+        for weight, option in enumerate(options):
+            FieldOptionThrough.objects.create(field=dropdown, option=option, weight=weight)
+        number.content_object = options[1]
+        number.save()
+        FieldValidator.objects.create(field=number, validator=const.Validator.MIN_VALUE, value='3')
+        category = FieldCategory.objects.create(title='personal', weight=0)
+        FormFieldThrough.objects.filter(field=text_input).update(category=category)
+        api = FormAPIManager.objects.create(title='definitions', url='https://example.com', method='get',
+                                            execute_time=const.FormAPIManagerExecuteTime.PRE_LOAD, is_active=True)
+        FormAPIThrough.objects.create(form=cls.form, api=api, weight=0)
+
+    def export(self, slug):
+        return definitions.export_definitions(Form.objects.filter(slug=slug))
+
+    def test_round_trip(self):
+        exported = self.export('definitions')
+        content = definitions.dumps(exported)
+        FieldValidator.objects.all().delete()
+        for model in (Form, Field, Option, FormAPIManager, FieldCategory):
+            model.objects.all().delete()
+
+        counts = definitions.import_definitions(definitions.loads(content))
+        self.assertEqual(counts, {'categories': 1, 'options': 2, 'apis': 1, 'fields': 3, 'validators': 1, 'forms': 1})
+        self.assertEqual(self.export('definitions'), exported)
+        self.assertTrue(Form.objects.get(slug='definitions').is_editable)
+        self.assertEqual(Field.objects.get(name='definitions_number').content_object, Option.objects.get(name='blue'))
+        # importing again changes nothing
+        definitions.import_definitions(definitions.loads(content))
+        self.assertEqual(self.export('definitions'), exported)
+        self.assertEqual((Option.objects.count(), FieldOptionThrough.objects.count(), FormFieldThrough.objects.count()),
+                         (2, 2, 3))
+
+    def test_import_under_new_slug(self):
+        definition = self.export('definitions')
+        definition['forms'][0].update(slug='definitions-copy', title='copy')
+        definitions.import_definitions(definition)
+
+        copy = Form.objects.get(slug='definitions-copy')
+        self.assertEqual(copy.title, 'copy')
+        # the copy uses the same fields, options & apis
+        self.assertEqual(list(copy.fields.order_by('form_field_through__weight')),
+                         list(self.form.fields.order_by('form_field_through__weight')))
+        self.assertEqual(list(copy.apis.all()), list(self.form.apis.all()))
+        self.assertEqual((Field.objects.count(), Option.objects.count(), FormAPIManager.objects.count()), (3, 2, 1))
+        self.assertEqual(FormFieldThrough.objects.get(form=copy, field__name='definitions_text_input').category.title,
+                         'personal')
+        self.assertEqual(self.export('definitions-copy')['forms'][0], definition['forms'][0])
+        self.assertEqual(self.export('definitions')['forms'][0]['title'], 'definitions')
+
+
+class TestSchema(SimpleTestCase):
+
+    def test_version_changes_when_invalidated(self):
+        form = Form(pk=10_001, updated_at=timezone.now())
+        version = schema.get_version(form)
+        self.assertEqual(schema.get_version(form), version)
+        schema.invalidate()
+        self.assertNotEqual(schema.get_version(form), version)
+
+    def test_dependency_without_parent(self):
+        self.assertIsNone(schema._dependency(Field(name='a'), {}, {}))
+
+
+class TestResponseUpdate(SimpleTestCase):
+
+    def test_apis_triggered_by_changed_fields(self):
+        api = FormAPIManager(url='https://example.com/{{ city }}/', body='{"email": "{{email}}"}',
+                             update_trigger='changed_fields')
+        self.assertTrue(api.is_triggered_by(['email']))
+        self.assertFalse(api.is_triggered_by(['name']))
+        api.body = '{{form_data}}'
+        self.assertTrue(api.is_triggered_by(['name']))
+        self.assertTrue(FormAPIManager(url='https://example.com/').is_triggered_by([]))
+        self.assertFalse(FormAPIManager(update_trigger='never').is_triggered_by(['email']))
+
+    def test_api_results_are_merged(self):
+        old = [[{'api': 1, 'result': 'a'}], [{'api': 2, 'result': 'b'}, {'api': 3, 'result': 'c'}]]
+        new = [[{'api': 3, 'result': 'C'}, {'api': 4, 'result': 'D'}]]
+        self.assertEqual(FormResponse._merge_api_response(old, new), [
+            [{'api': 1, 'result': 'a'}],
+            [{'api': 2, 'result': 'b'}, {'api': 3, 'result': 'C'}],
+            [{'api': 4, 'result': 'D'}],
+        ])
+        self.assertEqual(FormResponse._merge_api_response(None, new), new)
+
+
+class TestResponseEdit(TestCase):
+
+    def setUp(self):
+        self.form = create_form('edit', [const.FieldGenre.TEXT_INPUT, const.FieldGenre.NUMBER, const.FieldGenre.DATE,
+                                         const.FieldGenre.DROPDOWN], is_editable=True)
+        self.option = Option.objects.create(name='red')
+        FieldOptionThrough.objects.create(field=Field.objects.get(name='edit_dropdown'), option=self.option, weight=0)
+        self.request = RequestFactory().patch('/')
+        self.response = FormResponse.save_response(self.form, {**self.data(), 'request': self.request})
+
+    def data(self, **data):
+        return {'edit_text_input': 'text', 'edit_number': 7, 'edit_date': '2023-01-02', 'edit_dropdown': self.option.pk,
+                **data}
+
+    def get_response_data(self, **data):
+        serializer = FormGeneratorResponseSerializer(self.response.pure_data, data=self.data(**data), partial=True, context={
+            'request': self.request, 'form': self.form, 'form_response': self.response,
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        return serializer.get_response_data()
+
+    def test_changed_fields(self):
+        # the submitted date, number & option are compared with their stored values
+        self.assertEqual(self.get_response_data()[CHANGED_FIELDS_KEY], [])
+        self.assertEqual(self.get_response_data(edit_date='2023-01-03', edit_number='8')[CHANGED_FIELDS_KEY],
+                         ['edit_number', 'edit_date'])
+
+    def test_api_data_without_changed_fields(self):
+        api = FormAPIManager.objects.create(title='edit', url='https://example.com', method='post', body='{{form_data}}',
+                                            execute_time=const.FormAPIManagerExecuteTime.POST_LOAD, is_active=True)
+        FormAPIThrough.objects.create(form=self.form, api=api, weight=0)
+        data = self.get_response_data(edit_text_input='changed')
+        with mock.patch.object(requests, 'post', return_value=mock.Mock(status_code=200, content=b'{}')) as post:
+            self.form.call_post_apis(data)
+        self.assertIn('changed', post.call_args.kwargs['data'])
+        self.assertNotIn(CHANGED_FIELDS_KEY, post.call_args.kwargs['data'])
+
+
+class TestFieldPlan(SimpleTestCase):
+
+    def test_planned_field(self):
+        field = PlannedField(Field(id=1, name='age', label='Age', genre='number'), 'Personal', None)
+        self.assertEqual((field.name, field.category, field.depends_on), ('age', 'Personal', None))
+        self.assertEqual(field.evaluate('42'), 42)
+        self.assertIsNone(field.evaluate(''))
+
+
+class TestFieldPlanChanges(TestCase):
+
+    def setUp(self):
+        self.form = create_form('plan', [const.FieldGenre.TEXT_INPUT])
+        self.form_data = {'plan_text_input': 'text', 'plan_number': '7', 'request': RequestFactory().get('/')}
+
+    def generate(self):
+        return [(item['name'], item['label'], item['value']) for item in FormResponse._generate_data(self.form, self.form_data)]
+
+    def change_fields(self):
+        field = Field.objects.get(name='plan_text_input')
+        field.label = 'Name'
+        field.save()
+        number = Field.objects.create(label='Age', name='plan_number', genre=const.FieldGenre.NUMBER, is_active=True)
+        FormFieldThrough.objects.create(form=self.form, field=number, weight=1)
+
+    @mock.patch.object(schema, 'get_generation', return_value=1)
+    def test_process_cache(self, get_generation):
+        # LocMemCache: the generation of another worker (mocked) doesn't change when the fields change
+        self.assertEqual(self.generate(), [('plan_text_input', 'text_input', 'text')])
+        with self.assertNumQueries(0):
+            field_plan.get_field_plan(self.form)
+        self.change_fields()
+        self.assertEqual(self.generate(), [('plan_text_input', 'text_input', 'text')])
+        self.form.save()
+        self.assertEqual(self.generate(), [('plan_text_input', 'Name', 'text'), ('plan_number', 'Age', 7)])
+
+    @override_settings(DJANGO_FORM_GENERATOR={'FIELD_PLAN_CACHE': False})
+    def test_not_kept(self):
+        self.generate()
+        with self.assertNumQueries(2):
+            field_plan.get_field_plan(self.form)
+
+    def test_kept_plan_is_built_again(self):
+        self.assertEqual(self.generate(), [('plan_text_input', 'text_input', 'text')])
+        self.change_fields()
+        self.assertEqual(self.generate(), [('plan_text_input', 'Name', 'text'), ('plan_number', 'Age', 7)])
+
+
+class TestGenreCodecs(SimpleTestCase):
+
+    def test_builtin_codecs(self):
+        self.assertEqual(genres.get_codec('multi_checkbox').encode(['1', '2']), [1, 2])
+        self.assertEqual(genres.get_codec('dropdown').encode('3'), 3)
+        self.assertEqual(genres.get_codec('dropdown').coerce('^3'), '^3')
+        self.assertEqual(genres.get_codec('date').decode('2023-01-02').year, 2023)
+        self.assertEqual(const.FieldGenre.NUMBER.evaluate('7'), 7)
+        with self.assertRaises(ValueError):
+            genres.get_codec('unknown')
+
+    @mock.patch.dict(genres._codecs)
+    @mock.patch.object(genres, '_decoders', None)
+    def test_custom_genre(self):
+        from django_form_generator.api.serializers import FormGeneratorSerializer
+
+        decoders = genres.get_decoders()
+        self.assertIs(genres.get_decoders(), decoders)
+        build = mock.Mock()
+        genres.register_genre(genres.GenreCodec('color', genres.encode_text, decode=str.upper, serializer_field=build,
+                                                label='Color'))
+        self.assertIs(genres.get_decoders()['color'], str.upper)
+        self.assertIn(('color', 'Color'), genres.get_choices())
+        builders = genres.get_builders(FormGeneratorSerializer, 'serializer_field')
+        self.assertIs(builders['color'], build)
+        self.assertIs(builders['number'], FormGeneratorSerializer.prepare_number)
+        Field(label='Color', name='color', genre='color', is_active=True).clean_fields(exclude=['content_type', 'object_id'])
+
+
+class TestFastJSON(SimpleTestCase):
+
+    def test_field_round_trip(self):
+        field = FormResponse._meta.get_field('api_response')
+        value = [[{'api': 1, 'result': {'name': 'ü', 'ids': [1, 2]}}]]
+        self.assertEqual(field.from_db_value(field.get_prep_value(value), None, None), value)
+        # encoded & decoded by the json module, orjson can't keep it exact
+        self.assertEqual(field.from_db_value(field.get_prep_value({'big': 2 ** 70}), None, None)['big'], 2 ** 70)
+        self.assertEqual(field.from_db_value('not json', None, None), 'not json')
+
+    def test_renderer(self):
+        from django_form_generator.api.renderers import FastJSONRenderer
+
+        content = FastJSONRenderer().render({'text': 'a\u2028b', 'date': datetime(2023, 1, 2, tzinfo=dt_timezone.utc)})
+        self.assertEqual(content, b'{"text":"a\\u2028b","date":"2023-01-02T00:00:00Z"}')
+
+
+class TestFastJSONField(TestCase):
+
+    def test_database_round_trip(self):
+        form = Form.objects.create(title='JSON', slug='json', status=const.FormStatus.PUBLISH)
+        data = [{'id': 1, 'name': 'name', 'value': 'ü', 'genre': 'text_input'}]
+        api_response = [{'api': 1, 'result': {'id': 2 ** 70, 'items': [1, 2]}}]
+        response = FormResponse.objects.create(form=form, data=data, api_response=api_response)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT data FROM {FormResponse._meta.db_table} WHERE id = %s', [response.pk])
+            stored = cursor.fetchone()[0]
+        # encoded once
+        self.assertEqual(json.loads(stored) if isinstance(stored, str) else stored, data)
+        response = FormResponse.objects.get(pk=response.pk)
+        self.assertEqual(response.data, data)
+        self.assertEqual(response.api_response, api_response)
+        self.assertTrue(FormResponse.objects.filter(pk=response.pk, api_response__0__api=1).exists())
+
+
+class TestAPIResults(SimpleTestCase):
+
+    def test_build_result(self):
+        api = FormAPIManager(id=1, url='https://example.com', method='get', response_storage='keys',
+                             response_keys='id, data.total, missing.key')
+        result = {'id': 1, 'data': {'total': 3, 'items': [1, 2, 3]}, 'other': True}
+        self.assertEqual(api_results.build_result(api, 200, result, None)['result'], {'id': 1, 'data': {'total': 3}})
+        self.assertEqual(api_results.build_result(api, 200, [result, 'text'], None)['result'],
+                         [{'id': 1, 'data': {'total': 3}}, 'text'])
+        api.response_storage = 'status'
+        self.assertNotIn('result', api_results.build_result(api, 200, result, None))
+        api.response_storage = 'none'
+        self.assertIsNone(api_results.build_result(api, 200, result, None))
+
+    def test_compress(self):
+        value = [[{'api': 1, 'result': ['value'] * 100}]]
+        self.assertIsNone(api_results.compress(value))
+        self.assertIsNone(api_results.compress(value, min_size=10 ** 6))
+        self.assertEqual(api_results.decompress(api_results.compress(value, min_size=100)), value)
+
+
+class TestCircuitBreaker(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.now = 1000.0
+        patcher = mock.patch.object(circuit_breaker, 'time')
+        self.clock = patcher.start()
+        self.clock.time.side_effect = lambda: self.now
+        self.addCleanup(patcher.stop)
+
+    def test_transitions(self):
+        breaker = CircuitBreaker(FormAPIManager(id=1, failure_threshold=2, recovery_timeout=30))
+        breaker.record_failure()
+        self.assertTrue(breaker.allow_request())
+        # only consecutive failures open the circuit
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitState.OPEN)
+        self.assertFalse(breaker.allow_request())
+
+        self.now += 30
+        self.assertEqual(breaker.state, CircuitState.HALF_OPEN)
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request(), 'a single probe at a time')
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitState.OPEN)
+
+        self.now += 30
+        self.assertTrue(breaker.allow_request())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+        self.assertTrue(breaker.allow_request())
+
+    def test_disabled(self):
+        breaker = CircuitBreaker(FormAPIManager(id=1, failure_threshold=0, recovery_timeout=30))
+        for _ in range(10):
+            breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+        self.assertTrue(breaker.allow_request())
+
+    def test_time_budget(self):
+        self.clock.monotonic.return_value = 100.0
+        budget = APITimeBudget(10)
+        self.assertEqual((budget.timeout(5), budget.timeout(None)), (5, 10))
+        self.clock.monotonic.return_value = 107.0
+        self.assertEqual(budget.timeout(5), 3)
+        self.clock.monotonic.return_value = 120.0
+        self.assertEqual(budget.timeout(5), 0)
+        self.assertEqual((APITimeBudget(None).timeout(5), APITimeBudget(None).timeout(None)), (5, None))
+
+        request = RequestFactory().get('/')
+        with override_settings(DJANGO_FORM_GENERATOR={'API_TIME_BUDGET': 3}):
+            budget = APITimeBudget.for_request(request)
+        self.assertEqual(budget.remaining(), 3)
+        # all the apis of a request share the budget
+        self.assertIs(APITimeBudget.for_request(request), budget)
+
+
+@mock.patch.object(Form, '_Form__call_api')
+class TestAPIFallbacks(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.form = create_form('fallback', [])
+        cls.api = FormAPIManager.objects.create(title='fallback', url='https://example.com', method='get',
+                                                execute_time=const.FormAPIManagerExecuteTime.PRE_LOAD, is_active=True,
+                                                failure_threshold=1, recovery_timeout=60)
+        FormAPIThrough.objects.create(form=cls.form, api=cls.api, weight=0)
+
+    def setUp(self):
+        cache.clear()
+
+    def call(self, fallback, fail_silently=True):
+        FormAPIManager.objects.filter(pk=self.api.pk).update(fallback=fallback)
+        return self.form.call_pre_apis({'request': RequestFactory().get('/')}, fail_silently)
+
+    @staticmethod
+    def response(status_code=200):
+        return mock.Mock(**{'get_result.return_value': (status_code, {'ok': status_code < 500}, '{}')})
+
+    def test_skip(self, call_api):
+        call_api.side_effect = requests.ConnectionError
+        self.assertEqual(self.call(const.APIFallback.SKIP), [])
+        self.assertEqual(call_api.call_count, 1)
+        # the circuit is open: the api isn't called anymore
+        self.assertEqual(self.call(const.APIFallback.SKIP), [])
+        self.assertEqual(call_api.call_count, 1)
+
+    def test_cache(self, call_api):
+        call_api.return_value = self.response()
+        self.assertEqual(self.call(const.APIFallback.CACHE), [(self.api, 200, {'ok': True}, '{}')])
+        call_api.return_value = self.response(503)
+        self.assertEqual(self.call(const.APIFallback.CACHE), [(self.api, 200, {'ok': True}, '{}')])
+        self.assertEqual(self.call(const.APIFallback.CACHE), [(self.api, 200, {'ok': True}, '{}')])
+        self.assertEqual(call_api.call_count, 2)
+        cache.clear()
+        # nothing to fall back to
+        self.assertEqual(self.call(const.APIFallback.CACHE), [])
+
+    def test_fail(self, call_api):
+        call_api.side_effect = requests.Timeout
+        with self.assertRaises(FormAPIError):
+            self.call(const.APIFallback.FAIL, fail_silently=False)
+        with self.assertRaises(FormAPIError):
+            self.call(const.APIFallback.FAIL, fail_silently=False)
+        self.assertEqual(call_api.call_count, 1)
+        # rendering a page never fails
+        self.assertEqual(self.call(const.APIFallback.FAIL), [])
+
+    @override_settings(DJANGO_FORM_GENERATOR={'API_TIME_BUDGET': 0})
+    def test_time_budget_exhausted(self, call_api):
+        with self.assertRaises(FormAPIError):
+            self.call(const.APIFallback.FAIL, fail_silently=False)
+        call_api.assert_not_called()
+
+
+@override_settings(DJANGO_FORM_GENERATOR={'API_STATS_FLUSH_SIZE': 3, 'API_STATS_FLUSH_INTERVAL': 3600,
+                                          'API_STATS_BUCKETS': (10, 100, 1000)})
+class TestAPIStats(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.api = FormAPIManager.objects.create(title='stats', url='https://example.com', method='get',
+                                                execute_time='pre', is_active=True)
+        cls.minute = datetime(2026, 1, 1, 12, 30, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        self.buffer = api_stats.APIStatsBuffer()
+        patcher = mock.patch.object(api_stats.timezone, 'now', return_value=self.minute.replace(second=42))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @mock.patch.object(api_stats, 'run_in_background')
+    def test_buffer(self, run_in_background):
+        self.buffer.record(self.api.pk, 0.005, 200, 10, const.APICallOutcome.SUCCESS)
+        self.buffer.record(self.api.pk, 0.05, 500, 0, const.APICallOutcome.HTTP_ERROR)
+        run_in_background.assert_not_called()
+        self.assertFalse(FormAPIManagerStat.objects.exists())
+        self.buffer.record(self.api.pk, 2.0, None, 0, const.APICallOutcome.EXCEPTION)
+        # the flush doesn't run on the request path & only once at a time
+        run_in_background.assert_called_once_with(self.buffer.flush)
+        self.buffer.record(self.api.pk, 0.005, 200, 10, const.APICallOutcome.SUCCESS)
+        run_in_background.assert_called_once()
+
+        self.buffer.flush()
+        stat = FormAPIManagerStat.objects.get()
+        self.assertEqual((stat.bucket, stat.count, stat.success_count, stat.http_error_count, stat.exception_count),
+                         (self.minute, 4, 2, 1, 1))
+        self.assertEqual(stat.histogram, {'10': 2, '100': 1, 'inf': 1})
+        self.assertEqual(stat.status_codes, {'200': 2, '500': 1})
+        self.assertEqual(stat.max_duration, 2.0)
+
+    @mock.patch.object(api_stats, 'run_in_background')
+    def test_merging(self, run_in_background):
+        other = FormAPIManager.objects.create(title='other', url='https://example.com', method='get',
+                                              execute_time='post', is_active=True)
+        self.buffer.record(self.api.pk, 0.005, 200, 10, const.APICallOutcome.SUCCESS)
+        self.buffer.flush()
+        self.buffer.record(self.api.pk, 0.5, 200, 30, const.APICallOutcome.SUCCESS)
+        self.buffer.record(self.api.pk, 0.05, 200, 0, const.APICallOutcome.INVALID_JSON)
+        self.buffer.record(other.pk, 0.05, 404, 0, const.APICallOutcome.HTTP_ERROR)
+        with self.assertNumQueries(5):
+            # savepoint, insert of the missing rows, locked read, update & release
+            self.buffer.flush()
+
+        stat = FormAPIManagerStat.objects.get(api=self.api)
+        self.assertEqual((stat.count, stat.success_count, stat.invalid_json_count, stat.total_payload_size),
+                         (3, 2, 1, 40))
+        self.assertAlmostEqual(stat.total_duration, 0.555)
+        self.assertEqual(stat.max_duration, 0.5)
+        self.assertEqual(stat.histogram, {'10': 1, '100': 1, '1000': 1})
+        self.assertEqual(stat.status_codes, {'200': 3})
+        self.assertEqual(FormAPIManagerStat.objects.get(api=other).status_codes, {'404': 1})
+
+    def test_summarize(self):
+        stats = [
+            FormAPIManagerStat(count=8, success_count=8, total_duration=0.4, max_duration=0.09,
+                               histogram={'10': 4, '100': 4}, status_codes={'200': 8}),
+            FormAPIManagerStat(count=2, http_error_count=1, exception_count=1, total_duration=3.0, max_duration=2.5,
+                               total_payload_size=100, histogram={'1000': 1, 'inf': 1}, status_codes={'500': 1}),
+        ]
+        summary = api_stats.summarize(stats)
+        self.assertEqual((summary['count'], summary['errors'], summary['error_rate']), (10, 2, 0.2))
+        self.assertAlmostEqual(summary['avg'], 340)
+        self.assertEqual(summary['max'], 2500)
+        # interpolated inside the bucket of the rank: 5th of 10 calls is the first of the (10, 100] bucket
+        self.assertAlmostEqual(summary['p50'], 32.5)
+        self.assertAlmostEqual(summary['p95'], 1750)
+        self.assertAlmostEqual(summary['p99'], 2350)
+        self.assertEqual(summary['avg_payload_size'], 10)
+        self.assertEqual(summary['status_codes'], {'200': 8, '500': 1})
+        self.assertIsNone(api_stats.summarize([])['p50'])
+
+    def test_prune_command(self):
+        FormAPIManagerStat.objects.create(api=self.api, bucket=self.minute - timedelta(days=8), count=1)
+        FormAPIManagerStat.objects.create(api=self.api, bucket=self.minute - timedelta(days=6), count=1)
+        call_command('form_generator_prune_api_stats', stdout=StringIO())
+        self.assertEqual(list(FormAPIManagerStat.objects.values_list('bucket', flat=True)),
+                         [self.minute - timedelta(days=6)])
+
+
+class TestUniqueIDs(SimpleTestCase):
+    def test_uuid7(self):
+        ids = [unique_ids.uuid7() for _ in range(5000)]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual({(unique_id.version, unique_id.variant) for unique_id in ids}, {(7, uuid.RFC_4122)})
+        self.assertAlmostEqual(unique_ids.uuid7().int >> 80, time.time() * 1000, delta=1000)
+
+    def test_new_unique_id(self):
+        self.assertEqual(unique_ids.new_unique_id().version, 4)
+        with override_settings(DJANGO_FORM_GENERATOR={'UNIQUE_ID_VERSION': 'uuid7'}):
+            self.assertEqual(unique_ids.new_unique_id().version, 7)
+
+
+@skipUnless(connection.vendor in ('sqlite', 'postgresql'), 'query plans are only checked on SQLite & Postgres')
+class TestQueryPlans(TestCase):
+    """The hot queries use indexes: a full scan (or a sort of an ordered listing) means an index is missing or unused."""
+
+    def assertUsesIndexes(self, queryset, *models, ordered=False):
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    # the tables are tiny, a sequential scan is only chosen when no index can be used
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = queryset.explain()
+        for model in models:
+            table = model._meta.db_table
+            if connection.vendor == 'postgresql':
+                self.assertNotIn(f'Seq Scan on {table}', plan, plan)
+            else:
+                # the tables of the subqueries are named by their aliases (`U0`)
+                self.assertNotRegex(plan, rf'(?m)\bSCAN ({table}|U\d+)( AS \w+)?$', plan)
+        if ordered and connection.vendor == 'sqlite':
+            self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan, plan)
+
+    def test_form_fields(self):
+        self.assertUsesIndexes(Form(pk=1).get_fields(), FormFieldThrough, Field)
+
+    def test_field_choices(self):
+        self.assertUsesIndexes(Field(pk=1).get_choices(), FieldOptionThrough, Option)
+
+    def test_search_choices(self):
+        choices = Field(pk=1).search_choices('Teh')
+        self.assertUsesIndexes(choices, FieldOptionThrough, Option, ordered=True)
+        self.assertIn('f_g_option_name_key', choices.explain())
+
+    def test_responses(self):
+        responses = FormResponse.objects.filter(form_id=1)
+        self.assertUsesIndexes(responses.order_by('-created_at', '-id')[:50], FormResponse, ordered=True)
+        self.assertUsesIndexes(responses.filter(created_at__gte=timezone.now()), FormResponse)
+        self.assertUsesIndexes(FormResponse.objects.filter(unique_id='00000000000000000000000000000000'), FormResponse)
 
-    
\ No newline at end of file
+    @override_settings(DJANGO_FORM_GENERATOR={'SEARCH_BACKEND': 'tokens'})
+    def test_search(self):
+        self.assertUsesIndexes(search.search(FormResponse.objects.all(), 'john doe'), FormResponse, FormResponseSearchToken)
@@ -1,9 +1,37 @@
 from django.urls import path, include
-from django_form_generator.views import FormGeneratorView, FormResponseView
+from django_form_generator.views import (
+    AsyncFormGeneratorView,
+    AsyncFormPreAPIView,
+    AsyncFormResponseView,
+    FieldOptionsView,
+    FormGeneratorView,
+    FormPreAPIView,
+    FormResponseView,
+    MetricsView,
+)
+from django_form_generator.settings import form_generator_settings as fg_settings
+
+if fg_settings.ASYNC_VIEWS:
+    form_generator_view = AsyncFormGeneratorView
+    form_response_view = AsyncFormResponseView
+    form_pre_api_view = AsyncFormPreAPIView
+else:
+    form_generator_view = FormGeneratorView
+    form_response_view = FormResponseView
+    form_pre_api_view = FormPreAPIView
 
 
 urlpatterns = [
-    path('form/<int:pk>/', FormGeneratorView.as_view(), name="form_detail"),
-    path('form-response/<uuid:unique_id>/', FormResponseView.as_view(), name="form_response"),
+    path('form/<int:pk>/', form_generator_view.as_view(), name="form_detail"),
+    path('form/<int:pk>/step/<int:step>/', form_generator_view.as_view(), name="form_wizard_step"),
+    path('form/<int:pk>/apis/', form_pre_api_view.as_view(), name="form_pre_apis"),
+    path('field/<int:pk>/options/', FieldOptionsView.as_view(), name="field_options"),
+    path('form-response/<uuid:unique_id>/', form_response_view.as_view(), name="form_response"),
     path('api/', include(('django_form_generator.api.urls', 'django_form_generator'), 'api'))
 ]
+
+
+if fg_settings.METRICS_ENABLED:
+    urlpatterns += [
+        path('metrics/', MetricsView.as_view(), name="metrics"),
+    ]
@@ -1,52 +1,130 @@
-from django.views.generic import DetailView
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.views.generic import DetailView, View
 from django.views.generic.edit import FormMixin
 from django.contrib import messages
 from django.utils.translation import gettext as _
 
+from asgiref.sync import sync_to_async
 from django_htmx.http import HttpResponseClientRedirect
 
-from django_form_generator.common.utils import get_client_ip
-from django_form_generator.models import Form
+from django_form_generator.common.background import DetachedRequest, run_in_background
+from django_form_generator.common.utils import can_preview, get_client_ip
+from django_form_generator.common.wizard import WizardState
+from django_form_generator.common.views import (
+    AsyncDetailMixin, HtmxErrorSwapsMixin, IdempotentFormViewMixin, MeasureRenderMixin, RateLimitFormViewMixin
+)
+from django_form_generator.common.metrics import get_collector
+from django_form_generator.const import PreAPILoading
+from django_form_generator.exceptions import FormAPIError
+from django_form_generator.models import Field, Form
 from django_form_generator.forms import FormGeneratorForm
 from django_form_generator.settings import form_generator_settings as fg_settings
 
 
-class FormGeneratorView(FormMixin, DetailView):
+class FormPreviewMixin:
     queryset = Form.objects.filter_valid()
     model = Form
-    template_name = "django_form_generator/form.html"
 
     def get_queryset(self):
         """Allow preview for superuser and staff members"""
-        if getattr(self.request.user, "is_staff", False) or getattr(self.request.user, "is_superuser", False):
+        if can_preview(self.request.user):
             return Form.objects.all()
         return super().get_queryset()
 
+
+class FormGeneratorView(
+    HtmxErrorSwapsMixin, IdempotentFormViewMixin, RateLimitFormViewMixin, MeasureRenderMixin, FormPreviewMixin,
+    FormMixin, DetailView
+):
+    template_name = "django_form_generator/form.html"
+
     def get_form_class(self):
+        if self.object.is_wizard:
+            return fg_settings.FORM_WIZARD_FORM
         return fg_settings.FORM_GENERATOR_FORM
 
+    def get_form(self, form_class=None):
+        try:
+            return super().get_form(form_class)
+        except IndexError:
+            raise Http404(_("The form has no such step."))
+
     def get_success_url(self) -> str:
         return self.object.redirect_url or self.request.META.get("HTTP_REFERER")  # type: ignore
 
     def post(self, request, *args, **kwargs):
+        return self.idempotent(request, self.submit)
+
+    def submit(self):
         self.object = self.get_object()
-        form = self.get_form()
+        if self.object.is_wizard:
+            return self.process_step(self.get_form())
+        return self.rate_limited(self.object) or self.process_form(self.get_form())
+
+    @property
+    def wizard_state(self) -> WizardState:
+        if not hasattr(self, "_wizard_state"):
+            self._wizard_state = WizardState.from_request(self.request, self.object.pk)
+        return self._wizard_state
+
+    def process_step(self, form):
+        """Keep the answers of a valid step & show the next one, the last step saves the whole response
+        (or goes back to a step that wasn't answered)."""
+        if not form.is_valid():
+            return self.process_invalid(form)
+        if not form.is_last_step:
+            form.save_step()
+            return self.render_step(form.step + 1)
+        missing = form.state.first_missing_step(form.step)
+        if missing is not None:
+            form.save_step()
+            return self.render_step(missing)
+        return self.rate_limited(self.object) or self.form_valid(form)
+
+    def render_step(self, step: int):
+        self.kwargs["step"] = step
+        kwargs = self.get_form_kwargs()
+        kwargs.pop("data", None)
+        kwargs.pop("files", None)
+        form = self.get_form_class()(**kwargs)
+        return self.render_to_response(self.get_context_data(form=form))
+
+    def process_form(self, form):
         if form.is_valid():
-            messages.success(
-                self.request,
-                self.object.success_message or _("Form submited successfully."),
-                "success",
-            )
             return self.form_valid(form)
         else:
-            messages.success(self.request, str(form.errors), "danger")
-            return self.form_invalid(form)
+            return self.process_invalid(form)
+
+    def form_api_error(self, form, error: FormAPIError):
+        form.add_error(None, error.message)
+        messages.error(self.request, error.message, "danger")
+        return self.form_invalid(form)
 
     def get(self, request, *args, **kwargs):
         response = super().get(request, *args, **kwargs)
-        self.object.call_pre_apis({"request": request})
+        self.start_pre_apis()
         return response
 
+    def start_pre_apis(self):
+        """The pre load apis never delay the form: they are called in the background (`PRE_APIS_LOADING` is
+        `background`) or by the request of the htmx fragment rendered in the form (see `get_context_data`)."""
+        if fg_settings.PRE_APIS_LOADING == PreAPILoading.BACKGROUND and not self.kwargs.get("step"):
+            run_in_background(self.object.prefetch_pre_apis, {"request": DetachedRequest(self.request)})
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if (
+            self.request.method == "GET"
+            and not self.kwargs.get("step")
+            and fg_settings.PRE_APIS_LOADING == PreAPILoading.LAZY
+            and self.object.has_pre_apis()
+        ):
+            context["pre_apis_url"] = reverse("django_form_generator:form_pre_apis", args=(self.object.pk,))
+        if fg_settings.CLIENT_VALIDATION:
+            context["schema_url"] = reverse("django_form_generator:api:api_form_schema", args=(self.object.pk,))
+        return context
+
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
         kwargs.update(
@@ -56,14 +134,26 @@ class FormGeneratorView(FormMixin, DetailView):
                 "user_ip": get_client_ip(self.request),
             }
         )
+        if self.object.is_wizard:
+            kwargs.update({"step": self.kwargs.get("step", 0), "state": self.wizard_state})
         return kwargs
 
     def form_valid(self, form: FormGeneratorForm):
-        form.save()
+        try:
+            form.save()
+        except FormAPIError as e:
+            return self.form_api_error(form, e)
+        messages.success(
+            self.request,
+            self.object.success_message or _("Form submited successfully."),
+            "success",
+        )
         return HttpResponseClientRedirect(self.get_success_url())
 
 
-class FormResponseView(FormMixin, DetailView):
+class FormResponseView(
+    HtmxErrorSwapsMixin, IdempotentFormViewMixin, RateLimitFormViewMixin, MeasureRenderMixin, FormMixin, DetailView
+):
     queryset = fg_settings.FORM_GENERATOR_RESPONSE_MODEL.objects.all()
     model = fg_settings.FORM_GENERATOR_RESPONSE_MODEL
     template_name = 'django_form_generator/form_response.html'
@@ -78,21 +168,33 @@ class FormResponseView(FormMixin, DetailView):
         return self.object.form.redirect_url or self.request.META.get("HTTP_REFERER")  # type: ignore
 
     def post(self, request, *args, **kwargs):
+        return self.idempotent(request, self.submit)
+
+    def submit(self):
         self.object = self.get_object()
-        form = self.get_form()
+        return self.rate_limited(self.object.form) or self.process_form(self.get_form())
+
+    def process_form(self, form):
         if form.is_valid():
-            messages.success(
-                self.request,
-                self.object.form.success_message or _("Form submited successfully."),
-                "success",
-            )
             return self.form_valid(form)
         else:
-            messages.success(self.request, str(form.errors), "danger")
-            return self.form_invalid(form)
+            return self.process_invalid(form)
+
+    def form_api_error(self, form, error: FormAPIError):
+        form.add_error(None, error.message)
+        messages.error(self.request, error.message, "danger")
+        return self.form_invalid(form)
 
     def form_valid(self, form):
-        form.save()
+        try:
+            form.save()
+        except FormAPIError as e:
+            return self.form_api_error(form, e)
+        messages.success(
+            self.request,
+            self.object.form.success_message or _("Form submited successfully."),
+            "success",
+        )
         return super().form_valid(form)
 
     def get_form_kwargs(self):
@@ -105,3 +207,126 @@ class FormResponseView(FormMixin, DetailView):
             }
         )
         return kwargs
+
+
+class AsyncFormGeneratorView(AsyncDetailMixin, FormGeneratorView):
+    """`FormGeneratorView` for ASGI: the form is loaded with the async ORM and the apis are called
+    concurrently with a non-blocking http client, so the worker isn't blocked while waiting for them."""
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        context = await sync_to_async(self.get_context_data)(object=self.object)
+        response = await sync_to_async(self.render_to_response)(context)
+        await sync_to_async(self.start_pre_apis)()
+        return response
+
+    async def post(self, request, *args, **kwargs):
+        return await self.aidempotent(request, self.asubmit)
+
+    async def asubmit(self):
+        self.object = await self.aget_object()
+        if self.object.is_wizard:
+            return await sync_to_async(self.process_step)(await sync_to_async(self.get_form)())
+        limited = await self.arate_limited(self.object)
+        if limited is not None:
+            return limited
+        form = await sync_to_async(self.get_form)()
+        if await sync_to_async(form.is_valid)():
+            try:
+                await self.object.aprefetch_apis(await sync_to_async(form.get_response_data)())
+            except FormAPIError as e:
+                return await sync_to_async(self.form_api_error)(form, e)
+        return await sync_to_async(self.process_form)(form)
+
+
+class AsyncFormResponseView(AsyncDetailMixin, FormResponseView):
+    """`FormResponseView` for ASGI, see `AsyncFormGeneratorView`."""
+
+    def get_queryset(self):
+        return super().get_queryset().select_related("form")
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        context = await sync_to_async(self.get_context_data)(object=self.object)
+        return await sync_to_async(self.render_to_response)(context)
+
+    async def post(self, request, *args, **kwargs):
+        return await self.aidempotent(request, self.asubmit)
+
+    async def asubmit(self):
+        self.object = await self.aget_object()
+        limited = await self.arate_limited(self.object.form)
+        if limited is not None:
+            return limited
+        form = await sync_to_async(self.get_form)()
+        if await sync_to_async(form.is_valid)():
+            try:
+                await self.object.form.aprefetch_apis(await sync_to_async(form.get_response_data)())
+            except FormAPIError as e:
+                return await sync_to_async(self.form_api_error)(form, e)
+        return await sync_to_async(self.process_form)(form)
+
+
+class FormPreAPIView(MeasureRenderMixin, FormPreviewMixin, DetailView):
+    """Results of the pre load apis of a form (all of them or the `?api=<id>` one), an htmx fragment
+    loaded once the form is shown."""
+
+    template_name = "django_form_generator/pre_apis.html"
+
+    def filter_results(self, results: list):
+        api_id = self.request.GET.get("api")
+        return [(pk, result) for pk, result in results if not api_id or str(pk) == api_id]
+
+    def get_context_data(self, **kwargs):
+        if "results" not in kwargs:
+            kwargs["results"] = self.filter_results(self.object.render_pre_apis({"request": self.request}))
+        return super().get_context_data(**kwargs)
+
+
+class AsyncFormPreAPIView(AsyncDetailMixin, FormPreAPIView):
+    """`FormPreAPIView` for ASGI, the apis are called concurrently."""
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        results = self.filter_results(await self.object.arender_pre_apis({"request": request}))
+        context = await sync_to_async(self.get_context_data)(object=self.object, results=results)
+        return await sync_to_async(self.render_to_response)(context)
+
+
+class FieldOptionsView(DetailView):
+    """`<option>`s of a field with `async_options` whose names start with `?search=`, swapped into its select by htmx.
+
+    The selected options (sent with the name of the field) are kept. Only the fields of valid forms are searched,
+    staff members & superusers can also search the fields of the forms they preview (see `FormPreviewMixin`).
+    """
+
+    queryset = Field.objects.filter(is_active=True, async_options=True)
+    model = Field
+    template_name = "django_form_generator/options.html"
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if can_preview(self.request.user):
+            return queryset
+        return queryset.filter_in_valid_forms()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        selected_ids = [value for value in self.request.GET.getlist(self.object.name) if value.isdigit()]
+        selected = list(self.object.get_choices().filter(id__in=selected_ids).values("id", "name")) if selected_ids else []
+        options = self.object.search_choices(self.request.GET.get("search", "").strip())
+        if selected:
+            options = options.exclude(id__in=[option["id"] for option in selected])
+        context["selected"] = selected
+        context["options"] = options.values("id", "name")[:fg_settings.OPTIONS_PAGE_SIZE]
+        return context
+
+
+class MetricsView(View):
+    """Expose the collected metrics of this worker in prometheus text format"""
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(
+            get_collector().render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )